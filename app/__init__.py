@@ -88,6 +88,10 @@ def create_app(config_name=None):
     app.register_blueprint(payment, url_prefix='/payment')
     app.register_blueprint(student, url_prefix='/student')
     
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found_error(error):
@@ -105,5 +109,7 @@ def create_app(config_name=None):
     # Create database tables
     with app.app_context():
         db.create_all()
+        from app.search import ensure_search_index
+        ensure_search_index()
     
     return app
\ No newline at end of file
@@ -0,0 +1,198 @@
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+import hashlib
+import json
+import threading
+import time
+
+
+class LRUCache:
+    """In-process cache; the least recently used page is dropped once max_entries is reached.
+
+    Each worker process has its own copy, so invalidation only reaches the
+    process that made the change. Use the redis backend with several workers.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tags = {}  # kept apart from the pages so eviction never resets a tag
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return [self._tags.get(tag, 0) for tag in tags]
+
+    def bump_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._tags[tag] = self._tags.get(tag, 0) + 1
+
+
+class RedisCache:
+    """Cache shared by every worker, in Redis or a server speaking its protocol (Valkey, KeyDB)."""
+
+    def __init__(self, url, prefix='partyticket:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('PAGE_CACHE_BACKEND=redis needs the redis package installed') from e
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def tag_versions(self, tags):
+        return [int(version or 0) for version in self.client.mget([f'{self.prefix}tag:{tag}' for tag in tags])]
+
+    def bump_tags(self, tags):
+        pipeline = self.client.pipeline()
+        for tag in tags:
+            pipeline.incr(f'{self.prefix}tag:{tag}')
+        pipeline.execute()
+
+
+def page_cache():
+    """Return the app's page cache backend, or None when PAGE_CACHE_BACKEND is 'null'."""
+    if 'page_cache' not in current_app.extensions:
+        config = current_app.config
+        backend = config['PAGE_CACHE_BACKEND']
+        if backend == 'lru':
+            cache = LRUCache(config['PAGE_CACHE_MAX_ENTRIES'])
+        elif backend == 'redis':
+            cache = RedisCache(config['PAGE_CACHE_URL'])
+        elif backend == 'null':
+            cache = None
+        else:
+            raise RuntimeError(f'Unknown PAGE_CACHE_BACKEND {backend!r}')
+        current_app.extensions['page_cache'] = cache
+    return current_app.extensions['page_cache']
+
+
+def invalidate_pages(*tags):
+    """Expire every cached page carrying one of ``tags``.
+
+    Pages are keyed by the versions of their tags, so bumping a version
+    makes the old copies unreachable; they age out with their TTL. Cache
+    errors are logged, never raised, so a cache outage cannot fail a write.
+    """
+    cache = page_cache()
+    if cache is None or not tags:
+        return
+    try:
+        cache.bump_tags(tags)
+    except Exception as e:
+        current_app.logger.error(f'Page cache invalidation failed for {tags}: {str(e)}')
+
+
+def tag_versions(*tags) -> tuple:
+    """Current page cache versions of ``tags``, for keying other caches of the same data.
+
+    A key that includes them expires whenever invalidate_pages() bumps one
+    of the tags, in every worker sharing the page cache. All zeros when
+    the page cache is off; errors are logged and also give zeros.
+    """
+    cache = page_cache()
+    if cache is None:
+        return (0,) * len(tags)
+    try:
+        return tuple(cache.tag_versions(tags))
+    except Exception as e:
+        current_app.logger.error(f'Page cache read failed: {str(e)}')
+        return (0,) * len(tags)
+
+
+def _cacheable():
+    # Pages for signed in users show their name and menus; flashed messages are per visitor
+    return request.method in ('GET', 'HEAD') and not current_user.is_authenticated \
+        and '_flashes' not in session
+
+
+def _page_key(cache, tags):
+    params = sorted(request.args.items(multi=True))
+    digest = hashlib.sha1(json.dumps([request.path, params]).encode('utf-8')).hexdigest()
+    versions = '.'.join(str(version) for version in cache.tag_versions(tags))
+    return f'page:{request.endpoint}:{digest}:{versions}'
+
+
+def _conditional_response(entry, status):
+    response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+    response.set_etag(entry['etag'])
+    response.last_modified = datetime.fromtimestamp(entry['last_modified'], timezone.utc)
+    # Browsers keep the page but revalidate every time, so changes show at once
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Cookie')
+    response.headers['X-Page-Cache'] = status
+    return response.make_conditional(request)
+
+
+def cached_page(*tags, ttl=None):
+    """Cache a public GET view's rendered page for anonymous visitors.
+
+    ``tags`` name what the page shows and may use the view's arguments,
+    e.g. ``'event:{event_id}'``; invalidate_pages() with any of them drops
+    the page. The key also covers the path and query string. Responses
+    carry an ETag and Last-Modified, so repeat visits can get a 304.
+    Only 200 responses are cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            cache = page_cache()
+            if cache is None or not _cacheable():
+                return view(**kwargs)
+
+            page_tags = [tag.format(**kwargs) for tag in tags]
+            try:
+                key = _page_key(cache, page_tags)
+                entry = cache.get(key)
+            except Exception as e:
+                current_app.logger.error(f'Page cache read failed: {str(e)}')
+                return view(**kwargs)
+            if entry is not None:
+                return _conditional_response(entry, 'hit')
+
+            response = make_response(view(**kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            body = response.get_data(as_text=True)
+            entry = {
+                'body': body,
+                'mimetype': response.mimetype,
+                'etag': hashlib.sha1(body.encode('utf-8')).hexdigest(),
+                'last_modified': int(time.time()),
+            }
+            try:
+                cache.set(key, entry, ttl or current_app.config['PAGE_CACHE_TTL'])
+            except Exception as e:
+                current_app.logger.error(f'Page cache write failed: {str(e)}')
+            return _conditional_response(entry, 'miss')
+        return wrapper
+    return decorator
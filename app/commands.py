@@ -0,0 +1,69 @@
+import click
+from app.reaper import reap_abandoned_checkouts, REAP_BATCH_SIZE
+from app.stats import reconcile_event_stats
+from app.metrics import refresh_metrics
+from app.earnings import snapshot_earnings
+from datetime import datetime, timedelta
+
+
+def register_commands(app):
+    """Register the app's maintenance commands with the Flask CLI."""
+
+    @app.cli.command('reap-checkouts')
+    @click.option('--older-than', type=int, default=None,
+                  help='Age in seconds after which an unpaid checkout is abandoned (default: REAPER_PENDING_AGE).')
+    @click.option('--batch-size', type=int, default=REAP_BATCH_SIZE, show_default=True)
+    @click.option('--max-batches', type=int, default=None, help='Stop each step after this many batches.')
+    @click.option('--archive', is_flag=True, help='Move reaped rows to the archive tables instead of dropping them.')
+    def reap_checkouts(older_than, batch_size, max_batches, archive):
+        """Expire abandoned checkouts and their pending tickets.
+
+        Run it on a schedule, e.g. hourly from cron or Heroku Scheduler.
+        """
+        totals = reap_abandoned_checkouts(older_than, batch_size, archive, max_batches)
+        click.echo(
+            f"Expired {totals['holds_expired']} holds, "
+            f"reaped {totals['transactions']} transactions and {totals['tickets']} tickets, "
+            f"deleted {totals['holds_deleted']} finished holds"
+        )
+
+    @app.cli.command('reconcile-stats')
+    @click.option('--event-id', 'event_ids', type=int, multiple=True, help='Only check these events (repeatable).')
+    @click.option('--dry-run', is_flag=True, help='Report drift without fixing it.')
+    def reconcile_stats(event_ids, dry_run):
+        """Recount event sales counters from the ticket rows and fix any drift.
+
+        The counters are kept up to date as tickets are paid for and scanned;
+        run this nightly, or after fixing tickets by hand.
+        """
+        drift = reconcile_event_stats(list(event_ids) or None, dry_run)
+        for entry in drift:
+            click.echo(f"event {entry['event_id']}: stored {entry['stored']} actual {entry['actual']}")
+        click.echo(f"{len(drift)} events {'drifted' if dry_run else 'corrected'}")
+
+    @app.cli.command('refresh-metrics')
+    @click.option('--days', type=int, default=None,
+                  help='Recount this many trailing days (default: METRICS_REFRESH_DAYS).')
+    @click.option('--full', is_flag=True, help='Rebuild every day since the first record.')
+    def refresh_metrics_command(days, full):
+        """Recompute the daily rollups behind the admin dashboard.
+
+        The dashboard refreshes the last few days itself once they are older
+        than ADMIN_METRICS_MAX_AGE; run this nightly so it rarely has to, and
+        with --full after deploying or editing old records by hand.
+        """
+        since = datetime.utcnow().date() - timedelta(days=days - 1) if days else None
+        written = refresh_metrics(since, full)
+        click.echo(f'Refreshed {written} days of metrics')
+
+    @app.cli.command('snapshot-earnings')
+    @click.option('--lag', type=int, default=None,
+                  help='Leave entries newer than this many seconds in the tail (default: EARNINGS_SNAPSHOT_LAG).')
+    def snapshot_earnings_command(lag):
+        """Fold new earnings ledger entries into the organizers' balance snapshots.
+
+        Balances are the snapshot plus the entries after it; run this every
+        few minutes so that tail stays short.
+        """
+        updated = snapshot_earnings(lag)
+        click.echo(f'Updated {updated} earnings snapshots')
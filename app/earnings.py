@@ -0,0 +1,102 @@
+from flask import current_app
+from app import db
+from app.models import User, EarningsEntry, EarningsSnapshot
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+
+def to_kobo(naira) -> int:
+    """Convert a naira amount (float, Decimal or str) to whole kobo, rounding half up."""
+    return int((Decimal(str(naira)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def credit(organizer_id: int, naira, kind: str, reference: str) -> bool:
+    """Append an earnings entry for an organizer. The caller commits.
+
+    Only inserts, so payments for the same organizer never wait on each
+    other or on the user row. ``reference`` names what was paid for (a
+    transaction reference, an invitation id); crediting the same kind and
+    reference again is a no-op and returns False.
+    """
+    try:
+        with db.session.begin_nested():
+            db.session.execute(db.insert(EarningsEntry).values(
+                organizer_id=organizer_id, amount_kobo=to_kobo(naira), kind=kind,
+                reference=str(reference), created_at=datetime.utcnow()))
+    except IntegrityError:
+        return False
+    return True
+
+
+def balances(organizer_ids) -> dict:
+    """Current earnings in kobo for the given organizers, as {organizer_id: kobo}, in one query.
+
+    Each balance is the organizer's snapshot plus the ledger entries after
+    it, so the work grows with the entries since the last snapshot_earnings(),
+    not with the whole history. Organizers with no earnings map to 0.
+    """
+    organizer_ids = list(organizer_ids)
+    if not organizer_ids:
+        return {}
+    tail = db.select(db.func.coalesce(db.func.sum(EarningsEntry.amount_kobo), 0)) \
+        .where(EarningsEntry.organizer_id == User.id,
+               EarningsEntry.id > db.func.coalesce(EarningsSnapshot.last_entry_id, 0)) \
+        .correlate(User, EarningsSnapshot).scalar_subquery()
+    query = db.select(User.id, db.func.coalesce(EarningsSnapshot.balance_kobo, 0) + tail) \
+        .outerjoin(EarningsSnapshot, EarningsSnapshot.organizer_id == User.id) \
+        .where(User.id.in_(organizer_ids))
+    result = dict.fromkeys(organizer_ids, 0)
+    result.update({organizer_id: int(kobo) for organizer_id, kobo in db.session.execute(query)})
+    return result
+
+
+def balance(organizer_id: int) -> int:
+    """An organizer's current earnings in kobo."""
+    return balances([organizer_id])[organizer_id]
+
+
+def snapshot_earnings(lag: int = None) -> int:
+    """Fold ledger entries into the organizers' snapshots and commit. Returns the organizers updated.
+
+    Only entries older than ``lag`` seconds (EARNINGS_SNAPSHOT_LAG) are
+    folded in. Ids are assigned when a row is inserted, not when it
+    commits, so a payment still in flight could hold an id below the
+    newest committed one; the lag keeps such entries in the tail, where
+    they are counted once they commit.
+    """
+    if lag is None:
+        lag = current_app.config['EARNINGS_SNAPSHOT_LAG']
+    cutoff = db.session.query(db.func.max(EarningsEntry.id)) \
+        .filter(EarningsEntry.created_at <= datetime.utcnow() - timedelta(seconds=lag)).scalar()
+    if cutoff is None:
+        db.session.commit()
+        return 0
+
+    pending = db.session.query(
+        EarningsEntry.organizer_id, EarningsSnapshot.last_entry_id, db.func.sum(EarningsEntry.amount_kobo)
+    ).outerjoin(EarningsSnapshot, EarningsSnapshot.organizer_id == EarningsEntry.organizer_id) \
+        .filter(EarningsEntry.id > db.func.coalesce(EarningsSnapshot.last_entry_id, 0), EarningsEntry.id <= cutoff) \
+        .group_by(EarningsEntry.organizer_id, EarningsSnapshot.last_entry_id).all()
+
+    now = datetime.utcnow()
+    updated = 0
+    for organizer_id, last_entry_id, amount in pending:
+        if last_entry_id is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(EarningsSnapshot).values(
+                        organizer_id=organizer_id, balance_kobo=amount, last_entry_id=cutoff, updated_at=now))
+                updated += 1
+            except IntegrityError:
+                pass  # a concurrent run created it; the next run folds in anything left
+            continue
+        # Only advance from the snapshot the sum was taken over, so a concurrent run cannot fold entries twice
+        updated += db.session.execute(
+            db.update(EarningsSnapshot)
+            .where(EarningsSnapshot.organizer_id == organizer_id, EarningsSnapshot.last_entry_id == last_entry_id)
+            .values(balance_kobo=EarningsSnapshot.balance_kobo + amount, last_entry_id=cutoff, updated_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    db.session.commit()
+    return updated
@@ -0,0 +1,158 @@
+from flask import current_app
+from flask_mail import Message
+from markupsafe import Markup
+from app.cache import LRUCache
+from app.models import Ticket, Event, User
+from app.qr_utils import ticket_qr_pngs
+from datetime import timedelta
+import re
+import threading
+import time
+
+CONFIRMATION_TEMPLATE = 'emails/ticket_confirmation.html'
+EVENT_DETAILS_TEMPLATE = 'emails/_event_details.html'
+QR_CID_DOMAIN = 'partyticket.ng'
+_INDENT = re.compile(r'\n\s+')
+
+
+def calendar_link(event: Event) -> str:
+    """Generate Google Calendar link for event."""
+    start_time = event.date.strftime('%Y%m%dT%H%M%S')
+    end_time = (event.date + timedelta(hours=3)).strftime('%Y%m%dT%H%M%S')
+    title = event.name.replace(' ', '+')
+    location = event.location.replace(' ', '+')
+    details = event.description[:200].replace(' ', '+')
+
+    return (f"https://calendar.google.com/calendar/render?"
+            f"action=TEMPLATE&text={title}&dates={start_time}/{end_time}"
+            f"&details={details}&location={location}")
+
+
+def _compact(html: str) -> str:
+    """Drop the templates' indentation, nearly half of the message and means nothing in HTML email."""
+    return _INDENT.sub('\n', html)
+
+
+class InlineImageMessage(Message):
+    """A Message whose attachments are images the HTML shows through cid: links.
+
+    Flask-Mail wraps attachments in multipart/mixed, which clients list as
+    downloads; multipart/related tells them the images belong to the body.
+    """
+
+    def _message(self):
+        msg = super()._message()
+        if self.attachments:
+            msg.set_type('multipart/related')
+        return msg
+
+
+class EmailRenderer:
+    """Renders ticket confirmation emails, reusing what every buyer of an event shares.
+
+    Compiled templates are held rather than looked up per email (unless
+    Jinja auto reload is on), and each event's details block is rendered
+    once and kept in an LRU keyed on the fields it shows, so an edited
+    event is rendered afresh. QR codes go out as inline PNG parts instead
+    of base64 inside the HTML.
+    """
+
+    def __init__(self, jinja_env, max_fragments=256, fragment_ttl=3600):
+        self.jinja_env = jinja_env
+        self.fragment_ttl = fragment_ttl
+        self._fragments = LRUCache(max_fragments)
+        self._templates = {}
+        self._totals = {'emails': 0, 'fragment_hits': 0, 'render_ms': 0.0, 'bytes': 0, 'max_bytes': 0}
+        self._lock = threading.Lock()
+
+    def _template(self, name):
+        if self.jinja_env.auto_reload:
+            return self.jinja_env.get_template(name)  # picks up edits in development
+        if name not in self._templates:
+            self._templates[name] = self.jinja_env.get_template(name)
+        return self._templates[name]
+
+    def _event_details(self, event: Event, ticket_count: int):
+        key = (event.id, event.name, event.date, event.location, event.description, ticket_count)
+        html = self._fragments.get(key)
+        if html is not None:
+            return Markup(html), True
+        html = _compact(self._template(EVENT_DETAILS_TEMPLATE).render(
+            event=event, ticket_count=ticket_count, calendar_link=calendar_link(event)))
+        self._fragments.set(key, html, self.fragment_ttl)
+        return Markup(html), False
+
+    def render_ticket_confirmation(self, user: User, event: Event, tickets: list[Ticket]):
+        """Build the confirmation email for a buyer's tickets.
+
+        Returns (message, metrics). metrics holds render_ms, qr_ms, html_bytes,
+        inline_bytes, images and fragment_cached for this one email.
+        """
+        started = time.perf_counter()
+        details, cached = self._event_details(event, len(tickets))
+        qr_started = time.perf_counter()
+        images = ticket_qr_pngs(tickets)
+        qr_ms = (time.perf_counter() - qr_started) * 1000
+        qr_cids = {ticket_id: f'ticket-{ticket_id}@{QR_CID_DOMAIN}' for ticket_id in images}
+
+        html = _compact(self._template(CONFIRMATION_TEMPLATE).render(
+            user=user, event=event, tickets=tickets, event_details=details, qr_cids=qr_cids))
+        msg = InlineImageMessage(
+            subject=f"🎫 Your ticket(s) for {event.name} - PartyTicket Nigeria",
+            recipients=[user.email],
+            html=html,
+        )
+        for ticket_id, png in images.items():
+            msg.attach(f'ticket-{ticket_id}.png', 'image/png', png, 'inline',
+                       headers={'Content-ID': f'<{qr_cids[ticket_id]}>'})
+
+        metrics = {
+            'render_ms': (time.perf_counter() - started) * 1000,
+            'qr_ms': qr_ms,
+            'html_bytes': len(html.encode('utf-8')),
+            'inline_bytes': sum(len(png) for png in images.values()),
+            'images': len(images),
+            'fragment_cached': cached,
+        }
+        size = metrics['html_bytes'] + metrics['inline_bytes']
+        with self._lock:
+            self._totals['emails'] += 1
+            self._totals['fragment_hits'] += cached
+            self._totals['render_ms'] += metrics['render_ms']
+            self._totals['bytes'] += size
+            self._totals['max_bytes'] = max(self._totals['max_bytes'], size)
+        return msg, metrics
+
+    def stats(self) -> dict:
+        """Totals for the emails rendered by this process: count, fragment hit rate, mean time and size."""
+        with self._lock:
+            totals = dict(self._totals)
+        emails = totals['emails']
+        return {
+            'emails': emails,
+            'fragment_hit_rate': totals['fragment_hits'] / emails if emails else 0.0,
+            'avg_render_ms': totals['render_ms'] / emails if emails else 0.0,
+            'avg_bytes': totals['bytes'] // emails if emails else 0,
+            'max_bytes': totals['max_bytes'],
+        }
+
+
+def renderer() -> EmailRenderer:
+    """Return the app's email renderer, creating it on first use."""
+    if 'email_renderer' not in current_app.extensions:
+        current_app.extensions['email_renderer'] = EmailRenderer(
+            current_app.jinja_env,
+            max_fragments=current_app.config['EMAIL_FRAGMENT_CACHE_SIZE'],
+            fragment_ttl=current_app.config['EMAIL_FRAGMENT_CACHE_TTL'],
+        )
+    return current_app.extensions['email_renderer']
+
+
+def render_ticket_confirmation(user: User, event: Event, tickets: list[Ticket]):
+    """Build a buyer's confirmation email; returns (message, per-email metrics)."""
+    return renderer().render_ticket_confirmation(user, event, tickets)
+
+
+def render_stats() -> dict:
+    """Rendering totals for this process; see EmailRenderer.stats()."""
+    return renderer().stats()
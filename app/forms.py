@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, DateTimeField, FloatField, IntegerField, TextAreaField, SelectField, BooleanField, EmailField
-from wtforms.validators import DataRequired, EqualTo, Length, NumberRange, Email
+from wtforms.validators import DataRequired, EqualTo, Length, NumberRange, Email, Optional
 
 class RegistrationForm(FlaskForm):
     """User registration form."""
@@ -29,6 +29,7 @@ class EventForm(FlaskForm):
     location = StringField('Location', validators=[DataRequired(), Length(max=150)])
     price = FloatField('Ticket Price (₦)', validators=[DataRequired(), NumberRange(min=0)])
     invitation_fee = FloatField('Invitation Creation Fee (₦)', validators=[DataRequired(), NumberRange(min=0)], default=0.0)
+    capacity = IntegerField('Capacity', validators=[Optional(), NumberRange(min=1)])
     category = SelectField('Event Category', choices=[
         ('general', 'General Event'),
         ('formal', 'Formal Event (Wedding, Corporate, etc.)'),
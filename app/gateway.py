@@ -0,0 +1,131 @@
+from flask import current_app
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import deque
+import threading
+import time
+
+# Config keys holding each provider's API base URL and secret key
+PROVIDERS = {
+    'paystack': ('PAYSTACK_BASE_URL', 'PAYSTACK_SECRET_KEY'),
+    'flutterwave': ('FLUTTERWAVE_BASE_URL', 'FLUTTERWAVE_SECRET_KEY'),
+}
+LATENCY_SAMPLES = 1000
+
+
+class GatewayMetrics:
+    """Per-provider call counts, errors and latency percentiles."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, provider: str, elapsed_ms: float, ok: bool) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(provider, {
+                'calls': 0, 'errors': 0, 'max_ms': 0.0, 'samples': deque(maxlen=LATENCY_SAMPLES)
+            })
+            stats['calls'] += 1
+            stats['errors'] += 0 if ok else 1
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['samples'].append(elapsed_ms)
+
+    def snapshot(self) -> dict:
+        """Return metrics per provider; percentiles cover the most recent calls."""
+        with self._lock:
+            result = {}
+            for provider, stats in self._stats.items():
+                samples = sorted(stats['samples'])
+                result[provider] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'p50_ms': round(samples[len(samples) // 2], 1) if samples else None,
+                    'p95_ms': round(samples[int(len(samples) * 0.95)], 1) if samples else None,
+                    'max_ms': round(stats['max_ms'], 1),
+                }
+            return result
+
+
+class GatewayClient:
+    """HTTP client for one payment gateway.
+
+    Calls share a pooled keep-alive session, so checkouts reuse open TLS
+    connections instead of handshaking each time. Every call has a connect
+    and read timeout. Connection failures are retried with backoff; GETs
+    are also retried on 429/5xx responses, while POSTs are not, since the
+    gateway may already have acted on them.
+    """
+
+    def __init__(self, provider: str, base_url: str, secret_key: str, metrics: GatewayMetrics,
+                 timeout=(3.05, 10), max_retries: int = 2, backoff: float = 0.3, pool_size: int = 10,
+                 slow_call_ms: float = 2000):
+        self.provider = provider
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.metrics = metrics
+        self.slow_call_ms = slow_call_ms
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {secret_key}',
+            'Content-Type': 'application/json'
+        })
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self.session.request(method, self.base_url + path, **kwargs)
+            ok = response.status_code < 500
+            return response
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.metrics.record(self.provider, elapsed_ms, ok)
+            if elapsed_ms > self.slow_call_ms:
+                current_app.logger.warning(f'Slow {self.provider} call: {method} {path} took {elapsed_ms:.0f}ms')
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request('POST', path, **kwargs)
+
+
+def gateway(provider: str) -> GatewayClient:
+    """Return the app's shared client for a payment provider, creating it on first use."""
+    state = current_app.extensions.setdefault('payment_gateways', {'clients': {}, 'metrics': GatewayMetrics()})
+    client = state['clients'].get(provider)
+    if client is None:
+        config = current_app.config
+        base_url_key, secret_key = PROVIDERS[provider]
+        client = GatewayClient(
+            provider,
+            config[base_url_key],
+            config[secret_key],
+            state['metrics'],
+            timeout=(config['GATEWAY_CONNECT_TIMEOUT'], config['GATEWAY_READ_TIMEOUT']),
+            max_retries=config['GATEWAY_MAX_RETRIES'],
+            backoff=config['GATEWAY_RETRY_BACKOFF'],
+            pool_size=config['GATEWAY_POOL_SIZE'],
+            slow_call_ms=config['GATEWAY_SLOW_CALL_MS']
+        )
+        state['clients'][provider] = client
+    return client
+
+
+def gateway_metrics() -> dict:
+    """Return latency metrics for every provider called by this process."""
+    state = current_app.extensions.get('payment_gateways')
+    return state['metrics'].snapshot() if state else {}
@@ -0,0 +1,173 @@
+from flask import current_app
+from app import db
+from app.models import Event, Ticket, TicketTier, InventoryHold
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+
+DEFAULT_TIER_NAME = 'General Admission'
+HOLD_BATCH_SIZE = 500
+
+
+def default_tier(event: Event):
+    """Return the tier sold when a checkout does not name one.
+
+    Capacity-limited events without tiers get a 'General Admission' tier
+    covering their whole capacity. Returns None for unlimited events.
+    """
+    tier = TicketTier.query.filter_by(event_id=event.id).order_by(TicketTier.id).first()
+    if tier or event.capacity is None:
+        return tier
+    try:
+        with db.session.begin_nested():
+            tier = TicketTier(event_id=event.id, name=DEFAULT_TIER_NAME, price=event.price, capacity=event.capacity)
+            db.session.add(tier)
+    except IntegrityError:
+        # Another checkout created it first
+        tier = TicketTier.query.filter_by(event_id=event.id, name=DEFAULT_TIER_NAME).one()
+    return tier
+
+
+def _take(tier_id: int, quantity: int) -> bool:
+    """Move stock into ``held`` if, and only if, enough is left."""
+    result = db.session.execute(
+        db.update(TicketTier)
+        .where(TicketTier.id == tier_id,
+               TicketTier.held + TicketTier.sold + quantity <= TicketTier.capacity)
+        .values(held=TicketTier.held + quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def reserve_tickets(tier: TicketTier, quantity: int, user_id: int, reference: str):
+    """Hold ``quantity`` tickets of a tier for a checkout.
+
+    Stock is taken with a conditional UPDATE on the tier row only, so
+    concurrent checkouts can never hold or sell more than its capacity and
+    the event row is never locked. If the tier looks sold out, holds that
+    have expired are reclaimed and the reservation is retried once.
+    Returns the new InventoryHold, or None if there are not enough tickets
+    left. The caller commits; do so promptly, as the tier row stays locked
+    until then.
+    """
+    if not _take(tier.id, quantity):
+        if not expire_holds(tier_id=tier.id) or not _take(tier.id, quantity):
+            return None
+
+    ttl = current_app.config.get('INVENTORY_HOLD_TTL', 900)
+    hold = InventoryHold(
+        tier_id=tier.id,
+        user_id=user_id,
+        reference=reference,
+        quantity=quantity,
+        expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+    )
+    db.session.add(hold)
+    return hold
+
+
+def _end_hold(condition, status: str, from_statuses=('active',)):
+    """Move one hold to ``status``, returning (tier_id, quantity, reference) or None."""
+    return db.session.execute(
+        db.update(InventoryHold)
+        .where(condition, InventoryHold.status.in_(from_statuses))
+        .values(status=status)
+        .returning(InventoryHold.tier_id, InventoryHold.quantity, InventoryHold.reference)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+
+def _release(condition, status: str) -> bool:
+    """End a hold without a sale, returning its stock and cancelling its pending tickets."""
+    ended = _end_hold(condition, status)
+    if ended is None:
+        return False
+    tier_id, quantity, reference = ended
+    db.session.execute(
+        db.update(TicketTier)
+        .where(TicketTier.id == tier_id)
+        .values(held=TicketTier.held - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        db.update(Ticket)
+        .where(Ticket.paystack_ref == reference, Ticket.payment_status == 'pending')
+        .values(payment_status='cancelled', updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return True
+
+
+def release_hold(reference: str) -> bool:
+    """Give back the stock held for a checkout that will not be paid. The caller commits."""
+    return _release(InventoryHold.reference == reference, 'released')
+
+
+def expire_holds(now: datetime = None, tier_id: int = None, limit: int = HOLD_BATCH_SIZE) -> int:
+    """Release up to ``limit`` holds whose checkout was abandoned.
+
+    Returns the number of holds expired. The caller commits.
+    """
+    query = db.session.query(InventoryHold.id).filter(
+        InventoryHold.status == 'active',
+        InventoryHold.expires_at <= (now or datetime.utcnow())
+    )
+    if tier_id is not None:
+        query = query.filter(InventoryHold.tier_id == tier_id)
+    hold_ids = [hold_id for (hold_id,) in query.order_by(InventoryHold.expires_at).limit(limit)]
+    return sum(_release(InventoryHold.id == hold_id, 'expired') for hold_id in hold_ids)
+
+
+def _sell_within_capacity(tier_id: int, quantity: int) -> bool:
+    result = db.session.execute(
+        db.update(TicketTier)
+        .where(TicketTier.id == tier_id,
+               TicketTier.held + TicketTier.sold + quantity <= TicketTier.capacity)
+        .values(sold=TicketTier.sold + quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def sell_tickets(tier_id: int, quantity: int, reference: str) -> None:
+    """Count a paid sale that has no active hold behind it.
+
+    This happens when a payment lands after its hold expired, or when the
+    webhook issues tickets for a checkout it never saw. The money has
+    already been taken, so the sale is recorded even if it takes the tier
+    past capacity, and the overrun is logged for the organizer to refund.
+    """
+    if not _sell_within_capacity(tier_id, quantity):
+        current_app.logger.error(f'Payment {reference} sold {quantity} ticket(s) beyond tier {tier_id} capacity')
+        db.session.execute(
+            db.update(TicketTier)
+            .where(TicketTier.id == tier_id)
+            .values(sold=TicketTier.sold + quantity)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def convert_hold(reference: str) -> bool:
+    """Turn a checkout's stock from held into sold once it is paid.
+
+    Returns True if the reference had a hold. A hold that already expired
+    is sold again through sell_tickets(). The caller commits.
+    """
+    ended = _end_hold(InventoryHold.reference == reference, 'converted')
+    if ended is not None:
+        tier_id, quantity, _ = ended
+        db.session.execute(
+            db.update(TicketTier)
+            .where(TicketTier.id == tier_id)
+            .values(held=TicketTier.held - quantity, sold=TicketTier.sold + quantity)
+            .execution_options(synchronize_session=False)
+        )
+        return True
+
+    ended = _end_hold(InventoryHold.reference == reference, 'converted', ('expired', 'released'))
+    if ended is None:
+        return False
+    tier_id, quantity, _ = ended
+    sell_tickets(tier_id, quantity, reference)
+    return True
+
@@ -0,0 +1,182 @@
+from flask import current_app
+from app import db
+from app.models import Job
+from datetime import datetime, timedelta
+import time
+
+_handlers = {}
+_mail_jobs = set()
+
+
+def job(name: str, batch_mail: bool = False):
+    """Register a function as the handler for jobs with the given name.
+
+    With ``batch_mail`` the worker runs due jobs of this kind together and
+    sends their mail in one batch over the shared SMTP connection. Such
+    handlers must only read the database and send_mail(), since their mail
+    goes out after they return.
+    """
+    def decorator(func):
+        _handlers[name] = func
+        if batch_mail:
+            _mail_jobs.add(name)
+        return func
+    return decorator
+
+
+def enqueue(name: str, max_attempts: int = None, run_at: datetime = None, **payload) -> Job:
+    """Add a job to the session.
+
+    The job is committed together with the caller's transaction, so work is
+    only queued if the state it depends on (e.g. a successful payment) is
+    committed too.
+    """
+    job = Job(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 5),
+        run_at=run_at or datetime.utcnow()
+    )
+    db.session.add(job)
+    return job
+
+
+def _claim(job_id: int, now: datetime) -> bool:
+    """Claim a job with a conditional UPDATE so only one worker runs it.
+
+    Jobs left running by a worker that died are reclaimed once their lock
+    is older than JOB_LOCK_TIMEOUT seconds.
+    """
+    stale = now - timedelta(seconds=current_app.config.get('JOB_LOCK_TIMEOUT', 600))
+    result = db.session.execute(
+        db.update(Job)
+        .where(
+            Job.id == job_id,
+            db.or_(Job.status == 'queued', db.and_(Job.status == 'running', Job.locked_at < stale))
+        )
+        .values(status='running', locked_at=now, attempts=Job.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _call(job: Job) -> None:
+    handler = _handlers.get(job.name)
+    if handler is None:
+        raise LookupError(f'No handler registered for job {job.name!r}')
+    handler(**(job.payload or {}))
+
+
+def _failed(job_id: int, error: Exception) -> None:
+    """Record a failed attempt, scheduling a retry with backoff. Rolls back the job's work first."""
+    db.session.rollback()
+    job = db.session.get(Job, job_id)
+    job.last_error = f'{type(error).__name__}: {error}'
+    if job.attempts >= job.max_attempts:
+        job.status = 'failed'
+        job.finished_at = datetime.utcnow()
+        current_app.logger.error(f'Job {job.id} ({job.name}) failed permanently: {error}')
+    else:
+        backoff = current_app.config.get('JOB_RETRY_BACKOFF', 30) * 2 ** (job.attempts - 1)
+        job.status = 'queued'
+        job.run_at = datetime.utcnow() + timedelta(seconds=backoff)
+        current_app.logger.warning(f'Job {job.id} ({job.name}) failed, retrying in {backoff}s: {error}')
+    db.session.commit()
+
+
+def _done(job: Job) -> None:
+    job.status = 'done'
+    job.finished_at = datetime.utcnow()
+    job.last_error = None
+    db.session.commit()
+
+
+def _run(job: Job) -> None:
+    """Run one claimed job, scheduling a retry with backoff if it fails."""
+    try:
+        _call(job)
+    except Exception as e:
+        _failed(job.id, e)
+        return
+    _done(job)
+
+
+def _run_mail_batch(job_ids: list) -> None:
+    """Run claimed mail jobs, then send all their mail in one batch.
+
+    Each job's messages are collected while its handler runs. A job is done
+    once all of its messages are sent; a handler error or a message that
+    still fails after the dispatcher's retries fails only that job.
+    """
+    from app.mailer import collect_mail, dispatcher
+
+    outbox = []  # (job_id, message)
+    errors = {}
+    for job_id in job_ids:
+        try:
+            with collect_mail() as messages:
+                _call(db.session.get(Job, job_id))
+        except Exception as e:
+            db.session.rollback()
+            errors[job_id] = e
+            continue
+        outbox.extend((job_id, message) for message in messages)
+    db.session.rollback()  # handlers only read; end their transaction before the SMTP round trips
+
+    if outbox:
+        job_by_message = {id(message): job_id for job_id, message in outbox}
+        for message, e in dispatcher().send_batch([message for _, message in outbox]):
+            errors.setdefault(job_by_message[id(message)], e)
+
+    for job_id in job_ids:
+        if job_id in errors:
+            _failed(job_id, errors[job_id])
+        else:
+            _done(db.session.get(Job, job_id))
+
+
+def work_once(limit: int = 10) -> int:
+    """Claim and run up to ``limit`` due jobs. Returns the number run."""
+    import app.tasks  # noqa: F401 - registers job handlers
+
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config.get('JOB_LOCK_TIMEOUT', 600))
+    due = db.session.query(Job.id).filter(
+        db.or_(
+            db.and_(Job.status == 'queued', Job.run_at <= now),
+            db.and_(Job.status == 'running', Job.locked_at < stale)
+        )
+    ).order_by(Job.run_at).limit(limit).all()
+    db.session.commit()
+
+    processed = 0
+    mail_batch = []
+    for (job_id,) in due:
+        if not _claim(job_id, now):
+            continue  # another worker got it first
+        job = db.session.get(Job, job_id)
+        if job.name in _mail_jobs:
+            mail_batch.append(job_id)
+        else:
+            _run(job)
+        processed += 1
+    if mail_batch:
+        _run_mail_batch(mail_batch)
+    return processed
+
+
+def run_worker(poll_interval: float = None) -> None:
+    """Process jobs until interrupted, sleeping when the queue is empty."""
+    if poll_interval is None:
+        poll_interval = current_app.config.get('JOB_POLL_INTERVAL', 2)
+    current_app.logger.info('Job worker started')
+    while True:
+        try:
+            processed = work_once(current_app.config.get('JOB_BATCH_SIZE', 50))
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Job worker error: {e}')
+            processed = 0
+        if not processed:
+            time.sleep(poll_interval)
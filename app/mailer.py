@@ -0,0 +1,133 @@
+from flask import current_app
+from app import mail
+from contextlib import contextmanager
+import smtplib
+import threading
+import time
+
+
+class MailDispatcher:
+    """Sends mail over one SMTP connection that is kept open between messages.
+
+    Opening a connection costs a TCP (and usually TLS) handshake and a login,
+    which is most of the time spent sending a small message. The connection
+    is reopened when the server drops it, after MAIL_CONNECTION_IDLE_TIMEOUT
+    seconds without use, and after MAIL_MAX_EMAILS messages if that is set.
+    A lock serializes senders, so one dispatcher can be shared by threads.
+    """
+
+    def __init__(self, retries=3, backoff=0.5, idle_timeout=60):
+        self.retries = retries
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+        self._connection = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        connection = mail.connect()
+        connection.__enter__()
+        return connection
+
+    def close(self):
+        """Quit the open connection, if any."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and connection.host is not None:
+            try:
+                connection.host.quit()
+            except (smtplib.SMTPException, OSError):
+                pass  # already gone
+
+    @staticmethod
+    def _is_transient(error):
+        # 5xx replies and refused recipients will fail the same way on a retry
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return False
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code < 500
+        return isinstance(error, OSError)  # disconnects, timeouts, refused connections
+
+    def _send(self, message):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                if self._connection is not None and time.monotonic() - self._last_used > self.idle_timeout:
+                    self._close()  # servers drop idle clients; reconnect rather than fail the next send
+                if self._connection is None:
+                    self._connection = self._open()
+                self._connection.send(message)
+                self._last_used = time.monotonic()
+                return
+            except Exception as e:
+                self._close()
+                if attempt == self.retries or not self._is_transient(e):
+                    raise
+                current_app.logger.warning(f'SMTP send failed, retrying in {delay}s: {e}')
+                time.sleep(delay)
+                delay *= 2
+
+    def send(self, message):
+        """Send one message, retrying transient failures with backoff. Raises once retries run out."""
+        with self._lock:
+            self._send(message)
+
+    def send_batch(self, messages) -> list:
+        """Send messages over the shared connection, in order.
+
+        A message that still fails after its retries does not stop the rest.
+        Returns (message, exception) for each message that was not sent.
+        """
+        failed = []
+        with self._lock:
+            for message in messages:
+                try:
+                    self._send(message)
+                except Exception as e:
+                    failed.append((message, e))
+        return failed
+
+
+def dispatcher() -> MailDispatcher:
+    """Return the app's mail dispatcher, creating it on first use."""
+    if 'mail_dispatcher' not in current_app.extensions:
+        config = current_app.config
+        current_app.extensions['mail_dispatcher'] = MailDispatcher(
+            retries=config['MAIL_SEND_RETRIES'],
+            backoff=config['MAIL_RETRY_BACKOFF'],
+            idle_timeout=config['MAIL_CONNECTION_IDLE_TIMEOUT'],
+        )
+    return current_app.extensions['mail_dispatcher']
+
+
+_collecting = threading.local()
+
+
+@contextmanager
+def collect_mail():
+    """Collect the messages send_mail() is given in this thread instead of sending them.
+
+    Yields the list they are added to, for sending with send_batch().
+    """
+    messages = []
+    previous = getattr(_collecting, 'messages', None)
+    _collecting.messages = messages
+    try:
+        yield messages
+    finally:
+        _collecting.messages = previous
+
+
+def send_mail(message) -> None:
+    """Send a message through the shared SMTP connection. Raises if it cannot be sent.
+
+    Inside collect_mail() the message is only collected.
+    """
+    messages = getattr(_collecting, 'messages', None)
+    if messages is not None:
+        messages.append(message)
+        return
+    dispatcher().send(message)
@@ -0,0 +1,123 @@
+from flask import current_app
+from app import db
+from app.models import DailyMetrics, User, Event, Ticket, Invitation, Transaction
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta
+
+METRICS = ('signups', 'events_created', 'tickets_sold', 'invitations', 'transactions', 'gmv', 'platform_fees')
+MAX_SERIES_DAYS = 366
+
+
+def _as_date(value) -> date:
+    # func.date() gives a date on Postgres and an ISO string on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _sources():
+    """(timestamp column, {metric: aggregate}, filters) for each table the rollups read."""
+    paid_transaction = Transaction.status == 'success'
+    return (
+        (User.date_registered, {'signups': db.func.count(User.id)}, ()),
+        (Event.date_created, {'events_created': db.func.count(Event.id)}, ()),
+        (Ticket.date_purchased, {'tickets_sold': db.func.count(Ticket.id)}, (Ticket.payment_status == 'success',)),
+        (Invitation.date_created, {'invitations': db.func.count(Invitation.id)}, ()),
+        (Transaction.created_at, {
+            'transactions': db.func.count(Transaction.id),
+            'gmv': db.func.coalesce(db.func.sum(Transaction.amount), 0.0),
+            'platform_fees': db.func.coalesce(db.func.sum(Transaction.platform_fee), 0.0),
+        }, (paid_transaction,)),
+    )
+
+
+def _daily_totals(start: date, end: date) -> dict:
+    """Recount every metric for the days in [start, end), as {day: {metric: value}}."""
+    low, high = datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+    days = {start + timedelta(days=i): dict.fromkeys(METRICS, 0) for i in range((end - start).days)}
+    for column, aggregates, filters in _sources():
+        day = db.func.date(column)
+        # A range on the raw column, not on date(), so the column's index is used
+        query = db.session.query(day, *aggregates.values()) \
+            .filter(column >= low, column < high, *filters).group_by(day)
+        for row in query:
+            days[_as_date(row[0])].update(zip(aggregates, row[1:]))
+    return days
+
+
+def _store(day: date, values: dict, now: datetime) -> None:
+    update = db.update(DailyMetrics).where(DailyMetrics.day == day) \
+        .values(updated_at=now, **values).execution_options(synchronize_session=False)
+    if db.session.execute(update).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(db.insert(DailyMetrics).values(day=day, updated_at=now, **values))
+    except IntegrityError:
+        # A concurrent refresh inserted the day first; both computed the same totals
+        db.session.execute(update)
+
+
+def _first_day():
+    firsts = [db.session.query(db.func.min(column)).scalar() for column, _, _ in _sources()]
+    firsts = [first for first in firsts if first is not None]
+    return min(firsts).date() if firsts else None
+
+
+def refresh_metrics(since: date = None, full: bool = False) -> int:
+    """Recompute the daily rollups from ``since`` (or the last few days) through today.
+
+    Only the trailing METRICS_REFRESH_DAYS are recounted by default, which
+    picks up payments confirmed or refunded after the day they started;
+    ``full`` rebuilds every day since the first record. Each source is read
+    through an index on its timestamp. Commits and returns the number of
+    days written.
+    """
+    today = datetime.utcnow().date()
+    if full:
+        since = _first_day() or today
+    elif since is None:
+        since = today - timedelta(days=current_app.config['METRICS_REFRESH_DAYS'] - 1)
+    now = datetime.utcnow()
+    days = _daily_totals(since, today + timedelta(days=1))
+    for day, values in days.items():
+        _store(day, values, now)
+    db.session.commit()
+    return len(days)
+
+
+def admin_metrics(max_age: int = None) -> dict:
+    """Platform totals for the admin dashboard, summed from the daily rollups.
+
+    If the rollups were last refreshed more than ``max_age`` seconds ago
+    (default ADMIN_METRICS_MAX_AGE), the recent days are recounted first,
+    so the numbers are never staler than that. A failed refresh is logged
+    and the last rollups are served. Returns the totals for each metric
+    plus ``refreshed_at``.
+    """
+    max_age = current_app.config['ADMIN_METRICS_MAX_AGE'] if max_age is None else max_age
+    refreshed_at = db.session.query(db.func.max(DailyMetrics.updated_at)).scalar()
+    if refreshed_at is None or refreshed_at < datetime.utcnow() - timedelta(seconds=max_age):
+        try:
+            # The first refresh after a deploy builds the full history once
+            refresh_metrics(full=refreshed_at is None)
+            refreshed_at = db.session.query(db.func.max(DailyMetrics.updated_at)).scalar()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Admin metrics refresh failed: {str(e)}')
+
+    columns = [db.func.coalesce(db.func.sum(getattr(DailyMetrics, name)), 0) for name in METRICS]
+    totals = dict(zip(METRICS, db.session.query(*columns).one()))
+    totals['refreshed_at'] = refreshed_at
+    return totals
+
+
+def metrics_series(start: date, end: date) -> dict:
+    """Daily values for [start, end] from the rollups, with empty days filled with zeros.
+
+    Returns {'days': [iso dates], metric: [values], ...}, ready for a chart.
+    """
+    rows = {row.day: row for row in DailyMetrics.query.filter(DailyMetrics.day >= start, DailyMetrics.day <= end)}
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    series = {'days': [day.isoformat() for day in days]}
+    for name in METRICS:
+        series[name] = [getattr(rows[day], name) if day in rows else 0 for day in days]
+    return series
@@ -0,0 +1,48 @@
+from flask import current_app
+from app import db
+from app.models import Event, SalesMilestone
+from app.jobs import enqueue
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+
+
+def tickets_needed(capacity: int, threshold: int) -> int:
+    """Tickets an event of ``capacity`` must sell to reach ``threshold`` percent."""
+    return -(-capacity * threshold // 100)  # ceiling, in integers
+
+
+def crossed_thresholds(before: int, after: int, capacity: int, thresholds) -> list[int]:
+    """Thresholds reached by the sold count moving from ``before`` to ``after``, lowest first."""
+    return sorted(threshold for threshold in thresholds
+                  if before < tickets_needed(capacity, threshold) <= after)
+
+
+def record_sell_through(event_id: int, before: int, after: int) -> list[int]:
+    """Record the sell-through milestones an event reached as its sold count went from ``before`` to ``after``.
+
+    Driven by the event_stats counter, so no tickets are counted. Each
+    milestone is a row keyed on (event, threshold); one that another sale
+    already recorded is skipped, so every threshold fires once. When one
+    sale crosses several thresholds only the highest is announced. The
+    notification job commits with the caller. Returns the thresholds recorded.
+    """
+    if after <= before:
+        return []
+    capacity = db.session.query(Event.capacity).filter_by(id=event_id).scalar()
+    if not capacity:
+        return []  # unlimited events have no sell-through
+    crossed = crossed_thresholds(before, after, capacity, current_app.config['SELL_THROUGH_THRESHOLDS'])
+
+    recorded = []
+    now = datetime.utcnow()
+    for threshold in crossed:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(SalesMilestone).values(
+                    event_id=event_id, threshold=threshold, tickets_sold=after, capacity=capacity, reached_at=now))
+        except IntegrityError:
+            continue  # already reached, e.g. before the counters were reconciled down
+        recorded.append(threshold)
+    if recorded:
+        enqueue('notify_sell_through', event_id=event_id, threshold=recorded[-1])
+    return recorded
@@ -16,7 +16,6 @@ class User(UserMixin, db.Model):
     is_verified_student = db.Column(db.Boolean, default=False)
     school = db.Column(db.String(150), nullable=True)
     student_id = db.Column(db.String(50), nullable=True)
-    earnings = db.Column(db.Float, default=0.0)
     email_verified = db.Column(db.Boolean, default=False)
     email_verification_token = db.Column(db.String(100), nullable=True)
     password_reset_token = db.Column(db.String(100), nullable=True)
@@ -29,6 +28,17 @@ class User(UserMixin, db.Model):
     invitations = db.relationship('Invitation', backref='inviter', lazy=True)
     blog_posts = db.relationship('BlogPost', backref='author', lazy=True)
     
+    # Token lookups; partial so the many users without a token are not indexed
+    __table_args__ = (
+        db.Index('ix_user_email_verification_token', 'email_verification_token',
+                 postgresql_where=db.text('email_verification_token IS NOT NULL'),
+                 sqlite_where=db.text('email_verification_token IS NOT NULL')),
+        db.Index('ix_user_password_reset_token', 'password_reset_token',
+                 postgresql_where=db.text('password_reset_token IS NOT NULL'),
+                 sqlite_where=db.text('password_reset_token IS NOT NULL')),
+        db.Index('ix_user_date_registered', 'date_registered'),
+    )
+    
     def set_password(self, password):
         """Hash and set user password."""
         self.password_hash = generate_password_hash(password)
@@ -46,22 +56,101 @@ class Event(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
-    description = db.Column(db.Text, nullable=False)
+    # Heavy columns are deferred; detail views undefer the 'detail' group
+    description = db.deferred(db.Column(db.Text, nullable=False), group='detail')
     date = db.Column(db.DateTime, nullable=False)
     location = db.Column(db.String(150), nullable=False)
     price = db.Column(db.Float, nullable=False, default=0.0)
     invitation_fee = db.Column(db.Float, default=0.0)
     category = db.Column(db.String(50), nullable=False, default='general')
+    capacity = db.Column(db.Integer, nullable=True)  # None means unlimited
     organizer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
+    # Truncated description populated by listing projections (app.queries)
+    summary = db.query_expression()
     
     # Relationships
     tickets = db.relationship('Ticket', backref='event', lazy=True)
     invitations = db.relationship('Invitation', backref='event', lazy=True)
     
+    # Listings are ordered by (date, id), the keyset used by app.pagination
+    __table_args__ = (
+        db.Index('ix_event_date_id', 'date', 'id'),
+        db.Index('ix_event_category_date_id', 'category', 'date', 'id'),
+        db.Index('ix_event_organizer_date', 'organizer_id', 'date'),
+        db.Index('ix_event_date_created', 'date_created'),
+    )
+    
     def __repr__(self):
         return f'<Event {self.name}>'
 
+class EventStats(db.Model):
+    """Running sales and admission counters for an event, maintained by app.stats."""
+    __tablename__ = 'event_stats'
+    
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), primary_key=True)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    tickets_scanned = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    event = db.relationship('Event', backref=db.backref('stats', uselist=False, lazy=True))
+    
+    def __repr__(self):
+        return f'<EventStats {self.event_id}>'
+
+class SalesMilestone(db.Model):
+    """A sell-through threshold an event has reached, recorded once by app.milestones."""
+    __tablename__ = 'sales_milestones'
+    
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), primary_key=True)
+    threshold = db.Column(db.Integer, primary_key=True)  # percent of capacity
+    tickets_sold = db.Column(db.Integer, nullable=False)  # when it was reached
+    capacity = db.Column(db.Integer, nullable=False)
+    reached_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    notified_at = db.Column(db.DateTime, nullable=True)  # None until the organizer email is sent
+    
+    event = db.relationship('Event', backref=db.backref('milestones', lazy=True))
+    
+    def __repr__(self):
+        return f'<SalesMilestone {self.event_id} {self.threshold}%>'
+
+class EarningsEntry(db.Model):
+    """One credit (or, if negative, debit) to an organizer's earnings, in kobo.
+
+    Rows are only ever inserted, so concurrent payments never update a shared
+    row; app.earnings sums them on top of the organizer's EarningsSnapshot.
+    """
+    __tablename__ = 'earnings_ledger'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    organizer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    amount_kobo = db.Column(db.BigInteger, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # ticket_sale, invitation, opening_balance
+    reference = db.Column(db.String(100), nullable=False)  # what was paid for, unique per kind
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # A payment is credited once even if its webhook is processed twice
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'reference', name='uq_earnings_ledger_kind_reference'),
+        db.Index('ix_earnings_ledger_organizer_id', 'organizer_id', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<EarningsEntry {self.organizer_id} {self.amount_kobo}>'
+
+class EarningsSnapshot(db.Model):
+    """An organizer's balance over the ledger entries up to last_entry_id, rolled up by app.earnings."""
+    __tablename__ = 'earnings_snapshots'
+    
+    organizer_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    balance_kobo = db.Column(db.BigInteger, nullable=False, default=0)
+    last_entry_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<EarningsSnapshot {self.organizer_id} {self.balance_kobo}>'
+
 class Ticket(db.Model):
     """Ticket model for storing ticket information."""
     __tablename__ = 'ticket'
@@ -69,6 +158,7 @@ class Ticket(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    tier_id = db.Column(db.Integer, db.ForeignKey('ticket_tier.id'), nullable=True)
     is_scanned = db.Column(db.Boolean, default=False)
     # Payment lifecycle fields
     paystack_ref = db.Column(db.String(255), index=True, nullable=True)
@@ -77,7 +167,15 @@ class Ticket(db.Model):
     amount_paid = db.Column(db.Float, default=0.0)
     date_purchased = db.Column(db.DateTime, default=datetime.utcnow)
     used_at = db.Column(db.DateTime, nullable=True)
-    qr_code = db.Column(db.Text, nullable=True)
+    # Bumped on every change so scanner devices can sync deltas
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_ticket_event_updated', 'event_id', 'updated_at'),
+        db.Index('ix_ticket_event_status', 'event_id', 'payment_status'),
+        db.Index('ix_ticket_user_id', 'user_id'),
+        db.Index('ix_ticket_date_purchased', 'date_purchased'),
+    )
     
     def mark_used(self):
         """Mark the ticket as used (scanned) if not already used."""
@@ -106,9 +204,13 @@ class Invitation(db.Model):
     # Payment tracking for paid invitations (e.g., table reservations)
     paystack_ref = db.Column(db.String(255), index=True, nullable=True)
     payment_status = db.Column(db.String(50), default='pending', nullable=True)
-    qr_code = db.Column(db.Text, nullable=True)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_invitation_user_id', 'user_id'),
+        db.Index('ix_invitation_date_created', 'date_created'),
+    )
+    
     def __repr__(self):
         return f'<Invitation {self.id}>'
 
@@ -119,7 +221,7 @@ class BlogPost(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     excerpt = db.Column(db.String(300), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    content = db.deferred(db.Column(db.Text, nullable=False), group='detail')
     slug = db.Column(db.String(200), unique=True, nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     category = db.Column(db.String(50), nullable=True)
@@ -127,10 +229,105 @@ class BlogPost(db.Model):
     views = db.Column(db.Integer, default=0)
     date_posted = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Public listings only ever read published posts, so those indexes are partial.
+    # Queries must filter with filter_by(published=True) for the planner to match them.
+    __table_args__ = (
+        db.Index('ix_blog_post_date_id', 'date_posted', 'id'),
+        db.Index('ix_blog_post_published_date_id', 'date_posted', 'id',
+                 postgresql_where=db.text('published'), sqlite_where=db.text('published = 1')),
+        db.Index('ix_blog_post_published_category_date_id', 'category', 'date_posted', 'id',
+                 postgresql_where=db.text('published'), sqlite_where=db.text('published = 1')),
+        db.Index('ix_blog_post_published_views', 'views',
+                 postgresql_where=db.text('published'), sqlite_where=db.text('published = 1')),
+    )
+    
     def __repr__(self):
         return f'<BlogPost {self.title}>'
 
 
+class TicketArchive(db.Model):
+    """Abandoned pending tickets moved out of the ticket table by the reaper."""
+    __tablename__ = 'ticket_archive'
+
+    id = db.Column(db.Integer, primary_key=True)  # original ticket id
+    event_id = db.Column(db.Integer, nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    tier_id = db.Column(db.Integer, nullable=True)
+    paystack_ref = db.Column(db.String(255), nullable=True)
+    payment_status = db.Column(db.String(50), nullable=True)
+    amount_paid = db.Column(db.Float, default=0.0)
+    date_purchased = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class TransactionArchive(db.Model):
+    """Abandoned checkout transactions moved out of the transaction table by the reaper."""
+    __tablename__ = 'transaction_archive'
+
+    id = db.Column(db.Integer, primary_key=True)  # original transaction id
+    user_id = db.Column(db.Integer, nullable=False)
+    event_id = db.Column(db.Integer, nullable=True, index=True)
+    provider = db.Column(db.String(50), nullable=False)
+    reference = db.Column(db.String(255), nullable=False, index=True)
+    amount = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class TicketTier(db.Model):
+    """A priced block of an event's tickets with its own stock.
+
+    ``held`` counts tickets reserved by checkouts in progress and ``sold``
+    those paid for; both only change through the conditional UPDATEs in
+    app.inventory, so ``held + sold`` never exceeds ``capacity``.
+    """
+    __tablename__ = 'ticket_tier'
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    price = db.Column(db.Float, nullable=False, default=0.0)
+    capacity = db.Column(db.Integer, nullable=False)
+    held = db.Column(db.Integer, nullable=False, default=0)
+    sold = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    event = db.relationship('Event', backref=db.backref('tiers', lazy=True, order_by='TicketTier.id'))
+
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'name', name='uq_ticket_tier_event_name'),
+    )
+
+    @property
+    def available(self) -> int:
+        return max(self.capacity - self.held - self.sold, 0)
+
+    def __repr__(self):
+        return f'<TicketTier {self.name} {self.sold}+{self.held}/{self.capacity}>'
+
+
+class InventoryHold(db.Model):
+    """Tickets reserved for one checkout until it is paid or the hold expires."""
+    __tablename__ = 'inventory_hold'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tier_id = db.Column(db.Integer, db.ForeignKey('ticket_tier.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    reference = db.Column(db.String(255), unique=True, nullable=False)  # payment reference
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='active')  # active, converted, released, expired
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_inventory_hold_status_expires', 'status', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f'<InventoryHold {self.reference} x{self.quantity} {self.status}>'
+
+
 class Transaction(db.Model):
     """Payment transaction for tickets/invitations with platform fee tracking."""
     __tablename__ = 'transaction'
@@ -148,7 +345,7 @@ class Transaction(db.Model):
     organizer_amount = db.Column(db.Float, default=0.0)   # net to organizer
 
     status = db.Column(db.String(50), default='initialized')  # initialized, pending, success, failed, refunded
-    raw_response = db.Column(db.JSON, nullable=True)
+    raw_response = db.deferred(db.Column(db.JSON, nullable=True), group='payload')
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -157,9 +354,74 @@ class Transaction(db.Model):
     event = db.relationship('Event', backref=db.backref('transactions', lazy=True))
     invitation = db.relationship('Invitation', backref=db.backref('transactions', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_transaction_created_at', 'created_at'),
+    )
+
     def mark_success(self, payload: dict, platform_fee: float, organizer_amount: float):
         self.status = 'success'
         self.platform_fee = platform_fee
         self.organizer_amount = organizer_amount
         self.raw_response = payload
-        self.updated_at = datetime.utcnow()
\ No newline at end of file
+        self.updated_at = datetime.utcnow()
+
+
+class WebhookEvent(db.Model):
+    """Ledger of processed payment gateway events, used to drop duplicate deliveries."""
+    __tablename__ = 'webhook_event'
+
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(50), nullable=False)
+    event_type = db.Column(db.String(100), nullable=False)
+    reference = db.Column(db.String(255), nullable=False)
+    provider_event_id = db.Column(db.String(255), nullable=True)  # gateway's own id, for auditing
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('provider', 'event_type', 'reference', name='uq_webhook_event_delivery'),
+    )
+
+    def __repr__(self):
+        return f'<WebhookEvent {self.provider} {self.event_type} {self.reference}>'
+
+
+class Job(db.Model):
+    """Durable background job, processed by worker.py."""
+    __tablename__ = 'job'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=True)
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.name} {self.status}>'
+
+
+class DailyMetrics(db.Model):
+    """Platform totals for one day, rolled up by app.metrics for the admin dashboard."""
+    __tablename__ = 'daily_metrics'
+
+    day = db.Column(db.Date, primary_key=True)
+    signups = db.Column(db.Integer, nullable=False, default=0)
+    events_created = db.Column(db.Integer, nullable=False, default=0)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+    invitations = db.Column(db.Integer, nullable=False, default=0)
+    transactions = db.Column(db.Integer, nullable=False, default=0)  # successful payments
+    gmv = db.Column(db.Float, nullable=False, default=0.0)            # total charged to customers
+    platform_fees = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<DailyMetrics {self.day}>'
@@ -0,0 +1,47 @@
+from app import db
+from datetime import datetime
+import base64
+import json
+
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Encode a (datetime, id) position as an opaque URL-safe cursor."""
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor into (datetime, id). Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (TypeError, ValueError, UnicodeError, json.JSONDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def keyset_page(query, sort_column, id_column, cursor: str = None, per_page: int = 20) -> dict:
+    """Return one page of ``query`` ordered newest first by (sort_column, id_column).
+
+    Instead of OFFSET, the next page starts after the last row of the
+    previous one (``WHERE (sort, id) < (:sort, :id)``), so with an index on
+    the two columns every page costs the same no matter how deep it is.
+    Both columns must be non-null. Returns a dict with ``items``,
+    ``next_cursor`` (None on the last page) and ``has_next``. Raises
+    ValueError for a malformed cursor.
+    """
+    per_page = max(1, min(per_page, MAX_PAGE_SIZE))
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.filter(db.tuple_(sort_column, id_column) < (sort_value, row_id))
+
+    items = query.order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return {'items': items, 'next_cursor': next_cursor, 'has_next': has_next, 'cursor': cursor}
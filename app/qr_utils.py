@@ -0,0 +1,145 @@
+from flask import current_app
+import qrcode
+import qrcode.image.svg
+from PIL import Image
+import base64
+import calendar
+import hashlib
+import hmac
+from functools import lru_cache
+from io import BytesIO
+from datetime import datetime
+
+TOKEN_PREFIX = 'PT1'
+SIGNATURE_BYTES = 12
+QR_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+QR_CACHE_SIZE = 2048
+QR_MASK_PATTERN = 0
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def event_signing_key(event_id: int) -> bytes:
+    """Derive the per-event HMAC key used to sign ticket QR tokens.
+
+    Keys are derived from QR_SIGNING_KEY (or SECRET_KEY), so a verification
+    bundle handed to one event's scanners cannot sign tickets for another.
+    """
+    secret = current_app.config.get('QR_SIGNING_KEY') or current_app.config['SECRET_KEY']
+    return hmac.new(secret.encode('utf-8'), f'partyticket-qr:event:{event_id}'.encode('ascii'),
+                    hashlib.sha256).digest()
+
+
+def _sign(event_id: int, message: str, key: bytes = None) -> str:
+    digest = hmac.new(key or event_signing_key(event_id), message.encode('ascii'), hashlib.sha256).digest()
+    return _b64encode(digest[:SIGNATURE_BYTES])
+
+
+def make_ticket_token(ticket_id: int, event_id: int, issued_at: datetime = None, key: bytes = None) -> str:
+    """Return a compact signed token: PT1.<ticket_id>.<event_id>.<issued_at>.<signature>.
+
+    ``key`` is the event's signing key, for callers signing many tickets of one event.
+    """
+    issued = calendar.timegm(issued_at.utctimetuple()) if issued_at else 0
+    message = f'{TOKEN_PREFIX}.{ticket_id}.{event_id}.{issued}'
+    return f'{message}.{_sign(event_id, message, key)}'
+
+
+def verify_ticket_token(token: str):
+    """Verify a signed ticket token.
+
+    Returns a (ticket_id, event_id, issued_at) tuple, or None if the token
+    is malformed or its signature does not match.
+    """
+    parts = str(token).split('.')
+    if len(parts) != 5 or parts[0] != TOKEN_PREFIX:
+        return None
+    try:
+        ticket_id, event_id, issued = int(parts[1]), int(parts[2]), int(parts[3])
+    except ValueError:
+        return None
+    expected = _sign(event_id, '.'.join(parts[:4]))
+    if not hmac.compare_digest(expected, parts[4]):
+        return None
+    return ticket_id, event_id, issued
+
+
+def ticket_qr_data(ticket) -> str:
+    """Return the signed QR payload for a ticket."""
+    return make_ticket_token(ticket.id, ticket.event_id, ticket.date_purchased)
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def render_qr(data: str, fmt: str = 'png') -> bytes:
+    """Render data as a QR code image in the given format ('png' or 'svg').
+
+    QR payloads are deterministic, so rendered images are kept in a bounded
+    in-process LRU and repeat requests skip the encoding work.
+    """
+    if fmt not in QR_FORMATS:
+        raise ValueError(f'Unsupported QR format: {fmt}')
+    # Scoring all eight mask patterns for the "best" one is most of the
+    # encoding time; any mask decodes, so use a fixed one
+    qr = qrcode.QRCode(mask_pattern=QR_MASK_PATTERN)
+    qr.add_data(data)
+    qr.make(fit=True)
+    buffered = BytesIO()
+    if fmt == 'svg':
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffered)
+    else:
+        # Scale the module matrix up in one step rather than drawing each module
+        modules = qr.get_matrix()
+        size = len(modules)
+        image = Image.frombytes('L', (size, size), bytes(0 if dark else 255 for row in modules for dark in row))
+        image.convert('1').resize((size * qr.box_size, size * qr.box_size), Image.NEAREST) \
+            .save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def ticket_qr_pngs(tickets) -> dict:
+    """Render PNG QR codes for several tickets in one pass: {ticket id: PNG bytes}.
+
+    Each event's signing key is derived once for the batch, and images
+    already in render_qr's cache are not encoded again.
+    """
+    keys = {}
+    images = {}
+    for ticket in tickets:
+        if ticket.event_id not in keys:
+            keys[ticket.event_id] = event_signing_key(ticket.event_id)
+        token = make_ticket_token(ticket.id, ticket.event_id, ticket.date_purchased, keys[ticket.event_id])
+        images[ticket.id] = render_qr(token, 'png')
+    return images
+
+
+def qr_etag(data: str, fmt: str) -> str:
+    """Return a stable ETag for a rendered QR image."""
+    return hashlib.sha1(f'{fmt}:{data}'.encode('utf-8')).hexdigest()
+
+
+def qr_png_base64(data: str) -> str:
+    """Encode data as a QR code PNG and return it base64 encoded."""
+    return base64.b64encode(render_qr(data, 'png')).decode('utf-8')
+
+
+def invitation_qr_data(invitation) -> str:
+    """Return the QR payload for an invitation."""
+    return f"invitation_id:{invitation.id}"
+
+
+def verification_bundle(event, revoked_ticket_ids) -> dict:
+    """Build the offline verification bundle for an event's scanners."""
+    return {
+        'version': 1,
+        'event_id': event.id,
+        'event_name': event.name,
+        'event_date': event.date.isoformat(),
+        'token_prefix': TOKEN_PREFIX,
+        'algorithm': 'HMAC-SHA256',
+        'signature_bytes': SIGNATURE_BYTES,
+        'key': _b64encode(event_signing_key(event.id)),
+        'revoked': sorted(revoked_ticket_ids),
+        'generated_at': datetime.utcnow().isoformat()
+    }
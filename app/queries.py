@@ -0,0 +1,188 @@
+from flask import current_app
+from sqlalchemy.orm import joinedload, load_only, with_expression, undefer_group
+from sqlalchemy.sql.util import ClauseAdapter
+from app import db
+import time
+from app.models import Event, BlogPost, User, Ticket, Invitation
+from app.pagination import keyset_page
+from app.stats import event_stats
+from app.earnings import balance
+from app.cache import tag_versions
+from datetime import datetime
+
+# Characters of the description shown on listing cards
+SUMMARY_LENGTH = 160
+RECENT_INVITATIONS = 3  # shown in the dashboard sidebar
+
+
+def event_listing():
+    """Query for event listings.
+
+    Event.description is deferred, so listing queries never load it; the
+    cards get a short ``summary`` computed in SQL instead.
+    """
+    return Event.query.options(
+        with_expression(Event.summary, db.func.substr(Event.description, 1, SUMMARY_LENGTH))
+    )
+
+
+def event_cards():
+    """Plain rows with just the columns an event card shows, safe to cache across requests."""
+    return db.session.query(
+        Event.id, Event.name, Event.date, Event.location, Event.price, Event.category, Event.organizer_id,
+        db.func.substr(Event.description, 1, SUMMARY_LENGTH).label('summary')
+    )
+
+
+def top_n_per_group(query, partition_by, order_by, n, groups=None):
+    """The first ``n`` rows of ``query`` for each value of ``partition_by``, in one query.
+
+    Rows are ranked with ROW_NUMBER() OVER (PARTITION BY ... ORDER BY ...)
+    and those ranked ``n`` or better are kept. Ranking a whole table reads
+    every row, so when the ``groups`` are known each one becomes its own
+    ``LIMIT n`` branch of a UNION ALL instead, which an index on
+    (partition_by, order_by...) answers with one short seek per group.
+
+    ``query`` must select plain columns, including ``partition_by``. Returns
+    a query over the same columns ordered by group, then rank.
+    """
+    if not isinstance(order_by, (list, tuple)):
+        order_by = [order_by]
+    if groups is not None:
+        rows = db.union_all(*[
+            db.select(query.filter(partition_by == group).order_by(*order_by).limit(n).subquery())
+            for group in groups
+        ]).subquery()
+        # Rank the few rows the branches returned, against the union's own columns
+        adapter = ClauseAdapter(rows)
+        partition_by = adapter.traverse(partition_by.expression)
+        order_by = [adapter.traverse(clause) for clause in order_by]
+        query = db.session.query(*rows.c)
+    rank = db.func.row_number().over(partition_by=partition_by, order_by=order_by).label('group_rank')
+    ranked = query.add_columns(rank).subquery()
+    columns = [column for column in ranked.c if column.key != 'group_rank']
+    return db.session.query(*columns).filter(ranked.c.group_rank <= n) \
+        .order_by(ranked.c[partition_by.key], ranked.c.group_rank)
+
+
+def latest_events_by_category(categories, per_category=None):
+    """Latest events in each of ``categories`` for /events, cached for EVENT_LISTING_CACHE_TTL seconds.
+
+    Returns {category: [row, ...]}. The cache is per process but keyed on
+    the page cache's 'events' tag version, so invalidate_pages('events')
+    from create_event expires it in every worker sharing the page cache,
+    and a page re-rendered after the bump never reuses an older listing.
+    """
+    per_category = per_category or current_app.config['EVENTS_PER_CATEGORY']
+    ttl = current_app.config['EVENT_LISTING_CACHE_TTL']
+    cache = current_app.extensions.setdefault('event_listing_cache', {})
+    key = ('latest_events_by_category', tuple(categories), per_category, tag_versions('events'))
+    cached = cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    grouped = {category: [] for category in categories}
+    for row in top_n_per_group(event_cards(), Event.category, (Event.date.desc(), Event.id.desc()),
+                               per_category, groups=categories):
+        grouped[row.category].append(row)
+    if ttl:
+        now = time.monotonic()
+        # Drop copies left behind by earlier tag versions
+        for stale in [stale for stale, (expires, _) in cache.items() if expires <= now]:
+            cache.pop(stale, None)
+        cache[key] = (now + ttl, grouped)
+    return grouped
+
+
+def invalidate_event_listings():
+    """Drop this process's cached event listings."""
+    current_app.extensions.get('event_listing_cache', {}).clear()
+
+
+def dashboard_data(user_id: int, cursor: str = None, per_page: int = None) -> dict:
+    """Everything the user dashboard shows, in a fixed number of queries.
+
+    Related events are eager loaded and totals come from aggregates, so the
+    query count does not grow with the user's events, tickets or
+    invitations. Tickets are keyset paginated newest first and grouped by
+    event within the page. Raises ValueError for a malformed cursor.
+    """
+    now = datetime.utcnow()
+    events = event_listing().filter_by(organizer_id=user_id).order_by(Event.date.desc()).all()
+    events_by_category = {}
+    for event in events:
+        events_by_category.setdefault(event.category, []).append(event)
+
+    ticket_count, tickets_scanned = db.session.query(
+        db.func.count(Ticket.id), db.func.count(Ticket.id).filter(Ticket.is_scanned.is_(True))
+    ).filter(Ticket.user_id == user_id).one()
+    tickets = Ticket.query.filter_by(user_id=user_id) \
+        .options(joinedload(Ticket.event).load_only(Event.id, Event.name, Event.location, Event.date))
+    page = keyset_page(tickets, Ticket.date_purchased, Ticket.id, cursor,
+                       per_page or current_app.config['DASHBOARD_TICKETS_PER_PAGE'])
+    ticket_groups = {}
+    for ticket in page['items']:
+        ticket_groups.setdefault(ticket.event_id, {'event': ticket.event, 'tickets': []})['tickets'].append(ticket)
+
+    invitations = Invitation.query.filter_by(user_id=user_id) \
+        .options(joinedload(Invitation.event).load_only(Event.id, Event.name)) \
+        .order_by(Invitation.date_created.desc(), Invitation.id.desc()).limit(RECENT_INVITATIONS).all()
+    invitation_count = db.session.query(db.func.count(Invitation.id)).filter(Invitation.user_id == user_id).scalar()
+
+    return {
+        'events_by_category': events_by_category,
+        'event_count': len(events),
+        'past_event_count': sum(1 for event in events if event.date < now),
+        'event_stats': event_stats([event.id for event in events]),
+        'ticket_groups': list(ticket_groups.values()),
+        'ticket_page': page,
+        'ticket_count': ticket_count,
+        'tickets_scanned': tickets_scanned,
+        'invitations': invitations,
+        'invitation_count': invitation_count,
+        'earnings_kobo': balance(user_id),
+        'now': now,
+    }
+
+
+def event_detail():
+    """Query for a single event page, loading the deferred detail columns."""
+    return Event.query.options(undefer_group('detail'))
+
+
+def blog_listing():
+    """Query for blog listings: no post content, author name joined in."""
+    return BlogPost.query.options(
+        joinedload(BlogPost.author).load_only(User.id, User.username)
+    )
+
+
+def blog_detail():
+    """Query for a single blog post, loading the deferred content."""
+    return BlogPost.query.options(undefer_group('detail'))
+
+
+def popular_posts_query():
+    """Published posts by views, loading only what sidebar links show."""
+    return BlogPost.query.options(
+        load_only(BlogPost.id, BlogPost.title, BlogPost.slug, BlogPost.date_posted, BlogPost.views)
+    ).filter_by(published=True).order_by(BlogPost.views.desc())
+
+
+def popular_posts(limit=5):
+    """Most viewed published posts for the blog sidebar."""
+    return popular_posts_query().limit(limit).all()
+
+
+def blog_category_counts():
+    """Published post count per category, in one GROUP BY query."""
+    rows = db.session.query(BlogPost.category, db.func.count(BlogPost.id)) \
+        .filter_by(published=True) \
+        .group_by(BlogPost.category)
+    return {category: count for category, count in rows}
+
+
+def blog_post_stats():
+    """Total post count and views across all posts, in one aggregate query."""
+    total, views = db.session.query(db.func.count(BlogPost.id), db.func.coalesce(db.func.sum(BlogPost.views), 0)).one()
+    return {'total': total, 'views': views}
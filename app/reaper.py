@@ -0,0 +1,127 @@
+from flask import current_app
+from app import db
+from app.models import Ticket, Transaction, InventoryHold, TicketArchive, TransactionArchive
+from app.inventory import expire_holds, release_hold
+from datetime import datetime, timedelta
+
+REAP_BATCH_SIZE = 500
+ABANDONED_TICKET_STATUSES = ('pending', 'cancelled')
+ABANDONED_TRANSACTION_STATUSES = ('initialized', 'pending')
+TICKET_ARCHIVE_COLUMNS = ('id', 'event_id', 'user_id', 'tier_id', 'paystack_ref', 'payment_status',
+                          'amount_paid', 'date_purchased')
+TRANSACTION_ARCHIVE_COLUMNS = ('id', 'user_id', 'event_id', 'provider', 'reference', 'amount', 'status',
+                               'created_at')
+
+
+def _archive(model, archive_model, columns, ids, overrides=None):
+    """Copy rows into their archive table with INSERT ... SELECT."""
+    source = [getattr(model, column) for column in columns]
+    for column, value in (overrides or {}).items():
+        source[columns.index(column)] = db.literal(value)
+    db.session.execute(
+        db.insert(archive_model).from_select(
+            list(columns),
+            db.select(*source).where(model.id.in_(ids))
+        )
+    )
+
+
+def _delete(model, ids):
+    db.session.execute(db.delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+
+
+def reap_transactions(cutoff: datetime, batch_size: int, archive: bool) -> int:
+    """Expire one batch of checkout transactions left unpaid since before ``cutoff``.
+
+    Their holds are released. Expired transactions stay in place unless
+    ``archive`` is set, in which case they move to transaction_archive.
+    Returns the number of transactions reaped. The caller commits.
+    """
+    rows = db.session.query(Transaction.id, Transaction.reference).filter(
+        Transaction.status.in_(ABANDONED_TRANSACTION_STATUSES),
+        Transaction.created_at < cutoff
+    ).order_by(Transaction.id).limit(batch_size).all()
+    if not rows:
+        return 0
+
+    ids = [transaction_id for transaction_id, _ in rows]
+    for _, reference in rows:
+        release_hold(reference)
+    if archive:
+        _archive(Transaction, TransactionArchive, TRANSACTION_ARCHIVE_COLUMNS, ids, {'status': 'expired'})
+        _delete(Transaction, ids)
+    else:
+        db.session.execute(
+            db.update(Transaction)
+            .where(Transaction.id.in_(ids), Transaction.status.in_(ABANDONED_TRANSACTION_STATUSES))
+            .values(status='expired', updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+    return len(ids)
+
+
+def reap_tickets(cutoff: datetime, batch_size: int, archive: bool) -> int:
+    """Delete one batch of tickets never paid for since before ``cutoff``.
+
+    With ``archive`` the rows are copied to ticket_archive first. Returns
+    the number of tickets reaped. The caller commits.
+    """
+    ids = [ticket_id for (ticket_id,) in db.session.query(Ticket.id).filter(
+        Ticket.payment_status.in_(ABANDONED_TICKET_STATUSES),
+        Ticket.date_purchased < cutoff
+    ).order_by(Ticket.id).limit(batch_size)]
+    if not ids:
+        return 0
+
+    if archive:
+        _archive(Ticket, TicketArchive, TICKET_ARCHIVE_COLUMNS, ids)
+    _delete(Ticket, ids)
+    return len(ids)
+
+
+def reap_holds(cutoff: datetime, batch_size: int) -> int:
+    """Delete one batch of holds that ended before ``cutoff``. The caller commits."""
+    ids = [hold_id for (hold_id,) in db.session.query(InventoryHold.id).filter(
+        InventoryHold.status != 'active',
+        InventoryHold.expires_at < cutoff
+    ).order_by(InventoryHold.id).limit(batch_size)]
+    if ids:
+        _delete(InventoryHold, ids)
+    return len(ids)
+
+
+def reap_abandoned_checkouts(older_than: int = None, batch_size: int = REAP_BATCH_SIZE,
+                             archive: bool = False, max_batches: int = None) -> dict:
+    """Clean up checkouts abandoned more than ``older_than`` seconds ago.
+
+    Work is done in batches of ``batch_size`` rows, each committed on its
+    own, so the reaper never holds long locks on the hot tables. A payment
+    that arrives for a reaped checkout is still honoured: the Paystack
+    webhook and the Flutterwave verify rebuild its transaction and tickets
+    from the payment metadata.
+    """
+    if older_than is None:
+        older_than = current_app.config.get('REAPER_PENDING_AGE', 86400)
+    # Never reap a checkout whose hold could still be live
+    older_than = max(older_than, current_app.config.get('INVENTORY_HOLD_TTL', 900))
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=older_than)
+
+    steps = (
+        ('holds_expired', lambda: expire_holds(now=now, limit=batch_size)),
+        ('transactions', lambda: reap_transactions(cutoff, batch_size, archive)),
+        ('tickets', lambda: reap_tickets(cutoff, batch_size, archive)),
+        ('holds_deleted', lambda: reap_holds(cutoff, batch_size)),
+    )
+    totals = {}
+    for name, step in steps:
+        totals[name] = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            count = step()
+            db.session.commit()
+            totals[name] += count
+            batches += 1
+            if count < batch_size:
+                break
+    return totals
@@ -1,9 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_user, logout_user, login_required, current_user
-from app import db, oauth, mail
+from app import db, oauth
 from app.models import User
 from app.forms import RegistrationForm, LoginForm
-from flask_mail import Message
+from app.jobs import enqueue
 import secrets
 from datetime import datetime, timedelta
 
@@ -47,18 +47,15 @@ def register():
             db.session.add(user)
             db.session.commit()
             
-            # Send verification email
+            # Send verification email from the worker, off the request thread
             try:
-                verify_url = url_for('auth.verify_email', token=verification_token, _external=True)
-                msg = Message(
-                    'Verify Your Email - PartyTicket Nigeria',
-                    recipients=[user.email],
-                    html=render_template('emails/verify_email.html', user=user, verify_url=verify_url)
-                )
-                mail.send(msg)
+                enqueue('send_verification_email', user_id=user.id,
+                        verify_url=url_for('auth.verify_email', token=verification_token, _external=True))
+                db.session.commit()
                 flash('Account created! Please check your email to verify your account.', 'success')
             except Exception as e:
-                current_app.logger.error(f'Failed to send verification email: {str(e)}')
+                db.session.rollback()
+                current_app.logger.error(f'Failed to queue verification email: {str(e)}')
                 flash('Account created! Please login. (Email verification email could not be sent)', 'warning')
             
             return redirect(url_for('auth.login'))
@@ -255,20 +252,16 @@ def forgot_password():
             reset_token = secrets.token_urlsafe(32)
             user.password_reset_token = reset_token
             user.password_reset_expires = datetime.utcnow() + timedelta(hours=1)
-            db.session.commit()
             
-            # Send reset email
+            # Send reset email from the worker; the job commits with the token
             try:
-                reset_url = url_for('auth.reset_password', token=reset_token, _external=True)
-                msg = Message(
-                    'Reset Your Password - PartyTicket Nigeria',
-                    recipients=[user.email],
-                    html=render_template('emails/reset_password.html', user=user, reset_url=reset_url)
-                )
-                mail.send(msg)
+                enqueue('send_password_reset_email', user_id=user.id,
+                        reset_url=url_for('auth.reset_password', token=reset_token, _external=True))
+                db.session.commit()
                 flash('Password reset link has been sent to your email.', 'success')
             except Exception as e:
-                current_app.logger.error(f'Failed to send reset email: {str(e)}')
+                db.session.rollback()
+                current_app.logger.error(f'Failed to queue reset email: {str(e)}')
                 flash('Error sending reset email. Please try again.', 'danger')
         else:
             # Don't reveal if email exists
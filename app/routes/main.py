@@ -1,93 +1,125 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, make_response, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, make_response, current_app, abort, \
+    send_file, stream_with_context
 from flask_login import login_required, current_user
 from app import db
 from app.models import Event, Ticket, Invitation, BlogPost, User
-from app.email_utils import send_ticket_confirmation_email, send_organizer_notification
+from app.email_utils import send_ticket_confirmation_email
+from app.ticket_utils import parse_qr_data, check_ticket, redeem_ticket, verify_tickets_batch, \
+    build_event_manifest, record_offline_scans
+from app.queries import event_listing, event_detail as event_detail_query, blog_listing, blog_detail, \
+    popular_posts, popular_posts_query, blog_category_counts, blog_post_stats, \
+    latest_events_by_category, invalidate_event_listings, dashboard_data
 from app.forms import EventForm, TicketForm, InvitationForm, BlogPostForm
-import qrcode
-import base64
-from io import BytesIO
-from datetime import datetime
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from app.inventory import default_tier
+from app.search import find_events
+from app.pagination import keyset_page, MAX_PAGE_SIZE
+from app.cache import cached_page, invalidate_pages
+from app.sitemap import iter_sitemap, cached_sitemap, invalidate_sitemaps
+from app.metrics import admin_metrics, metrics_series, MAX_SERIES_DAYS
+from app.earnings import credit, balance as earnings_balance
+from app.qr_utils import QR_FORMATS, render_qr, qr_etag, ticket_qr_data, invitation_qr_data, \
+    verification_bundle
+from datetime import datetime, timedelta
+import gzip
+import json
 
 main = Blueprint('main', __name__)
 
+VALID_CATEGORIES = ['formal', 'campus', 'street', 'concert', 'festival', 'general']
+
+def _event_page(category=None, per_page=None):
+    """Keyset page of event listings, latest date first, optionally for one category."""
+    query = event_listing()
+    if category:
+        query = query.filter(Event.category == category)
+    return keyset_page(query, Event.date, Event.id, request.args.get('cursor'),
+                       per_page or current_app.config['EVENTS_PER_PAGE'])
+
+def _post_page(published_only=True, category=None, per_page=None):
+    """Keyset page of blog listings, newest first."""
+    query = blog_listing()
+    if published_only:
+        query = query.filter_by(published=True)
+    if category:
+        query = query.filter(BlogPost.category == category)
+    return keyset_page(query, BlogPost.date_posted, BlogPost.id, request.args.get('cursor'),
+                       per_page or current_app.config['POSTS_PER_PAGE'])
+
+def _page_size():
+    """The ?limit= page size, capped at MAX_PAGE_SIZE; None when absent. Raises ValueError below 1."""
+    limit = request.args.get('limit', type=int)
+    if limit is None:
+        return None
+    if limit < 1:
+        raise ValueError(f'Invalid page size {limit}')
+    return min(limit, MAX_PAGE_SIZE)
+
 @main.route('/')
+@cached_page('events')
 def home():
     """Homepage route."""
     # Get featured events
-    featured_events = Event.query.order_by(Event.date.desc()).limit(6).all()
+    featured_events = event_listing().order_by(Event.date.desc()).limit(6).all()
     return render_template('index.html', featured_events=featured_events)
 
 @main.route('/events')
+@cached_page('events')
 def events():
     """Events listing route."""
-    # Group events by category
-    categories = ['formal', 'campus', 'street', 'concert', 'festival', 'general']
-    events_by_category = {}
-    
-    for category in categories:
-        events_by_category[category] = Event.query.filter_by(category=category).order_by(Event.date.desc()).limit(3).all()
-    
+    # Latest few per category, from one windowed query (cached)
+    events_by_category = latest_events_by_category(VALID_CATEGORIES)
     return render_template('events.html', events_by_category=events_by_category)
 
 @main.route('/events/category/<category>')
+@cached_page('events')
 def events_by_category(category):
     """Events by category route."""
-    valid_categories = ['formal', 'campus', 'street', 'concert', 'festival', 'general']
-    if category not in valid_categories:
+    if category not in VALID_CATEGORIES:
         flash('Invalid category', 'danger')
         return redirect(url_for('main.events'))
     
-    category_events = Event.query.filter_by(category=category).order_by(Event.date.desc()).all()
-    return render_template('category_events.html', events=category_events, category=category)
+    try:
+        page = _event_page(category)
+    except ValueError:
+        abort(400)
+    return render_template('category_events.html', events=page['items'], page=page, category=category)
 
 @main.route('/search')
 def search_events():
     """Event search route."""
     query = request.args.get('q')
     category = request.args.get('category', 'all')
+    results = page = None
     
     if query:
-        if category != 'all':
-            events = Event.query.filter(
-                db.and_(
-                    Event.category == category,
-                    db.or_(
-                        Event.name.contains(query),
-                        Event.description.contains(query),
-                        Event.location.contains(query)
-                    )
-                )
-            ).order_by(Event.date.desc()).all()
-        else:
-            events = Event.query.filter(
-                db.or_(
-                    Event.name.contains(query),
-                    Event.description.contains(query),
-                    Event.location.contains(query)
-                )
-            ).order_by(Event.date.desc()).all()
+        results = find_events(query, category, request.args.get('page', 1, type=int))
+        events = results['events']
     else:
-        if category != 'all':
-            events = Event.query.filter_by(category=category).order_by(Event.date.desc()).all()
-        else:
-            events = Event.query.order_by(Event.date.desc()).all()
+        try:
+            page = _event_page(category if category != 'all' else None)
+        except ValueError:
+            abort(400)
+        events = page['items']
             
-    return render_template('search_results.html', events=events, query=query, category=category)
+    return render_template('search_results.html', events=events, query=query, category=category,
+                           results=results, page=page)
 
 @main.route('/event/<int:event_id>')
+@cached_page('events', 'event:{event_id}')
 def event_detail(event_id):
     """Event detail route."""
-    event = Event.query.get_or_404(event_id)
-    return render_template('event_detail.html', event=event)
+    event = event_detail_query().get_or_404(event_id)
+    related_events = event_listing().filter(
+        Event.category == event.category,
+        Event.id != event.id
+    ).order_by(Event.date.desc()).limit(3).all()
+    return render_template('event_detail.html', event=event, related_events=related_events)
 
 @main.route('/event/<int:event_id>/buy-tickets', methods=['GET', 'POST'])
 @login_required
 def buy_tickets(event_id):
     """Ticket purchase route - redirects to payment."""
-    event = Event.query.get_or_404(event_id)
+    event = event_detail_query().get_or_404(event_id)
     form = TicketForm()
     
     if form.validate_on_submit():
@@ -106,51 +138,84 @@ def invitation_detail(invitation_id):
     event = Event.query.get_or_404(invitation.event_id)
     return render_template('invitation_detail.html', invitation=invitation, event=event)
 
+def _qr_response(data, fmt):
+    """Serve a QR image rendered on demand with long-lived caching headers."""
+    if fmt not in QR_FORMATS:
+        abort(404)
+    response = make_response(render_qr(data, fmt))
+    response.headers['Content-Type'] = QR_FORMATS[fmt]
+    # Payloads never change for a given ticket, but they are credentials
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    response.set_etag(qr_etag(data, fmt))
+    return response.make_conditional(request)
+
+@main.route('/ticket/<int:ticket_id>/qr.<fmt>')
+@login_required
+def ticket_qr(ticket_id, fmt):
+    """QR code image for a paid ticket, visible to its holder and the organizer."""
+    ticket = Ticket.query.get_or_404(ticket_id)
+    if current_user.id not in (ticket.user_id, ticket.event.organizer_id):
+        abort(403)
+    if not ticket.is_paid:
+        abort(404)
+    return _qr_response(ticket_qr_data(ticket), fmt)
+
+@main.route('/invitation/<int:invitation_id>/qr.<fmt>')
+@login_required
+def invitation_qr(invitation_id, fmt):
+    """QR code image for an invitation."""
+    invitation = Invitation.query.get_or_404(invitation_id)
+    if current_user.id not in (invitation.user_id, invitation.event.organizer_id):
+        abort(403)
+    return _qr_response(invitation_qr_data(invitation), fmt)
+
 @main.route('/dashboard')
 @login_required
 def dashboard():
     """User dashboard route."""
-    # Get user's events by category
-    user_events = Event.query.filter_by(organizer_id=current_user.id).all()
-    events_by_category = {}
-    for event in user_events:
-        if event.category not in events_by_category:
-            events_by_category[event.category] = []
-        events_by_category[event.category].append(event)
-    
-    # Get user's tickets and invitations
-    user_tickets = Ticket.query.filter_by(user_id=current_user.id).all()
-    user_invitations = Invitation.query.filter_by(user_id=current_user.id).all()
+    try:
+        data = dashboard_data(current_user.id, request.args.get('cursor'))
+    except ValueError:
+        abort(400)
     
-    return render_template('dashboard.html', 
-                         events_by_category=events_by_category,
-                         tickets=user_tickets,
-                         invitations=user_invitations)
+    return render_template('dashboard.html', **data)
 
 @main.route('/admin-dashboard')
 @login_required
 def admin_dashboard():
     """Admin dashboard route."""
-    # Statistics
-    total_events = Event.query.count()
-    total_tickets = Ticket.query.count()
-    total_invitations = Invitation.query.count()
-    total_users = User.query.count()
+    # Statistics, from the daily rollups rather than counting every table
+    metrics = admin_metrics()
     
     # Recent events
-    recent_events = Event.query.order_by(Event.date.desc()).limit(5).all()
+    recent_events = event_listing().order_by(Event.date.desc()).limit(5).all()
     
     # Recent tickets
-    recent_tickets = Ticket.query.order_by(Ticket.id.desc()).limit(5).all()
+    recent_tickets = Ticket.query.options(db.joinedload(Ticket.event), db.joinedload(Ticket.user)) \
+        .order_by(Ticket.date_purchased.desc()).limit(5).all()
     
     return render_template('admin_dashboard.html',
-                         total_events=total_events,
-                         total_tickets=total_tickets,
-                         total_invitations=total_invitations,
-                         total_users=total_users,
+                         metrics=metrics,
                          recent_events=recent_events,
+                         now=datetime.utcnow(),
                          recent_tickets=recent_tickets)
 
+@main.route('/api/admin/metrics')
+@login_required
+def api_admin_metrics():
+    """Daily platform metrics for the admin charts: ?days= (default 30) ending today."""
+    days = request.args.get('days', 30, type=int)
+    if not 1 <= days <= MAX_SERIES_DAYS:
+        return jsonify({'success': False, 'message': f'days must be between 1 and {MAX_SERIES_DAYS}'}), 400
+    
+    metrics = admin_metrics()
+    end = datetime.utcnow().date()
+    return jsonify({
+        'success': True,
+        'series': metrics_series(end - timedelta(days=days - 1), end),
+        'refreshed_at': metrics['refreshed_at'].isoformat() if metrics['refreshed_at'] else None
+    })
+
 @main.route('/create_event', methods=['GET', 'POST'])
 @login_required
 def create_event():
@@ -171,10 +236,16 @@ def create_event():
                 price=form.price.data, 
                 invitation_fee=form.invitation_fee.data,
                 category=form.category.data,
+                capacity=form.capacity.data,
                 organizer_id=current_user.id
             )
             db.session.add(event)
+            db.session.flush()
+            default_tier(event)
             db.session.commit()
+            invalidate_event_listings()
+            invalidate_pages('events')
+            invalidate_sitemaps()
             flash('Event created successfully!', 'success')
             return redirect(url_for('main.dashboard'))
         except Exception as e:
@@ -206,21 +277,10 @@ def create_invitation():
                 amount_paid=invitation_cost
             )
             db.session.add(invitation)
-            db.session.flush()  # Get the invitation ID
-
-            # Generate QR code
-            qr_data = f"invitation_id:{invitation.id}"
-            qr_img = qrcode.make(qr_data)
-            buffered = BytesIO()
-            qr_img.save(buffered, format="PNG")
-            qr_code_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
-
-            invitation.qr_code = qr_code_base64
+            db.session.flush()
             
-            # Update organizer earnings
-            organizer = User.query.get(event.organizer_id)
-            if organizer:
-                organizer.earnings += invitation_cost
+            # Credit the organizer in the earnings ledger
+            credit(event.organizer_id, invitation_cost, 'invitation', invitation.id)
                 
             db.session.commit()
 
@@ -233,23 +293,41 @@ def create_invitation():
     return render_template('create_invitation.html', form=form)
 
 @main.route('/blog')
+@cached_page('blog')
 def blog():
     """Blog listing route."""
-    posts = BlogPost.query.filter_by(published=True).order_by(BlogPost.date_posted.desc()).all()
-    return render_template('blog.html', posts=posts)
+    try:
+        page = _post_page()
+    except ValueError:
+        abort(400)
+    return render_template('blog.html', posts=page['items'], page=page,
+                           popular_posts=popular_posts(),
+                           category_counts=blog_category_counts())
 
 @main.route('/blog/post/<slug>')
+@cached_page('blog', 'events')
 def blog_post(slug):
     """Blog post detail route."""
-    post = BlogPost.query.filter_by(slug=slug, published=True).first_or_404()
-    return render_template('blog_post.html', post=post)
+    post = blog_detail().filter_by(slug=slug, published=True).first_or_404()
+    related_posts = popular_posts_query().filter(
+        BlogPost.category == post.category,
+        BlogPost.id != post.id
+    ).limit(3).all()
+    featured_events = event_listing().order_by(Event.date.desc()).limit(3).all()
+    return render_template('blog_post.html', post=post,
+                           related_posts=related_posts,
+                           featured_events=featured_events)
 
 @main.route('/admin/blog')
 @login_required
 def admin_blog():
     """Admin blog management route."""
-    posts = BlogPost.query.order_by(BlogPost.date_posted.desc()).all()
-    return render_template('admin_blog.html', posts=posts)
+    try:
+        page = _post_page(published_only=False)
+    except ValueError:
+        abort(400)
+    return render_template('admin_blog.html', posts=page['items'], page=page,
+                           post_stats=blog_post_stats(), category_counts=blog_category_counts())
 
 @main.route('/admin/blog/create', methods=['GET', 'POST'])
 @login_required
@@ -268,6 +346,8 @@ def create_blog_post():
         )
         db.session.add(post)
         db.session.commit()
+        invalidate_pages('blog')
+        invalidate_sitemaps()
         flash('Blog post created successfully!', 'success')
         return redirect(url_for('main.admin_blog'))
     return render_template('create_blog_post.html', form=form)
@@ -276,7 +356,7 @@ def create_blog_post():
 @login_required
 def edit_blog_post(post_id):
     """Blog post editing route."""
-    post = BlogPost.query.get_or_404(post_id)
+    post = blog_detail().get_or_404(post_id)
     form = BlogPostForm()
     
     if form.validate_on_submit():
@@ -286,6 +366,8 @@ def edit_blog_post(post_id):
         post.slug = form.slug.data
         post.published = form.published.data
         db.session.commit()
+        invalidate_pages('blog')
+        invalidate_sitemaps()
         flash('Blog post updated successfully!', 'success')
         return redirect(url_for('main.admin_blog'))
     
@@ -315,7 +397,8 @@ def profile(user_id):
     return render_template('profile.html', 
                          user=user, 
                          events_count=user_events,
-                         tickets_count=user_tickets)
+                         tickets_count=user_tickets,
+                         earnings_kobo=earnings_balance(user.id))
 
 @main.route('/offline-verification')
 @login_required
@@ -323,6 +406,131 @@ def offline_verification():
     """Offline ticket verification page."""
     return render_template('offline_verification.html')
 
+def _organizer_event_or_403(event_id):
+    """Return the event if the current user organizes it, else abort."""
+    event = Event.query.get_or_404(event_id)
+    if event.organizer_id != current_user.id:
+        abort(403)
+    return event
+
+@main.route('/api/events/<int:event_id>/verification-bundle')
+@login_required
+def event_verification_bundle(event_id):
+    """Download the key material and revocation list for offline scanning."""
+    event = _organizer_event_or_403(event_id)
+    
+    revoked = db.session.query(Ticket.id).filter(
+        Ticket.event_id == event.id,
+        Ticket.payment_status.in_(['refunded', 'cancelled'])
+    )
+    response = jsonify(verification_bundle(event, [ticket_id for (ticket_id,) in revoked]))
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
+
+@main.route('/api/events/<int:event_id>/manifest')
+@login_required
+def event_manifest(event_id):
+    """Compact, versioned ticket manifest for scanner devices."""
+    event = _organizer_event_or_403(event_id)
+    since = request.args.get('since', type=int)
+    try:
+        manifest = build_event_manifest(event.id, since)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid since'}), 400
+    
+    payload = json.dumps(manifest, separators=(',', ':'))
+    response = make_response(payload)
+    response.headers['Content-Type'] = 'application/json'
+    response.headers['Cache-Control'] = 'private, no-store'
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_data(gzip.compress(payload.encode('utf-8')))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@main.route('/api/events/<int:event_id>/scans', methods=['POST'])
+@login_required
+def upload_offline_scans(event_id):
+    """Record scans a scanner device made while offline."""
+    event = _organizer_event_or_403(event_id)
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('ticket_ids'), list):
+            return jsonify({'success': False, 'message': 'Invalid request data'}), 400
+        
+        max_size = current_app.config.get('GATE_BATCH_MAX_SIZE', 500)
+        if len(data['ticket_ids']) > max_size:
+            return jsonify({'success': False, 'message': f'Batch exceeds {max_size} tickets'}), 400
+        
+        result = record_offline_scans(event.id, data['ticket_ids'])
+        return jsonify(dict(result, success=True))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid ticket ID'}), 400
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Offline scan upload error: {str(e)}')
+        return jsonify({'success': False, 'message': 'An error occurred while recording scans'}), 500
+
+@main.route('/api/events')
+def api_events():
+    """Paginated event listing: ?category=&limit=&cursor=<next_cursor>."""
+    category = request.args.get('category')
+    if category and category not in VALID_CATEGORIES:
+        return jsonify({'success': False, 'message': 'Invalid category'}), 400
+    try:
+        per_page = _page_size()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid limit'}), 400
+    try:
+        page = _event_page(category, per_page)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+    
+    return jsonify({
+        'success': True,
+        'events': [{
+            'id': event.id,
+            'name': event.name,
+            'summary': event.summary,
+            'date': event.date.isoformat(),
+            'location': event.location,
+            'price': event.price,
+            'category': event.category,
+            'url': url_for('main.event_detail', event_id=event.id, _external=True)
+        } for event in page['items']],
+        'next_cursor': page['next_cursor'],
+        'has_next': page['has_next']
+    })
+
+@main.route('/api/blog/posts')
+def api_blog_posts():
+    """Paginated published blog posts: ?category=&limit=&cursor=<next_cursor>."""
+    try:
+        per_page = _page_size()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid limit'}), 400
+    try:
+        page = _post_page(category=request.args.get('category'), per_page=per_page)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+    
+    return jsonify({
+        'success': True,
+        'posts': [{
+            'id': post.id,
+            'title': post.title,
+            'slug': post.slug,
+            'excerpt': post.excerpt,
+            'category': post.category,
+            'author': post.author.username if post.author else None,
+            'date_posted': post.date_posted.isoformat(),
+            'views': post.views,
+            'url': url_for('main.blog_post', slug=post.slug, _external=True)
+        } for post in page['items']],
+        'next_cursor': page['next_cursor'],
+        'has_next': page['has_next']
+    })
+
 @main.route('/api/verify_ticket', methods=['POST'])
 @login_required
 def verify_ticket():
@@ -339,56 +547,78 @@ def verify_ticket():
             return jsonify({'success': False, 'message': 'Missing ticket ID or QR data'}), 400
         
         # Find ticket by ID or QR data
-        if ticket_id:
-            ticket = Ticket.query.get(ticket_id)
-        else:
-            # Parse QR data: "ticket_id:123:event_id:456"
-            parts = qr_data.split(':')
-            if len(parts) >= 2 and parts[0] == 'ticket_id':
-                ticket = Ticket.query.get(int(parts[1]))
-            else:
+        event_id = None
+        if not ticket_id:
+            # Parse QR data: a signed token, or legacy "ticket_id:123:event_id:456"
+            parsed = parse_qr_data(qr_data)
+            if parsed is None:
                 return jsonify({'success': False, 'message': 'Invalid QR code format'}), 400
-        
-        if not ticket:
+            ticket_id, event_id = parsed
+        try:
+            ticket_id = int(ticket_id)
+        except (TypeError, ValueError):
             return jsonify({'success': False, 'message': 'Ticket not found'}), 404
         
-        # Fraud protection checks
-        if ticket.payment_status != 'success':
-            return jsonify({
-                'success': False, 
-                'message': 'Ticket payment not verified',
-                'payment_status': ticket.payment_status
-            }), 400
-        
-        if ticket.is_scanned or ticket.used_at:
-            return jsonify({
-                'success': False, 
-                'message': 'Ticket already used',
-                'used_at': ticket.used_at.isoformat() if ticket.used_at else None
-            }), 400
+        # Atomically mark the ticket as used; only one scanner can win
+        used_at = redeem_ticket(ticket_id, event_id)
+        db.session.commit()
         
-        # Verify event exists and is valid
-        event = Event.query.get(ticket.event_id)
-        if not event:
-            return jsonify({'success': False, 'message': 'Event not found'}), 404
+        if not used_at:
+            # Fraud protection checks explain why the ticket was rejected
+            ticket = Ticket.query.get(ticket_id)
+            event = Event.query.get(ticket.event_id) if ticket else None
+            verdict, status_code = check_ticket(ticket, event, event_id) or (
+                {'success': False, 'message': 'Ticket already used', 'used_at': None}, 400
+            )
+            return jsonify(verdict), status_code
         
-        # Mark ticket as used
-        ticket.mark_used()
-        db.session.commit()
+        # The ticket is already admitted, so a missing holder must not fail the scan
+        event_name, user_name = db.session.query(Event.name, User.username).select_from(Ticket) \
+            .outerjoin(Event, Event.id == Ticket.event_id) \
+            .outerjoin(User, User.id == Ticket.user_id) \
+            .filter(Ticket.id == ticket_id).first() or (None, None)
         
         return jsonify({
             'success': True, 
             'message': 'Ticket verified successfully',
-            'ticket_id': ticket.id,
-            'event_name': event.name,
-            'user_name': ticket.user.username,
-            'verified_at': ticket.used_at.isoformat()
+            'ticket_id': ticket_id,
+            'event_name': event_name,
+            'user_name': user_name,
+            'verified_at': used_at.isoformat()
         })
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f'Ticket verification error: {str(e)}')
         return jsonify({'success': False, 'message': 'An error occurred during verification'}), 500
 
+@main.route('/api/verify_tickets', methods=['POST'])
+@login_required
+def verify_tickets():
+    """Batch API endpoint verifying many tickets in one round trip."""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('tickets'), list):
+            return jsonify({'success': False, 'message': 'Invalid request data'}), 400
+        
+        items = data['tickets']
+        if not items:
+            return jsonify({'success': False, 'message': 'No tickets provided'}), 400
+        
+        max_size = current_app.config.get('GATE_BATCH_MAX_SIZE', 500)
+        if len(items) > max_size:
+            return jsonify({'success': False, 'message': f'Batch exceeds {max_size} tickets'}), 400
+        
+        results = verify_tickets_batch(items)
+        return jsonify({
+            'success': True,
+            'admitted': sum(1 for result in results if result['success']),
+            'results': results
+        })
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Batch ticket verification error: {str(e)}')
+        return jsonify({'success': False, 'message': 'An error occurred during verification'}), 500
+
 @main.route('/api/verify_invitation', methods=['POST'])
 @login_required
 def verify_invitation():
@@ -486,73 +716,28 @@ Crawl-delay: 1''')
 
 @main.route('/sitemap.xml')
 def sitemap_xml():
-    """Dynamic sitemap.xml route with all content."""
-    # Create the root element
-    urlset = Element('urlset')
-    urlset.set('xmlns', 'http://www.sitemaps.org/schemas/sitemap/0.9')
-    urlset.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-    urlset.set('xsi:schemaLocation', 'http://www.sitemaps.org/schemas/sitemap/0.9 http://www.sitemaps.org/schemas/sitemap/0.9/sitemap.xsd')
-    
-    # Add static URLs
-    static_urls = [
-        ('/', '2023-06-01', 'daily', '1.0'),
-        ('/events', '2023-06-01', 'hourly', '0.9'),
-        ('/events/category/formal', '2023-06-01', 'hourly', '0.8'),
-        ('/events/category/campus', '2023-06-01', 'hourly', '0.8'),
-        ('/events/category/street', '2023-06-01', 'hourly', '0.8'),
-        ('/events/category/concert', '2023-06-01', 'hourly', '0.8'),
-        ('/events/category/festival', '2023-06-01', 'hourly', '0.8'),
-        ('/register', '2023-06-01', 'monthly', '0.5'),
-        ('/login', '2023-06-01', 'monthly', '0.5'),
-        ('/blog', '2023-06-01', 'daily', '0.8')
-    ]
-    
-    for url_path, lastmod, changefreq, priority in static_urls:
-        url = SubElement(urlset, 'url')
-        loc = SubElement(url, 'loc')
-        loc.text = f'https://partyticket.ng{url_path}'
-        lastmod_elem = SubElement(url, 'lastmod')
-        lastmod_elem.text = lastmod
-        changefreq_elem = SubElement(url, 'changefreq')
-        changefreq_elem.text = changefreq
-        priority_elem = SubElement(url, 'priority')
-        priority_elem.text = priority
-    
-    # Add dynamic event URLs
-    events = Event.query.order_by(Event.date.desc()).limit(1000).all()
-    for event in events:
-        url = SubElement(urlset, 'url')
-        loc = SubElement(url, 'loc')
-        loc.text = f'https://partyticket.ng/event/{event.id}'
-        lastmod_elem = SubElement(url, 'lastmod')
-        lastmod_elem.text = event.date.strftime('%Y-%m-%d')
-        changefreq_elem = SubElement(url, 'changefreq')
-        changefreq_elem.text = 'daily'
-        priority_elem = SubElement(url, 'priority')
-        priority_elem.text = '0.7'
-    
-    # Add blog post URLs
-    posts = BlogPost.query.filter_by(published=True).all()
-    for post in posts:
-        url = SubElement(urlset, 'url')
-        loc = SubElement(url, 'loc')
-        loc.text = f'https://partyticket.ng/blog/post/{post.slug}'
-        lastmod_elem = SubElement(url, 'lastmod')
-        lastmod_elem.text = post.date_posted.strftime('%Y-%m-%d')
-        changefreq_elem = SubElement(url, 'changefreq')
-        changefreq_elem.text = 'monthly'
-        priority_elem = SubElement(url, 'priority')
-        priority_elem.text = '0.6'
-    
-    # Convert to string
-    rough_string = tostring(urlset, 'utf-8')
-    reparsed = minidom.parseString(rough_string)
-    pretty_xml = reparsed.toprettyxml(indent="  ")
-    
-    # Remove empty lines
-    lines = [line for line in pretty_xml.split('\n') if line.strip()]
-    pretty_xml = '\n'.join(lines)
-    
-    response = make_response(pretty_xml)
-    response.headers['Content-Type'] = 'application/xml'
-    return response
\ No newline at end of file
+    """Sitemap index listing the static page sitemap and every event and blog post shard."""
+    return _sitemap_response('index')
+
+@main.route('/sitemap-<name>.xml')
+def sitemap_part(name):
+    """One sitemap listed in the index: 'pages', 'events-<n>' or 'posts-<n>'."""
+    return _sitemap_response(name)
+
+def _sitemap_response(name):
+    """Serve a sitemap from the disk cache with ETag/Last-Modified, streaming it if the cache is unusable."""
+    try:
+        response = send_file(cached_sitemap(name), mimetype='application/xml', conditional=True, etag=True,
+                             max_age=None)
+    except LookupError:
+        abort(404)
+    except OSError as e:
+        current_app.logger.error(f'Sitemap cache unavailable: {str(e)}')
+        try:
+            chunks = iter_sitemap(name)
+        except LookupError:
+            abort(404)
+        response = current_app.response_class(stream_with_context(chunks), mimetype='application/xml')
+    # Crawlers keep their copy but revalidate, getting a 304 while it is current
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -1,16 +1,17 @@
 from flask import Blueprint, request, jsonify, current_app, url_for, flash, redirect
 from flask_login import login_required, current_user
 import requests
-import json
 import hashlib
 import hmac
 from app import db
-from app.models import Transaction, Ticket, Event, User
-from app.email_utils import send_ticket_confirmation_email
-from datetime import datetime
-import qrcode
-import base64
-from io import BytesIO
+from app.models import Transaction, Ticket, Event, WebhookEvent, TicketTier
+from app.jobs import enqueue
+from app.gateway import gateway
+from app.ticket_utils import issue_tickets, confirm_tickets
+from app.inventory import default_tier, reserve_tickets, release_hold, convert_hold, sell_tickets
+from app.cache import invalidate_pages
+from app.earnings import credit
+from sqlalchemy.exc import IntegrityError
 
 payment = Blueprint('payment', __name__)
 
@@ -22,6 +23,164 @@ def calculate_platform_fee(amount, fee_percent=None):
     organizer_amount = amount - platform_fee
     return platform_fee, organizer_amount
 
+def record_webhook_event(provider, event_type, reference, provider_event_id=None):
+    """Add a gateway event to the ledger, returning False if it was already processed.
+
+    The insert runs in a savepoint against a unique constraint, so a duplicate
+    delivery racing the original blocks until the first commits and is then
+    rejected. The entry commits with the rest of the payment processing; if
+    that fails it is rolled back and the gateway's retry is processed again.
+    """
+    try:
+        with db.session.begin_nested():
+            db.session.add(WebhookEvent(
+                provider=provider,
+                event_type=event_type,
+                reference=reference,
+                provider_event_id=str(provider_event_id) if provider_event_id is not None else None
+            ))
+        return True
+    except IntegrityError:
+        return False
+
+def _checkout_request():
+    """Parse a checkout request body into (event, tier, quantity, email), or an error response."""
+    data = request.get_json() or {}
+    event_id = data.get('event_id')
+    email = data.get('email', current_user.email)
+    try:
+        quantity = int(data.get('quantity', 1))
+    except (TypeError, ValueError):
+        quantity = 0
+    
+    if not event_id or not email or quantity < 1:
+        return None, (jsonify({'error': 'Missing required fields'}), 400)
+    
+    event = Event.query.get_or_404(event_id)
+    if data.get('tier_id'):
+        tier = TicketTier.query.filter_by(id=data['tier_id'], event_id=event.id).first_or_404()
+    else:
+        tier = default_tier(event)
+    return (event, tier, quantity, email), None
+
+def _checkout_price(event, tier):
+    return tier.price if tier else event.price
+
+def _checkout_tier(event, metadata):
+    """The tier a paid checkout was for, named in its payment metadata.
+
+    Checkouts from before the metadata carried a tier get the default tier.
+    """
+    tier_id = metadata.get('tier_id')
+    if tier_id:
+        tier = TicketTier.query.filter_by(id=int(tier_id), event_id=event.id).first()
+        if tier:
+            return tier
+    return default_tier(event)
+
+def _start_checkout(event, tier, quantity, reference, provider):
+    """Record a pending checkout and hold its tickets.
+    
+    Returns the total amount to charge, or None (after rolling back) if the
+    tier does not have enough tickets left. The caller commits.
+    """
+    # Cheap early exit for sold-out drops; reserve_tickets() makes the real check
+    if tier and tier.available < quantity and not tier.held:
+        return None
+    
+    price = _checkout_price(event, tier)
+    total_amount = price * quantity
+    db.session.add(Transaction(
+        user_id=current_user.id,
+        event_id=event.id,
+        provider=provider,
+        reference=reference,
+        amount=total_amount,
+        status='initialized'
+    ))
+    
+    # Create pending tickets (paystack_ref doubles as the Flutterwave ref)
+    issue_tickets(event.id, current_user.id, quantity, price, reference=reference,
+                  tier_id=tier.id if tier else None)
+    
+    # Reserve last, so the tier row is only locked until the caller's commit
+    if tier and reserve_tickets(tier, quantity, current_user.id, reference) is None:
+        db.session.rollback()
+        return None
+    return total_amount
+
+def _sold_out_response(tier):
+    left = max(tier.capacity - tier.held - tier.sold, 0) if tier else 0
+    return jsonify({'error': 'Not enough tickets left', 'available': left}), 409
+
+def _record_sale(tier, reference, ticket_count):
+    """Move a paid checkout's stock from held to sold."""
+    if convert_hold(reference) or not ticket_count:
+        return
+    # Tickets issued after the checkout was reaped, or never held at all
+    if tier:
+        sell_tickets(tier.id, ticket_count, reference)
+
+def _fulfil_payment(transaction, provider, reference, amount, payment_data, metadata):
+    """Record a verified payment: mark it paid, confirm its tickets and credit the organizer.
+
+    A checkout the reaper already cleaned up is rebuilt from the payment
+    metadata: a missing transaction is recreated, and tickets that were
+    deleted are issued again at the checkout's tier and price. Returns
+    (transaction, ticket_count), or (None, 0) if there is no transaction and
+    the metadata does not say what was bought. The caller commits.
+    """
+    if not transaction:
+        user_id = metadata.get('user_id')
+        event_id = metadata.get('event_id')
+        if not user_id or not event_id:
+            return None, 0
+        transaction = Transaction(
+            user_id=int(user_id),
+            event_id=int(event_id),
+            provider=provider,
+            reference=reference,
+            amount=amount,
+            status='pending'
+        )
+        db.session.add(transaction)
+        db.session.flush()
+    
+    # Calculate fees
+    platform_fee, organizer_amount = calculate_platform_fee(amount)
+    
+    # Mark transaction as success
+    transaction.mark_success(payment_data, platform_fee, organizer_amount)
+    
+    # Mark the checkout's tickets paid, issuing them if checkout never did
+    # or the reaper deleted them
+    ticket_count = confirm_tickets(reference)
+    event = db.session.get(Event, transaction.event_id)
+    if event:
+        tier = _checkout_tier(event, metadata)
+        if not ticket_count:
+            price = metadata.get('price')
+            ticket_count = len(issue_tickets(
+                event.id,
+                transaction.user_id,
+                int(metadata.get('quantity', 1)),
+                float(price) if price is not None else _checkout_price(event, tier),
+                reference=reference,
+                payment_status='success',
+                tier_id=tier.id if tier else None
+            ))
+        
+        # Credit the organizer in the earnings ledger
+        _record_sale(tier, reference, ticket_count)
+        credit(event.organizer_id, organizer_amount, 'ticket_sale', reference)
+    
+    # Email runs in the worker so the gateway gets its answer without
+    # waiting on QR rendering or SMTP; the job commits together with the
+    # payment, as do sell-through milestones from record_sales
+    if ticket_count:
+        enqueue('send_ticket_confirmation', reference=reference)
+    return transaction, ticket_count
+
 @payment.route('/paystack/webhook', methods=['POST'])
 def paystack_webhook():
     """Handle Paystack webhook for payment events."""
@@ -50,84 +209,25 @@ def paystack_webhook():
             payment_data = data.get('data', {})
             reference = payment_data.get('reference')
             amount = payment_data.get('amount', 0) / 100  # Convert from kobo to Naira
-            metadata = payment_data.get('metadata', {})
+            metadata = payment_data.get('metadata') or {}
             
-            # Find or create transaction
+            # Paystack retries deliveries; only the first one is processed
+            if not record_webhook_event('paystack', event_type, reference, payment_data.get('id')):
+                return jsonify({'status': 'duplicate'}), 200
+            
+            # Find the transaction; the metadata rebuilds it if it was reaped
             transaction = Transaction.query.filter_by(reference=reference).first()
+            if transaction and transaction.status == 'success':
+                db.session.commit()
+                return jsonify({'status': 'duplicate'}), 200
+            transaction, ticket_count = _fulfil_payment(
+                transaction, 'paystack', reference, amount, payment_data, metadata)
             if not transaction:
-                # Create transaction from metadata
-                user_id = metadata.get('user_id')
-                event_id = metadata.get('event_id')
-                quantity = metadata.get('quantity', 1)
-                
-                if not user_id or not event_id:
-                    current_app.logger.error(f'Missing metadata in Paystack webhook: {metadata}')
-                    return jsonify({'error': 'Missing metadata'}), 400
-                
-                transaction = Transaction(
-                    user_id=user_id,
-                    event_id=event_id,
-                    provider='paystack',
-                    reference=reference,
-                    amount=amount,
-                    status='pending'
-                )
-                db.session.add(transaction)
-                db.session.flush()
-            
-            # Calculate fees
-            platform_fee, organizer_amount = calculate_platform_fee(amount)
-            
-            # Mark transaction as success
-            transaction.mark_success(payment_data, platform_fee, organizer_amount)
-            
-            # Update tickets
-            tickets = Ticket.query.filter_by(paystack_ref=reference).all()
-            if not tickets:
-                # Create tickets if they don't exist
-                event = Event.query.get(transaction.event_id)
-                user = User.query.get(transaction.user_id)
-                quantity = metadata.get('quantity', 1)
-                
-                for i in range(quantity):
-                    ticket = Ticket(
-                        event_id=event.id,
-                        user_id=user.id,
-                        paystack_ref=reference,
-                        payment_status='success',
-                        amount_paid=event.price,
-                        date_purchased=datetime.utcnow()
-                    )
-                    # Generate QR code
-                    qr_data = f"ticket_id:{ticket.id}:event_id:{event.id}"
-                    qr_img = qrcode.make(qr_data)
-                    buffered = BytesIO()
-                    qr_img.save(buffered, format="PNG")
-                    ticket.qr_code = base64.b64encode(buffered.getvalue()).decode('utf-8')
-                    db.session.add(ticket)
-                
-                db.session.flush()
-                tickets = Ticket.query.filter_by(paystack_ref=reference).all()
-            
-            # Update ticket statuses
-            for ticket in tickets:
-                ticket.payment_status = 'success'
-            
-            # Update organizer earnings
-            event = Event.query.get(transaction.event_id)
-            if event:
-                organizer = User.query.get(event.organizer_id)
-                if organizer:
-                    organizer.earnings += organizer_amount
+                current_app.logger.error(f'Missing metadata in Paystack webhook: {metadata}')
+                return jsonify({'error': 'Missing metadata'}), 400
             
             db.session.commit()
-            
-            # Send confirmation email
-            if tickets:
-                try:
-                    send_ticket_confirmation_email(user, event, tickets)
-                except Exception as e:
-                    current_app.logger.error(f'Failed to send ticket email: {str(e)}')
+            invalidate_pages(f'event:{transaction.event_id}')
             
             return jsonify({'status': 'success'}), 200
         
@@ -142,54 +242,24 @@ def paystack_webhook():
 @login_required
 def initialize_payment():
     """Initialize Paystack payment for tickets."""
-    data = request.get_json()
-    event_id = data.get('event_id')
-    quantity = data.get('quantity', 1)
-    email = data.get('email', current_user.email)
-    
-    if not event_id or not email:
-        return jsonify({'error': 'Missing required fields'}), 400
-    
-    event = Event.query.get_or_404(event_id)
-    total_amount = event.price * quantity
-    amount_kobo = int(total_amount * 100)  # Convert to kobo
+    checkout, error = _checkout_request()
+    if error:
+        return error
+    event, tier, quantity, email = checkout
     
     # Generate unique reference
     import secrets
     reference = f"PT-{secrets.token_hex(8)}"
     
-    # Create pending transaction
-    transaction = Transaction(
-        user_id=current_user.id,
-        event_id=event.id,
-        provider='paystack',
-        reference=reference,
-        amount=total_amount,
-        status='initialized'
-    )
-    db.session.add(transaction)
-    
-    # Create pending tickets
-    tickets = []
-    for i in range(quantity):
-        ticket = Ticket(
-            event_id=event.id,
-            user_id=current_user.id,
-            paystack_ref=reference,
-            payment_status='pending',
-            amount_paid=event.price,
-            date_purchased=datetime.utcnow()
-        )
-        db.session.add(ticket)
-        tickets.append(ticket)
+    # Create pending transaction and tickets, holding stock for the checkout
+    total_amount = _start_checkout(event, tier, quantity, reference, 'paystack')
+    if total_amount is None:
+        return _sold_out_response(tier)
+    amount_kobo = int(total_amount * 100)  # Convert to kobo
     
     db.session.commit()
     
     # Initialize Paystack payment
-    headers = {
-        "Authorization": f"Bearer {current_app.config['PAYSTACK_SECRET_KEY']}",
-        "Content-Type": "application/json"
-    }
     payload = {
         "email": email,
         "amount": amount_kobo,
@@ -199,6 +269,8 @@ def initialize_payment():
             "user_id": current_user.id,
             "event_id": event.id,
             "quantity": quantity,
+            "tier_id": tier.id if tier else None,
+            "price": _checkout_price(event, tier),
             "custom_fields": [
                 {
                     "display_name": "Event",
@@ -210,7 +282,7 @@ def initialize_payment():
     }
     
     try:
-        response = requests.post('https://api.paystack.co/transaction/initialize', headers=headers, json=payload)
+        response = gateway('paystack').post('/transaction/initialize', json=payload)
         response.raise_for_status()
         result = response.json()
         
@@ -221,10 +293,14 @@ def initialize_payment():
                 'reference': reference
             }), 200
         else:
+            release_hold(reference)
+            db.session.commit()
             return jsonify({'error': 'Failed to initialize payment'}), 400
             
     except requests.exceptions.RequestException as e:
         db.session.rollback()
+        release_hold(reference)
+        db.session.commit()
         current_app.logger.error(f'Paystack initialization error: {str(e)}')
         return jsonify({'error': str(e)}), 500
 
@@ -238,12 +314,8 @@ def verify_payment():
         flash('Payment reference missing', 'danger')
         return redirect(url_for('main.events'))
     
-    headers = {
-        "Authorization": f"Bearer {current_app.config['PAYSTACK_SECRET_KEY']}"
-    }
-    
     try:
-        response = requests.get(f'https://api.paystack.co/transaction/verify/{reference}', headers=headers)
+        response = gateway('paystack').get(f'/transaction/verify/{reference}')
         response.raise_for_status()
         payment_data = response.json()
         
@@ -270,24 +342,19 @@ def verify_payment():
 @login_required
 def initialize_flutterwave_payment():
     """Initialize Flutterwave payment (similar structure to Paystack)."""
-    data = request.get_json()
-    event_id = data.get('event_id')
-    quantity = data.get('quantity', 1)
-    email = data.get('email', current_user.email)
-    
-    if not event_id or not email:
-        return jsonify({'error': 'Missing required fields'}), 400
-    
-    event = Event.query.get_or_404(event_id)
-    total_amount = event.price * quantity
+    checkout, error = _checkout_request()
+    if error:
+        return error
+    event, tier, quantity, email = checkout
     
     import secrets
     reference = f"PT-FW-{secrets.token_hex(8)}"
     
-    headers = {
-        "Authorization": f"Bearer {current_app.config['FLUTTERWAVE_SECRET_KEY']}",
-        "Content-Type": "application/json"
-    }
+    # Create pending transaction and tickets, holding stock for the checkout
+    total_amount = _start_checkout(event, tier, quantity, reference, 'flutterwave')
+    if total_amount is None:
+        return _sold_out_response(tier)
+    db.session.commit()
     
     payload = {
         "tx_ref": reference,
@@ -302,7 +369,9 @@ def initialize_flutterwave_payment():
         "meta": {
             "user_id": current_user.id,
             "event_id": event.id,
-            "quantity": quantity
+            "quantity": quantity,
+            "tier_id": tier.id if tier else None,
+            "price": _checkout_price(event, tier)
         },
         "customizations": {
             "title": "PartyTicket Payment",
@@ -311,43 +380,23 @@ def initialize_flutterwave_payment():
     }
     
     try:
-        response = requests.post('https://api.flutterwave.com/v3/payments', headers=headers, json=payload)
+        response = gateway('flutterwave').post('/payments', json=payload)
         response.raise_for_status()
         result = response.json()
         
         if result.get('status') == 'success':
-            # Create pending transaction
-            transaction = Transaction(
-                user_id=current_user.id,
-                event_id=event.id,
-                provider='flutterwave',
-                reference=reference,
-                amount=total_amount,
-                status='initialized'
-            )
-            db.session.add(transaction)
-            
-            # Create pending tickets
-            for i in range(quantity):
-                ticket = Ticket(
-                    event_id=event.id,
-                    user_id=current_user.id,
-                    paystack_ref=reference,  # Reusing field for Flutterwave ref
-                    payment_status='pending',
-                    amount_paid=event.price,
-                    date_purchased=datetime.utcnow()
-                )
-                db.session.add(ticket)
-            
-            db.session.commit()
-            
             return jsonify({
                 'link': result['data']['link']
             }), 200
         else:
+            release_hold(reference)
+            db.session.commit()
             return jsonify({'error': 'Failed to initialize payment'}), 400
             
     except requests.exceptions.RequestException as e:
+        db.session.rollback()
+        release_hold(reference)
+        db.session.commit()
         current_app.logger.error(f'Flutterwave initialization error: {str(e)}')
         return jsonify({'error': str(e)}), 500
 
@@ -361,59 +410,40 @@ def verify_flutterwave_payment():
         flash('Transaction ID missing', 'danger')
         return redirect(url_for('main.events'))
     
-    headers = {
-        "Authorization": f"Bearer {current_app.config['FLUTTERWAVE_SECRET_KEY']}"
-    }
-    
     try:
-        response = requests.get(f'https://api.flutterwave.com/v3/transactions/{transaction_id}/verify', headers=headers)
+        response = gateway('flutterwave').get(f'/transactions/{transaction_id}/verify')
         response.raise_for_status()
         payment_data = response.json()
         
         if payment_data['data']['status'] == 'successful':
             reference = payment_data['data']['tx_ref']
             amount = payment_data['data']['amount']
-            metadata = payment_data['data'].get('meta', {})
+            metadata = payment_data['data'].get('meta') or {}
             
-            # Find transaction
+            # Find the transaction; the metadata rebuilds it if it was reaped
             transaction = Transaction.query.filter_by(reference=reference).first()
-            if transaction:
-                platform_fee, organizer_amount = calculate_platform_fee(amount)
-                transaction.mark_success(payment_data['data'], platform_fee, organizer_amount)
-                
-                # Update tickets
+            if (transaction and transaction.status == 'success') or \
+                    not record_webhook_event('flutterwave', 'charge.completed', reference, transaction_id):
+                # Already processed, e.g. the customer reloaded the redirect
+                transaction = transaction or Transaction.query.filter_by(reference=reference).first()
                 tickets = Ticket.query.filter_by(paystack_ref=reference, user_id=current_user.id).all()
-                for ticket in tickets:
-                    ticket.payment_status = 'success'
-                    # Generate QR if not exists
-                    if not ticket.qr_code:
-                        qr_data = f"ticket_id:{ticket.id}:event_id:{ticket.event_id}"
-                        qr_img = qrcode.make(qr_data)
-                        buffered = BytesIO()
-                        qr_img.save(buffered, format="PNG")
-                        ticket.qr_code = base64.b64encode(buffered.getvalue()).decode('utf-8')
-                
-                # Update organizer earnings
-                event = Event.query.get(transaction.event_id)
-                if event:
-                    organizer = User.query.get(event.organizer_id)
-                    if organizer:
-                        organizer.earnings += organizer_amount
-                
-                db.session.commit()
-                
-                # Send email
-                if tickets:
-                    try:
-                        send_ticket_confirmation_email(current_user, event, tickets)
-                    except Exception as e:
-                        current_app.logger.error(f'Failed to send ticket email: {str(e)}')
-                
                 flash(f'Payment successful! {len(tickets)} ticket(s) purchased.', 'success')
-                return redirect(url_for('main.event_detail', event_id=event.id))
-            else:
+                if not transaction:
+                    return redirect(url_for('main.events'))
+                return redirect(url_for('main.event_detail', event_id=transaction.event_id))
+            
+            transaction, ticket_count = _fulfil_payment(
+                transaction, 'flutterwave', reference, amount, payment_data['data'], metadata)
+            if not transaction:
+                db.session.rollback()
                 flash('Transaction not found', 'danger')
                 return redirect(url_for('main.events'))
+            
+            db.session.commit()
+            invalidate_pages(f'event:{transaction.event_id}')
+            
+            flash(f'Payment successful! {ticket_count} ticket(s) purchased.', 'success')
+            return redirect(url_for('main.event_detail', event_id=transaction.event_id))
         else:
             flash('Payment verification failed', 'danger')
             return redirect(url_for('main.events'))
@@ -0,0 +1,189 @@
+from flask import current_app
+from app import db
+from app.models import Event
+from app.queries import event_listing
+from sqlalchemy.exc import DBAPIError
+import difflib
+import re
+
+# Relative weight of matches in each column when ranking results
+NAME_WEIGHT, LOCATION_WEIGHT, DESCRIPTION_WEIGHT = 10.0, 5.0, 1.0
+TYPO_CUTOFF = 0.75  # minimum difflib ratio for a spelling correction
+TRIGRAM_THRESHOLD = 0.4  # minimum pg_trgm word similarity for a fuzzy match
+
+# SQLite FTS5 index kept in sync with the event table by triggers
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS event_fts USING fts5("
+    "name, location, description, content='event', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS event_fts_vocab USING fts5vocab(event_fts, 'row')",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_ai AFTER INSERT ON event BEGIN "
+    "INSERT INTO event_fts(rowid, name, location, description) "
+    "VALUES (new.id, new.name, new.location, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_ad AFTER DELETE ON event BEGIN "
+    "INSERT INTO event_fts(event_fts, rowid, name, location, description) "
+    "VALUES ('delete', old.id, old.name, old.location, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_au AFTER UPDATE OF name, location, description ON event BEGIN "
+    "INSERT INTO event_fts(event_fts, rowid, name, location, description) "
+    "VALUES ('delete', old.id, old.name, old.location, old.description); "
+    "INSERT INTO event_fts(rowid, name, location, description) "
+    "VALUES (new.id, new.name, new.location, new.description); END",
+)
+
+
+def _terms(query: str) -> list[str]:
+    return re.findall(r'\w+', (query or '').lower())
+
+
+def ensure_search_index() -> None:
+    """Create the SQLite FTS5 index and its triggers if they are missing.
+
+    A newly created index is rebuilt from the event table. Postgres needs
+    nothing here; its indexes are created by the add_event_search migration.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return
+    with db.engine.begin() as connection:
+        existing = {name for (name,) in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE name IN ('event_fts', 'event_fts_au')"
+        )}
+        if existing == {'event_fts', 'event_fts_au'}:
+            return
+        for statement in SQLITE_FTS_DDL:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql("INSERT INTO event_fts(event_fts) VALUES ('rebuild')")
+
+
+def _drop_sqlite_index(target, connection, **kw):
+    # The external content index would be left pointing at rows that no longer exist
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('DROP TABLE IF EXISTS event_fts_vocab')
+        connection.exec_driver_sql('DROP TABLE IF EXISTS event_fts')
+
+
+def _create_sqlite_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            connection.exec_driver_sql(statement)
+
+
+db.event.listen(Event.__table__, 'before_drop', _drop_sqlite_index)
+db.event.listen(Event.__table__, 'after_create', _create_sqlite_index)
+
+
+def pg_search_document():
+    """The weighted tsvector for an event.
+
+    Must match the expression of the ix_event_search GIN index exactly, or
+    Postgres will not use the index.
+    """
+    def weighted(column, weight):
+        return db.func.setweight(db.func.to_tsvector(db.literal_column("'english'"), column),
+                                 db.literal_column(f"'{weight}'"))
+    return weighted(Event.name, 'A').op('||')(weighted(Event.location, 'B')) \
+        .op('||')(weighted(Event.description, 'C'))
+
+
+def _pg_ranked_ids(terms, category, limit, offset):
+    document = pg_search_document()
+    tsquery = db.func.to_tsquery(db.literal_column("'english'"), ' & '.join(f'{term}:*' for term in terms))
+    query = db.session.query(Event.id).filter(document.op('@@')(tsquery))
+    if category:
+        query = query.filter(Event.category == category)
+    query = query.order_by(db.func.ts_rank_cd(document, tsquery).desc(), Event.date.desc(), Event.id.desc())
+    return [event_id for (event_id,) in query.limit(limit).offset(offset)]
+
+
+def _pg_fuzzy_ids(text, category, limit, offset):
+    """Typo tolerant fallback using pg_trgm word similarity on name and location."""
+    similarity = db.func.greatest(db.func.word_similarity(text, Event.name),
+                                  db.func.word_similarity(text, Event.location))
+    query = db.session.query(Event.id).filter(
+        db.or_(db.literal(text).op('<%')(Event.name), db.literal(text).op('<%')(Event.location)),
+        similarity >= TRIGRAM_THRESHOLD
+    )
+    if category:
+        query = query.filter(Event.category == category)
+    query = query.order_by(similarity.desc(), Event.date.desc(), Event.id.desc())
+    try:
+        return [event_id for (event_id,) in query.limit(limit).offset(offset)]
+    except DBAPIError as e:
+        # pg_trgm not installed; fuzzy matching is best effort
+        db.session.rollback()
+        current_app.logger.warning(f'Fuzzy event search unavailable: {e}')
+        return []
+
+
+def _sqlite_ranked_ids(terms, category, limit, offset):
+    match = ' '.join(f'"{term}"*' for term in terms)
+    sql = (
+        'SELECT event.id FROM event_fts JOIN event ON event.id = event_fts.rowid '
+        'WHERE event_fts MATCH :match' + (' AND event.category = :category' if category else '') +
+        f' ORDER BY bm25(event_fts, {NAME_WEIGHT}, {LOCATION_WEIGHT}, {DESCRIPTION_WEIGHT}), '
+        'event.date DESC, event.id DESC LIMIT :limit OFFSET :offset'
+    )
+    params = {'match': match, 'category': category, 'limit': limit, 'offset': offset}
+    return [event_id for (event_id,) in db.session.execute(db.text(sql), params)]
+
+
+def _sqlite_correct(terms):
+    """Replace unknown terms with the closest indexed term sharing their first letter."""
+    corrected = []
+    for term in terms:
+        known = db.session.execute(db.text('SELECT 1 FROM event_fts_vocab WHERE term = :term'),
+                                   {'term': term}).first()
+        if known or len(term) < 3:
+            corrected.append(term)
+            continue
+        candidates = [candidate for (candidate,) in db.session.execute(
+            db.text('SELECT term FROM event_fts_vocab WHERE term >= :low AND term < :high'),
+            {'low': term[0], 'high': chr(ord(term[0]) + 1)}
+        )]
+        matches = difflib.get_close_matches(term, candidates, n=1, cutoff=TYPO_CUTOFF)
+        corrected.append(matches[0] if matches else term)
+    return corrected
+
+
+def find_events(query: str, category: str = None, page: int = 1, per_page: int = None) -> dict:
+    """Full-text search over event names, locations and descriptions.
+
+    Uses a weighted tsvector GIN index on Postgres and FTS5 on SQLite, with
+    prefix matching on every term and relevance ranking (name matches first,
+    then location, then description). When nothing matches, the search is
+    retried with typo tolerance: trigram similarity on Postgres, spelling
+    correction against the index vocabulary on SQLite.
+
+    Returns a dict with the page of ``events``, ``page``, ``per_page``,
+    ``has_next``, and ``suggestion`` (the corrected query, if one was used).
+    """
+    per_page = per_page or current_app.config.get('EVENTS_PER_PAGE', 20)
+    page = max(page, 1)
+    offset = (page - 1) * per_page
+    category = None if category in (None, '', 'all') else category
+    terms = _terms(query)
+    result = {'events': [], 'page': page, 'per_page': per_page, 'has_next': False, 'suggestion': None}
+    if not terms:
+        return result
+
+    postgres = db.engine.dialect.name == 'postgresql'
+    ranked = _pg_ranked_ids if postgres else _sqlite_ranked_ids
+
+    # Fetch one extra row to learn whether there is a next page without a COUNT
+    ids = ranked(terms, category, per_page + 1, offset)
+
+    # Fall back to typo tolerance only when the exact search matches nothing at all
+    if not ids and (page == 1 or not ranked(terms, category, 1, 0)):
+        if postgres:
+            ids = _pg_fuzzy_ids(' '.join(terms), category, per_page + 1, offset)
+        else:
+            corrected = _sqlite_correct(terms)
+            if corrected != terms:
+                ids = ranked(corrected, category, per_page + 1, offset)
+                if ids:
+                    result['suggestion'] = ' '.join(corrected)
+
+    result['has_next'] = len(ids) > per_page
+    ids = ids[:per_page]
+    events = {event.id: event for event in event_listing().filter(Event.id.in_(ids))} if ids else {}
+    result['events'] = [events[event_id] for event_id in ids if event_id in events]
+    return result
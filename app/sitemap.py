@@ -0,0 +1,195 @@
+from flask import current_app
+from app import db
+from app.models import Event, BlogPost
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+import glob
+import os
+import re
+import tempfile
+import time
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+BATCH_SIZE = 1000  # rows fetched and written at a time
+
+# (path, changefreq, priority, section whose newest row is the page's lastmod)
+STATIC_PAGES = (
+    ('/', 'daily', '1.0', 'events'),
+    ('/events', 'hourly', '0.9', 'events'),
+    ('/events/category/formal', 'hourly', '0.8', 'events'),
+    ('/events/category/campus', 'hourly', '0.8', 'events'),
+    ('/events/category/street', 'hourly', '0.8', 'events'),
+    ('/events/category/concert', 'hourly', '0.8', 'events'),
+    ('/events/category/festival', 'hourly', '0.8', 'events'),
+    ('/register', 'monthly', '0.5', None),
+    ('/login', 'monthly', '0.5', None),
+    ('/blog', 'daily', '0.8', 'posts'),
+)
+
+_NAME = re.compile(r'index|pages|(events|posts)-(\d+)')
+
+
+def _sections():
+    """(name, id column, lastmod column, filters, path for a row, changefreq, priority) per content type."""
+    return (
+        ('events', Event.id, Event.date_created, (), lambda row: f'/event/{row.id}', 'daily', '0.7'),
+        ('posts', BlogPost.id, BlogPost.date_posted, (BlogPost.published.is_(True),),
+         lambda row: f'/blog/post/{quote(row.slug)}', 'monthly', '0.6'),
+    )
+
+
+def _lastmod(value) -> str:
+    return value.isoformat(timespec='seconds') + '+00:00' if value else None
+
+
+def _url(loc, lastmod=None, changefreq=None, priority=None) -> str:
+    return ''.join((
+        f'<url><loc>{escape(loc)}</loc>',
+        f'<lastmod>{lastmod}</lastmod>' if lastmod else '',
+        f'<changefreq>{changefreq}</changefreq>' if changefreq else '',
+        f'<priority>{priority}</priority>' if priority else '',
+        '</url>\n',
+    ))
+
+
+def _shards(id_column, lastmod_column, filters):
+    """{shard number: newest lastmod} for one content type, in one GROUP BY query.
+
+    Shard n holds the rows with ids in (n * SITEMAP_MAX_URLS, (n + 1) *
+    SITEMAP_MAX_URLS], so it never exceeds the limit and is read through
+    the primary key.
+    """
+    # Floor division: SQLAlchemy 2.0 compiles / to true division, one group per row
+    shard = (id_column - 1) // current_app.config['SITEMAP_MAX_URLS']
+    query = db.session.query(shard, db.func.max(lastmod_column)).filter(*filters).group_by(shard)
+    return {int(number): lastmod for number, lastmod in query}
+
+
+def _iter_index(base_url):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    newest = {}
+    entries = [('pages', None)]
+    for name, id_column, lastmod_column, filters, *_ in _sections():
+        shards = _shards(id_column, lastmod_column, filters)
+        newest[name] = max((lastmod for lastmod in shards.values() if lastmod), default=None)
+        entries.extend((f'{name}-{number}', lastmod) for number, lastmod in sorted(shards.items()))
+    entries[0] = ('pages', max((lastmod for lastmod in newest.values() if lastmod), default=None))
+    for name, lastmod in entries:
+        yield f'<sitemap><loc>{escape(base_url)}/sitemap-{name}.xml</loc>'
+        yield f'<lastmod>{_lastmod(lastmod)}</lastmod></sitemap>\n' if lastmod else '</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def _iter_pages(base_url):
+    newest = {name: db.session.query(db.func.max(lastmod_column)).filter(*filters).scalar()
+              for name, _, lastmod_column, filters, *_ in _sections()}
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+    for path, changefreq, priority, section in STATIC_PAGES:
+        yield _url(base_url + path, _lastmod(newest.get(section)), changefreq, priority)
+    yield '</urlset>\n'
+
+
+def _iter_shard(base_url, section, number):
+    _, id_column, lastmod_column, filters, path, changefreq, priority = \
+        next(entry for entry in _sections() if entry[0] == section)
+    size = current_app.config['SITEMAP_MAX_URLS']
+    columns = [id_column, lastmod_column] + ([BlogPost.slug] if section == 'posts' else [])
+    query = db.select(*columns).where(id_column > number * size, id_column <= (number + 1) * size, *filters) \
+        .order_by(id_column).execution_options(yield_per=BATCH_SIZE)
+    result = db.session.execute(query)
+    first = result.fetchmany(BATCH_SIZE)
+    if not first:
+        raise LookupError(f'No sitemap shard {section}-{number}')
+
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+    for rows in [first, *result.partitions()]:
+        yield ''.join(_url(base_url + path(row), _lastmod(row[1]), changefreq, priority) for row in rows)
+    yield '</urlset>\n'
+
+
+def iter_sitemap(name: str, base_url: str = None):
+    """Yield the XML of one sitemap file in chunks, never holding all of it in memory.
+
+    ``name`` is 'index' for the sitemapindex, 'pages' for the static pages,
+    or '<events|posts>-<n>' for a shard of at most SITEMAP_MAX_URLS URLs.
+    Raises LookupError for an unknown name or an empty shard; the first
+    chunk is only produced once the name is known to be valid.
+    """
+    match = _NAME.fullmatch(name)
+    if not match:
+        raise LookupError(f'No sitemap {name!r}')
+    base_url = (base_url or current_app.config['SITEMAP_BASE_URL']).rstrip('/')
+    if name == 'index':
+        return _iter_index(base_url)
+    if name == 'pages':
+        return _iter_pages(base_url)
+    chunks = _iter_shard(base_url, match.group(1), int(match.group(2)))
+    # Run the shard query now, so a missing shard raises before anything is sent
+    first = next(chunks)
+
+    def generate():
+        yield first
+        yield from chunks
+    return generate()
+
+
+def _cache_dir() -> str:
+    return current_app.config['SITEMAP_CACHE_DIR'] or os.path.join(current_app.instance_path, 'sitemaps')
+
+
+def write_sitemap(name: str, path: str, base_url: str = None) -> None:
+    """Write one sitemap file, replacing ``path`` atomically once it is complete."""
+    chunks = iter_sitemap(name, base_url)
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp', delete=False) as f:
+        try:
+            for chunk in chunks:
+                f.write(chunk)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def cached_sitemap(name: str) -> str:
+    """Path of an up to date cached copy of a sitemap file, generating it if needed.
+
+    Copies live on disk under SITEMAP_CACHE_DIR, so every worker on the
+    host shares them, and are rebuilt after SITEMAP_CACHE_TTL seconds or
+    once invalidate_sitemaps() removes them. Raises LookupError like
+    iter_sitemap() and OSError if the cache directory is not writable.
+    """
+    path = os.path.join(_cache_dir(), f'sitemap-{name}.xml')
+    try:
+        if os.path.getmtime(path) > time.time() - current_app.config['SITEMAP_CACHE_TTL']:
+            return path
+    except OSError:
+        pass
+    write_sitemap(name, path)
+    return path
+
+
+def invalidate_sitemaps() -> None:
+    """Drop the cached sitemap files; errors are logged, never raised."""
+    for path in glob.glob(os.path.join(_cache_dir(), 'sitemap-*.xml')):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            current_app.logger.error(f'Sitemap cache invalidation failed for {path}: {str(e)}')
+
+
+def write_sitemaps(directory: str, base_url: str = None) -> list[str]:
+    """Write the sitemap index and every file it lists into ``directory``. Returns the file names."""
+    names = ['index', 'pages']
+    for name, id_column, lastmod_column, filters, *_ in _sections():
+        names.extend(f'{name}-{number}' for number in sorted(_shards(id_column, lastmod_column, filters)))
+    written = []
+    for name in names:
+        filename = 'sitemap.xml' if name == 'index' else f'sitemap-{name}.xml'
+        write_sitemap(name, os.path.join(directory, filename), base_url)
+        written.append(filename)
+    return written
@@ -0,0 +1,78 @@
+// PartyTicket Nigeria - Offline verification of signed ticket QR tokens
+//
+// Tokens look like "PT1.<ticket_id>.<event_id>.<issued_at>.<signature>", where the
+// signature is a truncated HMAC-SHA256 using the per-event key from the event's
+// verification bundle (/api/events/<id>/verification-bundle). Shared by the
+// offline verification page and the service worker.
+
+(function (scope) {
+  function base64UrlDecode(value) {
+    const base64 = value.replace(/-/g, '+').replace(/_/g, '/');
+    const padded = base64 + '='.repeat((4 - base64.length % 4) % 4);
+    const binary = atob(padded);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+      bytes[i] = binary.charCodeAt(i);
+    }
+    return bytes;
+  }
+
+  function base64UrlEncode(bytes) {
+    let binary = '';
+    bytes.forEach(byte => { binary += String.fromCharCode(byte); });
+    return btoa(binary).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+  }
+
+  function constantTimeEqual(a, b) {
+    if (a.length !== b.length) {
+      return false;
+    }
+    let diff = 0;
+    for (let i = 0; i < a.length; i++) {
+      diff |= a.charCodeAt(i) ^ b.charCodeAt(i);
+    }
+    return diff === 0;
+  }
+
+  // Build a verifier for one event's bundle. The HMAC key is imported once so
+  // each scan costs a single HMAC computation.
+  async function createVerifier(bundle) {
+    const key = await crypto.subtle.importKey(
+      'raw', base64UrlDecode(bundle.key), { name: 'HMAC', hash: 'SHA-256' }, false, ['sign']
+    );
+    const revoked = new Set(bundle.revoked);
+    const encoder = new TextEncoder();
+
+    async function verify(token) {
+      const parts = String(token).trim().split('.');
+      if (parts.length !== 5 || parts[0] !== bundle.token_prefix) {
+        return { valid: false, message: 'Invalid QR code format' };
+      }
+
+      const ticketId = Number(parts[1]);
+      const eventId = Number(parts[2]);
+      const issuedAt = Number(parts[3]);
+      if (!Number.isInteger(ticketId) || !Number.isInteger(eventId) || !Number.isInteger(issuedAt)) {
+        return { valid: false, message: 'Invalid QR code format' };
+      }
+      if (eventId !== bundle.event_id) {
+        return { valid: false, message: 'Ticket is for a different event' };
+      }
+
+      const mac = await crypto.subtle.sign('HMAC', key, encoder.encode(parts.slice(0, 4).join('.')));
+      const expected = base64UrlEncode(new Uint8Array(mac).slice(0, bundle.signature_bytes));
+      if (!constantTimeEqual(expected, parts[4])) {
+        return { valid: false, message: 'Invalid QR code signature' };
+      }
+      if (revoked.has(ticketId)) {
+        return { valid: false, message: 'Ticket has been revoked', ticketId };
+      }
+
+      return { valid: true, ticketId, eventId, issuedAt: new Date(issuedAt * 1000) };
+    }
+
+    return { bundle, verify };
+  }
+
+  scope.PartyTicketVerifier = { createVerifier };
+})(self);
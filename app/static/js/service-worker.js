@@ -1,10 +1,14 @@
 // PartyTicket Nigeria - Service Worker for Offline Functionality
 
-const CACHE_NAME = 'partyticket-v1';
+importScripts('/static/js/offline-verify.js');
+
+const CACHE_NAME = 'partyticket-v2';
+const BUNDLE_PATH = /^\/api\/events\/(\d+)\/verification-bundle$/;
 const urlsToCache = [
   '/',
   '/static/css/style.css',
   '/static/js/script.js',
+  '/static/js/offline-verify.js',
   '/static/images/logo.png',
   '/static/images/favicon.png',
   '/offline',
@@ -30,6 +34,21 @@ self.addEventListener('fetch', event => {
     return;
   }
   
+  // Verification bundles are fetched network-first so revocations stay fresh,
+  // falling back to the last cached bundle when the venue is offline
+  if (BUNDLE_PATH.test(new URL(event.request.url).pathname)) {
+    event.respondWith(
+      fetch(event.request).then(response => {
+        if (response.ok) {
+          const responseToCache = response.clone();
+          caches.open(CACHE_NAME).then(cache => cache.put(event.request, responseToCache));
+        }
+        return response;
+      }).catch(() => caches.match(event.request))
+    );
+    return;
+  }
+  
   event.respondWith(
     caches.match(event.request)
       .then(response => {
@@ -90,8 +109,37 @@ self.addEventListener('message', event => {
   if (event.data.action === 'skipWaiting') {
     self.skipWaiting();
   }
+  
+  // Requests from the offline verification page, answered on a MessageChannel
+  const handlers = {
+    verifyToken: data => verifyTokenOffline(data.eventId, data.token),
+    syncManifest: data => syncManifest(data.eventId),
+    recordScan: data => recordScan(data.eventId, data.ticketId),
+    uploadScans: () => uploadScans()
+  };
+  const handler = handlers[event.data.action];
+  if (handler && event.ports[0]) {
+    event.waitUntil(
+      handler(event.data)
+        .then(result => event.ports[0].postMessage(result))
+        .catch(error => event.ports[0].postMessage({ error: error.message }))
+    );
+  }
 });
 
+const verifiers = {};
+
+async function verifyTokenOffline(eventId, token) {
+  if (!verifiers[eventId]) {
+    const response = await caches.match(`/api/events/${eventId}/verification-bundle`);
+    if (!response) {
+      return { valid: false, message: 'No verification bundle cached for this event' };
+    }
+    verifiers[eventId] = await PartyTicketVerifier.createVerifier(await response.json());
+  }
+  return verifiers[eventId].verify(token);
+}
+
 // Push notification event
 self.addEventListener('push', event => {
   const title = 'PartyTicket Notification';
@@ -124,10 +172,170 @@ self.addEventListener('sync', event => {
       syncEvents()
     );
   }
+  
+  // Upload gate scans recorded while the venue was offline
+  if (event.tag === 'sync-scans') {
+    event.waitUntil(uploadScans());
+  }
 });
 
 // Function to sync events (placeholder)
 function syncEvents() {
   // This would contain logic to sync events when online
   return Promise.resolve();
-}
\ No newline at end of file
+}
+// Offline ticket manifests
+//
+// IndexedDB keeps, per event, the manifest version last synced ("manifests"),
+// the state of every ticket ("tickets") and scans not yet uploaded
+// ("pendingScans"). Manifests are fetched as deltas with ?since=<version>.
+
+const DB_NAME = 'partyticket';
+const DB_VERSION = 1;
+const SCAN_UPLOAD_BATCH = 500;
+
+function openDatabase() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(DB_NAME, DB_VERSION);
+    request.onupgradeneeded = () => {
+      const database = request.result;
+      database.createObjectStore('manifests', { keyPath: 'eventId' });
+      database.createObjectStore('tickets', { keyPath: ['eventId', 'ticketId'] });
+      database.createObjectStore('pendingScans', { keyPath: ['eventId', 'ticketId'] });
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function transactionDone(transaction) {
+  return new Promise((resolve, reject) => {
+    transaction.oncomplete = () => resolve();
+    transaction.onerror = () => reject(transaction.error);
+    transaction.onabort = () => reject(transaction.error);
+  });
+}
+
+function requestResult(request) {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function eventRange(eventId) {
+  return IDBKeyRange.bound([eventId, -Infinity], [eventId, Infinity]);
+}
+
+// Manifest ID lists are sorted and sent as the first ID followed by gaps
+function deltaDecode(encoded) {
+  let previous = 0;
+  return (encoded || []).map(gap => (previous += gap));
+}
+
+async function syncManifest(eventId) {
+  eventId = Number(eventId);
+  const database = await openDatabase();
+  const stored = await requestResult(
+    database.transaction('manifests').objectStore('manifests').get(eventId)
+  );
+  
+  const url = `/api/events/${eventId}/manifest` + (stored ? `?since=${stored.version}` : '');
+  const response = await fetch(url, { credentials: 'same-origin', cache: 'no-store' });
+  if (!response.ok) {
+    throw new Error(`Manifest sync failed: HTTP ${response.status}`);
+  }
+  const manifest = await response.json();
+  
+  const transaction = database.transaction(['manifests', 'tickets', 'pendingScans'], 'readwrite');
+  const tickets = transaction.objectStore('tickets');
+  if (manifest.full) {
+    tickets.delete(eventRange(eventId));
+  }
+  deltaDecode(manifest.valid).forEach(ticketId => tickets.put({ eventId, ticketId, state: 'valid' }));
+  deltaDecode(manifest.scanned).forEach(ticketId => tickets.put({ eventId, ticketId, state: 'scanned' }));
+  deltaDecode(manifest.invalid).forEach(ticketId => tickets.delete([eventId, ticketId]));
+  
+  // Scans made on this device but not uploaded yet stay scanned
+  transaction.objectStore('pendingScans').getAll(eventRange(eventId)).onsuccess = request => {
+    request.target.result.forEach(scan => tickets.put({ eventId, ticketId: scan.ticketId, state: 'scanned' }));
+  };
+  transaction.objectStore('manifests').put({ eventId, version: manifest.version, syncedAt: new Date().toISOString() });
+  await transactionDone(transaction);
+  
+  return { eventId, version: manifest.version, full: manifest.full };
+}
+
+async function recordScan(eventId, ticketId) {
+  eventId = Number(eventId);
+  ticketId = Number(ticketId);
+  const database = await openDatabase();
+  const transaction = database.transaction(['tickets', 'pendingScans'], 'readwrite');
+  const tickets = transaction.objectStore('tickets');
+  let status = 'unknown';
+  
+  // Read and update in one transaction so two scans of the same ticket on
+  // this device cannot both be admitted
+  tickets.get([eventId, ticketId]).onsuccess = request => {
+    const ticket = request.target.result;
+    if (!ticket) {
+      return;
+    }
+    if (ticket.state === 'scanned') {
+      status = 'already_scanned';
+      return;
+    }
+    status = 'admitted';
+    tickets.put({ eventId, ticketId, state: 'scanned' });
+    transaction.objectStore('pendingScans').put({ eventId, ticketId, scannedAt: new Date().toISOString() });
+  };
+  await transactionDone(transaction);
+  
+  if (status === 'admitted') {
+    uploadScans().catch(() => {
+      if (self.registration.sync) {
+        return self.registration.sync.register('sync-scans');
+      }
+    });
+  }
+  return { status };
+}
+
+async function uploadScans() {
+  const database = await openDatabase();
+  const pending = await requestResult(
+    database.transaction('pendingScans').objectStore('pendingScans').getAll()
+  );
+  
+  const byEvent = {};
+  pending.forEach(scan => {
+    (byEvent[scan.eventId] = byEvent[scan.eventId] || []).push(scan.ticketId);
+  });
+  
+  let uploaded = 0;
+  for (const eventId of Object.keys(byEvent)) {
+    const ticketIds = byEvent[eventId];
+    for (let i = 0; i < ticketIds.length; i += SCAN_UPLOAD_BATCH) {
+      const batch = ticketIds.slice(i, i + SCAN_UPLOAD_BATCH);
+      const response = await fetch(`/api/events/${eventId}/scans`, {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ ticket_ids: batch })
+      });
+      if (!response.ok) {
+        throw new Error(`Scan upload failed: HTTP ${response.status}`);
+      }
+      const result = await response.json();
+      if (result.rejected && result.rejected.length) {
+        console.warn(`Offline scans rejected by server for event ${eventId}:`, result.rejected);
+      }
+      
+      const transaction = database.transaction('pendingScans', 'readwrite');
+      batch.forEach(ticketId => transaction.objectStore('pendingScans').delete([Number(eventId), ticketId]));
+      await transactionDone(transaction);
+      uploaded += batch.length;
+    }
+  }
+  return { uploaded };
+}
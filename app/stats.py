@@ -0,0 +1,119 @@
+from app import db
+from app.models import EventStats, Ticket
+from app.milestones import record_sell_through
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+
+COUNTERS = ('tickets_sold', 'revenue', 'tickets_scanned')
+
+
+def _bump(event_id: int, **increments) -> int:
+    """Add to an event's counters, creating its row on first use. The caller commits.
+
+    Returns tickets_sold as this change left it, read back from the same
+    statement, so it reflects every sale committed before ours.
+    """
+    now = datetime.utcnow()
+    values = {name: getattr(EventStats, name) + amount for name, amount in increments.items()}
+    update = db.update(EventStats).where(EventStats.event_id == event_id) \
+        .values(updated_at=now, **values).returning(EventStats.tickets_sold) \
+        .execution_options(synchronize_session=False)
+    sold = db.session.execute(update).scalar()
+    if sold is not None:
+        return sold
+    try:
+        with db.session.begin_nested():
+            row = dict.fromkeys(COUNTERS, 0)
+            row.update(increments)
+            db.session.execute(db.insert(EventStats).values(event_id=event_id, updated_at=now, **row))
+            return row['tickets_sold']
+    except IntegrityError:
+        # Another transaction created the row first; its lock is released, so add to it
+        return db.session.execute(update).scalar()
+
+
+def record_sales(event_id: int, count: int, revenue: float) -> None:
+    """Count ``count`` newly paid tickets worth ``revenue`` towards an event. The caller commits.
+
+    Sell-through milestones the sale crosses are recorded with it.
+    """
+    if count:
+        sold = _bump(event_id, tickets_sold=count, revenue=revenue)
+        record_sell_through(event_id, sold - count, sold)
+
+
+def record_scans(counts: dict) -> None:
+    """Count newly admitted tickets, given as {event_id: count}. The caller commits."""
+    for event_id, count in counts.items():
+        if count:
+            _bump(event_id, tickets_scanned=count)
+
+
+def event_stats(event_ids) -> dict:
+    """Counters for the given events in one query, as {event_id: EventStats}.
+
+    Events with no sales yet are missing from the result; use
+    ``.get(event_id)`` and treat None as zero.
+    """
+    event_ids = list(event_ids)
+    if not event_ids:
+        return {}
+    return {stats.event_id: stats for stats in EventStats.query.filter(EventStats.event_id.in_(event_ids))}
+
+
+def tickets_sold(event_id: int) -> int:
+    """Paid tickets for one event, read from its counter row."""
+    return db.session.query(EventStats.tickets_sold).filter_by(event_id=event_id).scalar() or 0
+
+
+def _actual_stats(event_ids=None):
+    """Recount the counters from the ticket rows, as {event_id: (sold, revenue, scanned)}."""
+    paid = Ticket.payment_status == 'success'
+    query = db.session.query(
+        Ticket.event_id,
+        db.func.count(Ticket.id).filter(paid),
+        db.func.coalesce(db.func.sum(Ticket.amount_paid).filter(paid), 0.0),
+        db.func.count(Ticket.id).filter(paid, Ticket.is_scanned.is_(True))
+    ).group_by(Ticket.event_id)
+    if event_ids:
+        query = query.filter(Ticket.event_id.in_(event_ids))
+    return {event_id: (sold, float(revenue), scanned) for event_id, sold, revenue, scanned in query}
+
+
+def reconcile_event_stats(event_ids=None, dry_run=False) -> list[dict]:
+    """Recompute event counters from the ticket rows and fix any that drifted.
+
+    Locks the counter rows being checked so concurrent sales and scans wait
+    instead of being overwritten. Returns one entry per corrected event with
+    the stored and actual values. Commits unless ``dry_run`` is set.
+    """
+    stored_query = EventStats.query.with_for_update()
+    if event_ids:
+        stored_query = stored_query.filter(EventStats.event_id.in_(event_ids))
+    stored = {stats.event_id: stats for stats in stored_query}
+    actual = _actual_stats(event_ids)
+
+    drift = []
+    for event_id in sorted(set(stored) | set(actual)):
+        sold, revenue, scanned = actual.get(event_id, (0, 0.0, 0))
+        stats = stored.get(event_id)
+        current = (stats.tickets_sold, stats.revenue, stats.tickets_scanned) if stats else (0, 0.0, 0)
+        if current[0] == sold and abs(current[1] - revenue) < 0.005 and current[2] == scanned:
+            continue
+        drift.append({
+            'event_id': event_id,
+            'stored': dict(zip(COUNTERS, current)),
+            'actual': dict(zip(COUNTERS, (sold, revenue, scanned))),
+        })
+        if dry_run:
+            continue
+        if stats is None:
+            stats = EventStats(event_id=event_id)
+            db.session.add(stats)
+        stats.tickets_sold, stats.revenue, stats.tickets_scanned = sold, revenue, scanned
+
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    return drift
@@ -0,0 +1,84 @@
+from flask import current_app, render_template
+from flask_mail import Message
+from app import db
+from app.models import Transaction, Ticket, Event, User, SalesMilestone
+from app.jobs import job
+from app.email_utils import build_organizer_notification
+from app.email_render import render_ticket_confirmation
+from app.mailer import send_mail
+from datetime import datetime
+
+
+@job('send_ticket_confirmation', batch_mail=True)
+def send_ticket_confirmation(reference: str) -> None:
+    """Email the buyer their tickets for a successful payment.
+
+    Errors propagate so the job queue retries the send.
+    """
+    transaction = Transaction.query.filter_by(reference=reference).first()
+    if not transaction:
+        raise LookupError(f'Transaction {reference} not found')
+
+    user = db.session.get(User, transaction.user_id)
+    event = db.session.get(Event, transaction.event_id)
+    tickets = Ticket.query.filter_by(paystack_ref=reference, payment_status='success') \
+        .order_by(Ticket.id).all()
+    if not user or not user.email or not event or not tickets:
+        return
+
+    msg, metrics = render_ticket_confirmation(user, event, tickets)
+    send_mail(msg)
+    current_app.logger.info(
+        f"Ticket confirmation email rendered for {user.email} "
+        f"(in {metrics['render_ms']:.1f}ms, {metrics['html_bytes']} bytes HTML "
+        f"+ {metrics['images']} QR images, {metrics['inline_bytes']} bytes)")
+
+
+@job('notify_sell_through')
+def notify_sell_through(event_id: int, threshold: int) -> None:
+    """Email an event's organizer that it reached a sell-through milestone, once."""
+    milestone = db.session.get(SalesMilestone, (event_id, threshold))
+    if not milestone or milestone.notified_at:
+        return  # already sent by an earlier attempt that committed
+
+    msg = build_organizer_notification(milestone.event, milestone)
+    if msg:
+        send_mail(msg)
+    milestone.notified_at = datetime.utcnow()
+
+
+@job('notify_organizer')
+def notify_organizer(event_id: int) -> None:
+    """Drain jobs queued before milestones; organizers are now told by notify_sell_through."""
+
+
+@job('send_verification_email', batch_mail=True)
+def send_verification_email(user_id: int, verify_url: str) -> None:
+    """Email a new user the link that verifies their address."""
+    user = db.session.get(User, user_id)
+    if not user or not user.email or user.email_verified:
+        return
+
+    send_mail(Message(
+        'Verify Your Email - PartyTicket Nigeria',
+        recipients=[user.email],
+        html=render_template('emails/verify_email.html', user=user, verify_url=verify_url)
+    ))
+
+
+@job('send_password_reset_email', batch_mail=True)
+def send_password_reset_email(user_id: int, reset_url: str) -> None:
+    """Email a user their password reset link, unless it has been used or has expired."""
+    user = db.session.get(User, user_id)
+    if not user or not user.email or not user.password_reset_expires \
+            or user.password_reset_expires < datetime.utcnow():
+        return
+    # A newer request replaced the token this link carries
+    if not user.password_reset_token or not reset_url.endswith(user.password_reset_token):
+        return
+
+    send_mail(Message(
+        'Reset Your Password - PartyTicket Nigeria',
+        recipients=[user.email],
+        html=render_template('emails/reset_password.html', user=user, reset_url=reset_url)
+    ))
@@ -0,0 +1,359 @@
+from flask import current_app
+from app import db
+from app.models import Ticket, Event, User
+from app.qr_utils import TOKEN_PREFIX, verify_ticket_token
+from app.stats import record_sales, record_scans
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+
+def parse_qr_data(qr_data: str):
+    """Return (ticket_id, event_id) encoded in QR data, or None if the format is invalid.
+
+    QR data is either a signed token ("PT1.123.456.<issued>.<signature>") or,
+    while QR_ACCEPT_UNSIGNED is enabled, the legacy "ticket_id:123:event_id:456".
+    A signed token with a bad signature is treated as invalid. event_id is the
+    signed event, which the ticket must belong to; it is None for legacy data,
+    whose event cannot be trusted.
+    """
+    if str(qr_data).startswith(TOKEN_PREFIX + '.'):
+        verified = verify_ticket_token(qr_data)
+        return verified[:2] if verified else None
+
+    if not current_app.config.get('QR_ACCEPT_UNSIGNED', True):
+        return None
+    parts = str(qr_data).split(':')
+    if len(parts) >= 2 and parts[0] == 'ticket_id':
+        try:
+            return int(parts[1]), None
+        except ValueError:
+            return None
+    return None
+
+
+def check_ticket(ticket: Ticket, event: Event, event_id: int = None):
+    """Run the gate fraud checks for a ticket.
+
+    ``event_id`` is the event a signed QR code was issued for, if the ticket
+    was scanned from one. Returns a (verdict, status_code) tuple describing
+    why the ticket must be rejected, or None if the ticket may be admitted.
+    """
+    if not ticket:
+        return {'success': False, 'message': 'Ticket not found'}, 404
+
+    if event_id is not None and ticket.event_id != event_id:
+        # Signed with another event's key
+        return {'success': False, 'message': 'Invalid QR code for this ticket'}, 400
+
+    if ticket.payment_status != 'success':
+        return {
+            'success': False,
+            'message': 'Ticket payment not verified',
+            'payment_status': ticket.payment_status
+        }, 400
+
+    if ticket.is_scanned or ticket.used_at:
+        return {
+            'success': False,
+            'message': 'Ticket already used',
+            'used_at': ticket.used_at.isoformat() if ticket.used_at else None
+        }, 400
+
+    if not event:
+        return {'success': False, 'message': 'Event not found'}, 404
+
+    return None
+
+
+def _redeemable():
+    """SQL condition matching tickets that may still be admitted."""
+    return db.and_(
+        Ticket.is_scanned.isnot(True),
+        Ticket.used_at.is_(None),
+        Ticket.payment_status == 'success',
+        db.exists().where(Event.id == Ticket.event_id)
+    )
+
+
+def redeem_ticket(ticket_id: int, event_id: int = None):
+    """Atomically mark a ticket used with a single conditional UPDATE.
+
+    The UPDATE only matches a paid, unscanned ticket, so when two scanners
+    race for the same ticket exactly one of them sees an affected row. When
+    ``event_id`` is given (the event a signed QR code names), a ticket of any
+    other event is not matched either. Returns the ``used_at`` timestamp if
+    this call admitted the ticket, or None if it was rejected. The caller
+    commits.
+    """
+    used_at = datetime.utcnow()
+    conditions = [Ticket.id == ticket_id, _redeemable()]
+    if event_id is not None:
+        conditions.append(Ticket.event_id == event_id)
+    admitted_event_id = db.session.execute(
+        db.update(Ticket)
+        .where(*conditions)
+        .values(is_scanned=True, used_at=used_at, updated_at=used_at)
+        .returning(Ticket.event_id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if admitted_event_id is None:
+        return None
+    record_scans({admitted_event_id: 1})
+    return used_at
+
+
+def redeem_tickets(ticket_ids) -> dict:
+    """Atomically admit a set of tickets with one conditional UPDATE.
+
+    Returns a mapping of admitted ticket ID to ``used_at``. Tickets missing
+    from the result were not redeemable, e.g. because another scanner
+    admitted them first. The caller commits.
+    """
+    if not ticket_ids:
+        return {}
+    used_at = datetime.utcnow()
+    result = db.session.execute(
+        db.update(Ticket)
+        .where(Ticket.id.in_(ticket_ids), _redeemable())
+        .values(is_scanned=True, used_at=used_at, updated_at=used_at)
+        .returning(Ticket.id, Ticket.event_id)
+        .execution_options(synchronize_session=False)
+    )
+    admitted = result.all()
+    record_scans(Counter(event_id for _, event_id in admitted))
+    return {ticket_id: used_at for ticket_id, _ in admitted}
+
+
+def issue_tickets(event_id: int, user_id: int, quantity: int, amount_paid: float,
+                  reference: str = None, payment_status: str = 'pending', tier_id: int = None) -> list[int]:
+    """Create ``quantity`` tickets with one bulk INSERT ... RETURNING.
+
+    Returns the new ticket IDs in order, so callers never re-query the
+    tickets they just created. Tickets issued as already paid are counted
+    in the event's stats. The caller commits.
+    """
+    if quantity < 1:
+        return []
+    now = datetime.utcnow()
+    row = {
+        'event_id': event_id,
+        'user_id': user_id,
+        'tier_id': tier_id,
+        'paystack_ref': reference,
+        'payment_status': payment_status,
+        'amount_paid': amount_paid,
+        'is_scanned': False,
+        'date_purchased': now,
+        'updated_at': now,
+    }
+    result = db.session.execute(
+        db.insert(Ticket).returning(Ticket.id, sort_by_parameter_order=True),
+        [dict(row) for _ in range(quantity)]
+    )
+    ticket_ids = list(result.scalars())
+    if payment_status == 'success':
+        record_sales(event_id, len(ticket_ids), (amount_paid or 0.0) * len(ticket_ids))
+    return ticket_ids
+
+
+def confirm_tickets(reference: str) -> int:
+    """Mark every ticket bought under a payment reference as paid.
+
+    Uses a single UPDATE, counts the newly paid tickets in their event's
+    stats and returns how many there were. Tickets already paid are left
+    alone, so a repeated confirmation counts nothing twice. The caller
+    commits.
+    """
+    result = db.session.execute(
+        db.update(Ticket)
+        .where(Ticket.paystack_ref == reference, Ticket.payment_status.is_distinct_from('success'))
+        .values(payment_status='success', updated_at=datetime.utcnow())
+        .returning(Ticket.event_id, Ticket.amount_paid)
+        .execution_options(synchronize_session=False)
+    )
+    sales = defaultdict(lambda: [0, 0.0])
+    for event_id, amount_paid in result:
+        sales[event_id][0] += 1
+        sales[event_id][1] += amount_paid or 0.0
+    for event_id, (count, revenue) in sales.items():
+        record_sales(event_id, count, revenue)
+    return sum(count for count, _ in sales.values())
+
+
+def _resolve_item(item):
+    """Resolve one batch item to (ticket_id, signed event_id, error_verdict)."""
+    if not isinstance(item, dict):
+        item = {'ticket_id': item}
+
+    ticket_id = item.get('ticket_id')
+    qr_data = item.get('qr_data')
+
+    if not ticket_id and not qr_data:
+        return None, None, ({'success': False, 'message': 'Missing ticket ID or QR data'}, 400)
+
+    if ticket_id:
+        try:
+            return int(ticket_id), None, None
+        except (TypeError, ValueError):
+            return None, None, ({'success': False, 'message': 'Ticket not found'}, 404)
+
+    parsed = parse_qr_data(qr_data)
+    if parsed is None:
+        return None, None, ({'success': False, 'message': 'Invalid QR code format'}, 400)
+    return (*parsed, None)
+
+
+def verify_tickets_batch(items: list) -> list[dict]:
+    """Verify and admit many tickets in one round trip.
+
+    Each item is either a ticket ID or a dict with ``ticket_id`` or
+    ``qr_data``. All referenced tickets are loaded with a single query
+    (joined with their event and holder) and valid tickets are admitted with
+    one conditional UPDATE in a single transaction. Returns one verdict per
+    item, in order, carrying the same messages as ``/api/verify_ticket``.
+    """
+    resolved = [_resolve_item(item) for item in items]
+    ticket_ids = {ticket_id for ticket_id, _, _ in resolved if ticket_id is not None}
+
+    rows = {}
+    if ticket_ids:
+        query = db.session.query(Ticket, Event, User.username) \
+            .outerjoin(Event, Event.id == Ticket.event_id) \
+            .outerjoin(User, User.id == Ticket.user_id) \
+            .filter(Ticket.id.in_(ticket_ids))
+        rows = {ticket.id: (ticket, event, username) for ticket, event, username in query}
+
+    results = [None] * len(resolved)
+    candidates = {}
+    duplicates = []
+    for index, (ticket_id, event_id, error) in enumerate(resolved):
+        if error is None:
+            ticket, event, username = rows.get(ticket_id, (None, None, None))
+            error = check_ticket(ticket, event, event_id)
+
+        if error is not None:
+            verdict, status_code = error
+            results[index] = dict(verdict, index=index, status_code=status_code)
+        elif ticket_id in candidates:
+            duplicates.append((index, ticket_id))
+        else:
+            candidates[ticket_id] = index
+
+    admitted = redeem_tickets(list(candidates))
+    db.session.commit()
+
+    # Tickets scanned twice in one batch, or admitted by another scanner
+    # after they were read, are reported as already used
+    lost = [(index, ticket_id) for ticket_id, index in candidates.items() if ticket_id not in admitted]
+    used_at_by_id = dict(admitted)
+    if lost:
+        used_at_by_id.update(
+            db.session.query(Ticket.id, Ticket.used_at).filter(Ticket.id.in_([ticket_id for _, ticket_id in lost]))
+        )
+    for index, ticket_id in lost + duplicates:
+        used_at = used_at_by_id.get(ticket_id)
+        results[index] = {
+            'index': index,
+            'status_code': 400,
+            'success': False,
+            'message': 'Ticket already used',
+            'used_at': used_at.isoformat() if used_at else None
+        }
+
+    for ticket_id, index in candidates.items():
+        if ticket_id not in admitted:
+            continue
+        ticket, event, username = rows[ticket_id]
+        results[index] = {
+            'index': index,
+            'status_code': 200,
+            'success': True,
+            'message': 'Ticket verified successfully',
+            'ticket_id': ticket_id,
+            'event_name': event.name,
+            'user_name': username,
+            'verified_at': admitted[ticket_id].isoformat()
+        }
+
+    return results
+
+
+def _delta_encode(ids):
+    """Encode a sorted list of IDs as the first ID followed by gaps."""
+    encoded, previous = [], 0
+    for ticket_id in ids:
+        encoded.append(ticket_id - previous)
+        previous = ticket_id
+    return encoded
+
+
+def build_event_manifest(event_id: int, since: int = None) -> dict:
+    """Build the compact ticket manifest scanner devices keep offline.
+
+    The manifest lists admissible (``valid``) and already ``scanned`` ticket
+    IDs, each sorted and delta encoded (first ID, then gaps) so a 10k ticket
+    event serialises to a few kilobytes. ``version`` is a millisecond
+    timestamp; passing it back as ``since`` returns only tickets changed
+    after it, plus ``invalid`` IDs that are no longer admissible. Deltas
+    overlap by MANIFEST_DELTA_OVERLAP seconds so rows committed late are
+    never missed; applying a change twice is harmless. Raises ValueError
+    for a ``since`` that is negative or too large to be a date.
+    """
+    now = datetime.utcnow()
+    query = db.session.query(Ticket.id, Ticket.payment_status, Ticket.is_scanned, Ticket.used_at) \
+        .filter(Ticket.event_id == event_id)
+
+    if since is not None:
+        overlap = current_app.config.get('MANIFEST_DELTA_OVERLAP', 5)
+        if since < 0:
+            raise ValueError(f'Invalid manifest version {since}')
+        try:
+            changed_after = datetime.utcfromtimestamp(since / 1000) - timedelta(seconds=overlap)
+        except (OverflowError, OSError) as e:
+            raise ValueError(f'Invalid manifest version {since}') from e
+        query = query.filter(Ticket.updated_at > changed_after)
+    else:
+        query = query.filter(Ticket.payment_status == 'success')
+
+    valid, scanned, invalid = [], [], []
+    for ticket_id, payment_status, is_scanned, used_at in query.order_by(Ticket.id):
+        if payment_status != 'success':
+            invalid.append(ticket_id)
+        elif is_scanned or used_at:
+            scanned.append(ticket_id)
+        else:
+            valid.append(ticket_id)
+
+    manifest = {
+        'event_id': event_id,
+        'version': int((now - datetime(1970, 1, 1)).total_seconds() * 1000),
+        'full': since is None,
+        'valid': _delta_encode(valid),
+        'scanned': _delta_encode(scanned),
+    }
+    if since is not None:
+        manifest['invalid'] = _delta_encode(invalid)
+    return manifest
+
+
+def record_offline_scans(event_id: int, ticket_ids) -> dict:
+    """Record scans made by an offline device once it reconnects.
+
+    Admits the tickets with the same conditional UPDATE as online scans and
+    reports which ones were rejected, e.g. because another device had
+    already admitted them.
+    """
+    ticket_ids = {int(ticket_id) for ticket_id in ticket_ids}
+    known = {
+        ticket_id for (ticket_id,) in
+        db.session.query(Ticket.id).filter(Ticket.event_id == event_id, Ticket.id.in_(ticket_ids))
+    } if ticket_ids else set()
+
+    admitted = redeem_tickets(list(known))
+    db.session.commit()
+
+    return {
+        'recorded': sorted(admitted),
+        'rejected': sorted(known - set(admitted)),
+        'unknown': sorted(ticket_ids - known),
+    }
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Checkout throughput benchmark for PartyTicket Nigeria, run offline against
+benchmarks/stub_gateway.py.
+
+Compares bare requests.post calls (a new connection, and with --tls a new
+TLS handshake, per call) with the pooled keep-alive client in app.gateway,
+then drives /payment/paystack/initialize end to end and prints the
+per-provider latency metrics the client collected.
+
+Usage:
+    python benchmarks/bench_checkout.py --calls 1000 --threads 8 --latency-ms 20
+    python benchmarks/bench_checkout.py --tls
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_gateway import start_stub
+
+
+def make_certificate(tmpdir):
+    """Create a self-signed certificate for 127.0.0.1 with openssl."""
+    certfile = os.path.join(tmpdir, 'cert.pem')
+    keyfile = os.path.join(tmpdir, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-keyout', keyfile, '-out', certfile, '-subj', '/CN=127.0.0.1',
+         '-addext', 'subjectAltName=IP:127.0.0.1'],
+        check=True, capture_output=True
+    )
+    return certfile, keyfile
+
+
+def run_threads(total, threads, call):
+    """Run ``call(i)`` ``total`` times across threads; return calls per second."""
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            call(i)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=20, help='simulated gateway processing time')
+    parser.add_argument('--tls', action='store_true', help='serve the stub over HTTPS with a self-signed cert')
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    certfile = keyfile = None
+    if args.tls:
+        certfile, keyfile = make_certificate(tmpdir)
+        os.environ['REQUESTS_CA_BUNDLE'] = certfile
+    server, base_url = start_stub(latency_ms=args.latency_ms, certfile=certfile, keyfile=keyfile)
+
+    os.environ['PAYSTACK_BASE_URL'] = base_url + '/paystack'
+    os.environ['FLUTTERWAVE_BASE_URL'] = base_url + '/flutterwave'
+    os.environ['TEST_DATABASE_URL'] = args.database_url or 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+
+    import requests
+    from app import create_app, db
+    from app.gateway import gateway, gateway_metrics
+    from app.models import User, Event
+
+    app = create_app('testing')
+    print(f'stub: {base_url}  latency={args.latency_ms}ms  calls={args.calls}  threads={args.threads}')
+
+    payload = {'email': 'bench@example.com', 'amount': 100000, 'reference': 'PT-bench'}
+    headers = {'Authorization': 'Bearer sk_bench', 'Content-Type': 'application/json'}
+    url = base_url + '/paystack/transaction/initialize'
+
+    def bare_call(i):
+        requests.post(url, headers=headers, json=payload, timeout=(3.05, 10)).raise_for_status()
+
+    rate = run_threads(args.calls, args.threads, bare_call)
+    print(f'{"bare requests.post":>24}: {rate:8.0f} calls/s')
+
+    with app.app_context():
+        client = gateway('paystack')
+
+    def pooled_call(i):
+        client.post('/transaction/initialize', json=payload).raise_for_status()
+
+    rate = run_threads(args.calls, args.threads, pooled_call)
+    print(f'{"pooled GatewayClient":>24}: {rate:8.0f} calls/s')
+
+    # End-to-end checkout through the Flask route
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.flush()
+        event = Event(name='Bench Event', description='Benchmark', date=datetime.utcnow() + timedelta(days=1),
+                      location='Lagos', price=1000, category='concert', organizer_id=user.id)
+        db.session.add(event)
+        db.session.commit()
+        user_id, event_id = user.id, event.id
+
+    local = threading.local()
+
+    def checkout(i):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+            with local.client.session_transaction() as session:
+                session['_user_id'] = str(user_id)
+                session['_fresh'] = True
+        response = local.client.post('/payment/paystack/initialize', json={'event_id': event_id, 'quantity': 1})
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    checkouts = max(args.calls // 4, 1)
+    rate = run_threads(checkouts, args.threads, checkout)
+    print(f'{"checkout (route)":>24}: {rate:8.0f} checkouts/s')
+
+    with app.app_context():
+        for provider, metrics in gateway_metrics().items():
+            print(f'{provider}: {metrics}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Organizer earnings concurrency benchmark for PartyTicket Nigeria.
+
+Credits many payments to one organizer from several threads at once, as
+during a big ticket drop, and compares the previous read-modify-write of
+the user.earnings float with app.earnings' append-only ledger. A
+snapshot thread folds the ledger into balances throughout the ledger run.
+
+Both runs report throughput, failed payments, and the final balance
+against the exact total. The legacy path loses updates, or with SQLite
+fails payments on lock upgrades. The ledger total must match to the kobo.
+
+Usage:
+    python benchmarks/bench_earnings.py --payments 2000 --threads 16
+    python benchmarks/bench_earnings.py --database-url postgresql://localhost/partyticket_bench
+"""
+
+import argparse
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def legacy_credit(db, organizer_id, amount, index):
+    """Previous behaviour: organizer.earnings += organizer_amount on the user row."""
+    earnings = db.session.execute(db.text('SELECT earnings FROM "user" WHERE id = :id'),
+                                  {'id': organizer_id}).scalar() or 0.0
+    db.session.execute(db.text('UPDATE "user" SET earnings = :earnings WHERE id = :id'),
+                       {'earnings': earnings + amount, 'id': organizer_id})
+    db.session.commit()
+
+
+def ledger_credit(db, organizer_id, amount, index):
+    from app.earnings import credit
+    credit(organizer_id, amount, 'ticket_sale', f'bench-{index}')
+    db.session.commit()
+
+
+def seed(app, db):
+    from app.models import User
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        # The model no longer maps user.earnings; databases migrated from before the ledger still have it
+        with db.engine.begin() as connection:
+            if 'earnings' not in {column['name'] for column in db.inspect(connection).get_columns('user')}:
+                connection.execute(db.text('ALTER TABLE "user" ADD COLUMN earnings FLOAT DEFAULT 0.0'))
+        organizer = User(username='organizer', email='organizer@example.com')
+        organizer.set_password('bench')
+        db.session.add(organizer)
+        db.session.commit()
+        return organizer.id
+
+
+def run(app, db, credit, organizer_id, amounts, threads, snapshots=False):
+    work = queue.Queue()
+    for index, amount in enumerate(amounts):
+        work.put((index, amount))
+    errors = Counter()
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def worker():
+        with app.app_context():
+            while True:
+                try:
+                    index, amount = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    credit(db, organizer_id, amount, index)
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors[type(e).__name__] += 1
+
+    def snapshotter():
+        from app.earnings import snapshot_earnings
+        with app.app_context():
+            while not done.is_set():
+                try:
+                    snapshot_earnings(lag=0)
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors[f'snapshot {type(e).__name__}'] += 1
+                time.sleep(0.01)
+
+    background = threading.Thread(target=snapshotter) if snapshots else None
+    if background:
+        background.start()
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    if background:
+        background.join()
+    return elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payments', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        args.database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    from app.earnings import balance, to_kobo, snapshot_earnings
+    app = create_app('testing')
+
+    rng = random.Random(1)
+    # Organizer shares after fees, e.g. 4850.00 for a 5000 ticket
+    amounts = [round(rng.choice([1000, 2500, 5000, 10000]) * 0.97, 2) for _ in range(args.payments)]
+    expected = sum(to_kobo(amount) for amount in amounts)
+    print(f'database: {args.database_url}')
+    print(f'payments={args.payments} threads={args.threads} expected total=₦{expected / 100:,.2f}')
+
+    organizer_id = seed(app, db)
+    elapsed, errors = run(app, db, legacy_credit, organizer_id, amounts, args.threads)
+    with app.app_context():
+        total = db.session.execute(db.text('SELECT earnings FROM "user" WHERE id = :id'),
+                                   {'id': organizer_id}).scalar()
+    print(f"{'user.earnings +=':>18}: {args.payments / elapsed:7.0f} payments/s  failed={sum(errors.values())}  "
+          f"total=₦{total:,.2f}  off by ₦{(expected - to_kobo(total)) / 100:,.2f}")
+
+    organizer_id = seed(app, db)
+    elapsed, errors = run(app, db, ledger_credit, organizer_id, amounts, args.threads, snapshots=True)
+    with app.app_context():
+        live = balance(organizer_id)
+        snapshot_earnings(lag=0)
+        folded = balance(organizer_id)
+    print(f"{'earnings ledger':>18}: {args.payments / elapsed:7.0f} payments/s  failed={sum(errors.values())}  "
+          f"total=₦{live / 100:,.2f}  off by ₦{(expected - live) / 100:,.2f}  "
+          f"(after a final snapshot ₦{folded / 100:,.2f})")
+    if errors:
+        print(f'  errors: {dict(errors)}')
+    if live != expected or folded != expected:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
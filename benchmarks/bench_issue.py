@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Ticket issuance benchmark for PartyTicket Nigeria.
+
+Compares the previous per-ticket ORM loop (add each Ticket, flush, then
+re-query by reference) with the bulk INSERT ... RETURNING in
+app.ticket_utils.issue_tickets, across purchase quantities.
+
+Usage:
+    python benchmarks/bench_issue.py --quantities 1 10 50 200 500 --repeat 20
+    python benchmarks/bench_issue.py --database-url postgresql://localhost/partyticket_bench
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def legacy_issue(db, Ticket, event, user_id, quantity, reference):
+    """Previous behaviour: one ORM object per ticket, then re-read them."""
+    for i in range(quantity):
+        db.session.add(Ticket(
+            event_id=event.id,
+            user_id=user_id,
+            paystack_ref=reference,
+            payment_status='pending',
+            amount_paid=event.price,
+            date_purchased=datetime.utcnow()
+        ))
+    db.session.flush()
+    return [ticket.id for ticket in Ticket.query.filter_by(paystack_ref=reference).all()]
+
+
+def bulk_issue(db, Ticket, event, user_id, quantity, reference):
+    from app.ticket_utils import issue_tickets
+    return issue_tickets(event.id, user_id, quantity, event.price, reference=reference)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantities', type=int, nargs='+', default=[1, 10, 50, 100, 200, 500])
+    parser.add_argument('--repeat', type=int, default=20, help='purchases per quantity')
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        args.database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    from app.models import User, Event, Ticket
+    app = create_app('testing')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.flush()
+        event = Event(name='Bench Event', description='Benchmark', date=datetime.utcnow() + timedelta(days=1),
+                      location='Lagos', price=1000, category='concert', organizer_id=user.id)
+        db.session.add(event)
+        db.session.commit()
+        user_id, event_id = user.id, event.id
+
+        print(f'database: {args.database_url}  purchases per quantity: {args.repeat}')
+        print(f'{"quantity":>8}  {"ORM loop + re-query":>20}  {"bulk INSERT":>12}  {"speedup":>8}')
+        purchase = 0
+        for quantity in args.quantities:
+            timings = {}
+            for name, issue in (('legacy', legacy_issue), ('bulk', bulk_issue)):
+                started = time.perf_counter()
+                for _ in range(args.repeat):
+                    purchase += 1
+                    event = db.session.get(Event, event_id)
+                    ids = issue(db, Ticket, event, user_id, quantity, f'PT-bench-{purchase}')
+                    assert len(ids) == quantity
+                    db.session.commit()
+                    db.session.expunge_all()
+                timings[name] = (time.perf_counter() - started) / args.repeat * 1000
+            print(f'{quantity:>8}  {timings["legacy"]:>17.2f} ms  {timings["bulk"]:>9.2f} ms  '
+                  f'{timings["legacy"] / timings["bulk"]:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
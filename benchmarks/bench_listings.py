@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Listing page benchmark for PartyTicket Nigeria.
+
+Seeds events with long descriptions and blog posts with long content, then
+renders the listing pages twice: once with every deferred column forced
+back on (the previous eager behaviour) and once with the listing
+projections from app.queries. Reports the column bytes loaded into the ORM,
+the number of SQL statements and the median render time for each page.
+
+Usage:
+    python benchmarks/bench_listings.py --events 2000 --posts 200 --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+PAGES = ['/', '/events', '/events/category/concert', '/search?q=Lagos', '/blog', '/admin/blog']
+CATEGORIES = ['formal', 'campus', 'street', 'concert', 'festival', 'general']
+
+
+def seed(db, events, posts):
+    from app.models import User, Event, BlogPost
+    user = User(username='bench', email='bench@example.com')
+    user.set_password('bench')
+    db.session.add(user)
+    db.session.flush()
+    now = datetime.utcnow()
+    db.session.add_all([
+        Event(name=f'Event {i}', description=f'Event {i} in Lagos. ' + 'Great music and food. ' * 150,
+              date=now + timedelta(hours=i), location='Lagos, Nigeria', price=5000,
+              category=CATEGORIES[i % len(CATEGORIES)], organizer_id=user.id)
+        for i in range(events)
+    ])
+    db.session.add_all([
+        BlogPost(title=f'Post {i}', excerpt='Planning tips for your next party.',
+                 content='<p>' + 'Event planning advice. ' * 500 + '</p>', slug=f'post-{i}',
+                 author_id=user.id, category='campus', published=True, date_posted=now - timedelta(hours=i))
+        for i in range(posts)
+    ])
+    db.session.commit()
+    return user.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ['TEST_DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    from sqlalchemy import event as sa_event
+    from sqlalchemy.orm import Session, undefer
+    from app import create_app, db
+
+    app = create_app('testing')
+    stats = {'bytes': 0, 'queries': 0}
+    mode = {'eager': False}
+
+    @sa_event.listens_for(Session, 'do_orm_execute')
+    def force_eager(orm_execute_state):
+        # Emulate the previous behaviour: every column loaded by every query
+        if mode['eager'] and orm_execute_state.is_select:
+            orm_execute_state.statement = orm_execute_state.statement.options(undefer('*'))
+
+    @sa_event.listens_for(db.Model, 'load', propagate=True)
+    def count_bytes(target, context):
+        stats['bytes'] += sum(len(str(value)) for key, value in vars(target).items()
+                              if not key.startswith('_') and value is not None)
+
+    with app.app_context():
+        user_id = seed(db, args.events, args.posts)
+        engine = db.engine
+
+    @sa_event.listens_for(engine, 'before_cursor_execute')
+    def count_queries(*_):
+        stats['queries'] += 1
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+    print(f'events={args.events} posts={args.posts} runs={args.runs}')
+    print(f"{'page':<28}{'mode':<12}{'queries':>8}{'KB loaded':>12}{'median ms':>12}")
+    for page in PAGES:
+        for label, eager in (('eager', True), ('projected', False)):
+            mode['eager'] = eager
+            timings = []
+            for _ in range(args.runs):
+                stats.update(bytes=0, queries=0)
+                started = time.perf_counter()
+                response = client.get(page)
+                timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, (page, response.status_code)
+            print(f"{page:<28}{label:<12}{stats['queries']:>8}{stats['bytes'] / 1024:>12.1f}"
+                  f"{statistics.median(timings):>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+"""
+Email delivery benchmark for PartyTicket Nigeria.
+
+Sends ticket confirmation emails to a local SMTP sink, comparing the
+previous mail.send() per message (a new connection, EHLO and QUIT each
+time) with app.mailer's dispatcher, which keeps one connection open.
+Messages are built before timing starts, so only delivery is measured.
+
+The sink is aiosmtpd (pip install aiosmtpd) when installed; otherwise a
+minimal threaded SMTP sink from the standard library is used. With
+--fail-every N the sink answers every Nth message with a 451, to
+exercise the dispatcher's retries.
+
+Usage:
+    python benchmarks/bench_mail.py --emails 10000
+    python benchmarks/bench_mail.py --emails 2000 --fail-every 100
+"""
+
+import argparse
+import multiprocessing
+import os
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class Sink:
+    """Counts delivered messages; every ``fail_every``th DATA gets a transient 451.
+
+    The counters are shared memory, since the sink runs in its own process
+    so it does not compete with the sender for the GIL.
+    """
+
+    def __init__(self, fail_every=0):
+        self.fail_every = fail_every
+        self.received = multiprocessing.Value('i', 0)
+        self.attempts = multiprocessing.Value('i', 0)
+        self.connections = multiprocessing.Value('i', 0)
+
+    def reset(self):
+        for counter in (self.received, self.attempts, self.connections):
+            counter.value = 0
+
+    def connected(self):
+        with self.connections.get_lock():
+            self.connections.value += 1
+
+    def accept(self):
+        with self.attempts.get_lock():
+            self.attempts.value += 1
+            if self.fail_every and self.attempts.value % self.fail_every == 0:
+                return False
+        with self.received.get_lock():
+            self.received.value += 1
+        return True
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        sink = self.server.sink
+        sink.connected()
+        self.reply('220 sink ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.wfile.write(b'250-sink\r\n250 8BITMIME\r\n')
+            elif command in (b'HELO', b'MAIL', b'RCPT', b'RSET', b'NOOP'):
+                self.reply('250 OK')
+            elif command == b'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.reply('250 OK' if sink.accept() else '451 Try again later')
+            elif command == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Not implemented')
+
+
+def _serve(sink, port_sender):
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SinkHandler)
+        server.daemon_threads = True
+        server.sink = sink
+        port_sender.send(('standard library (pip install aiosmtpd to use aiosmtpd)', server.server_address[1]))
+        server.serve_forever()
+        return
+
+    class Handler:
+        async def handle_EHLO(self, server, session, envelope, hostname, responses):
+            sink.connected()
+            session.host_name = hostname
+            return responses
+
+        async def handle_DATA(self, server, session, envelope):
+            return '250 OK' if sink.accept() else '451 Try again later'
+
+    controller = Controller(Handler(), hostname='127.0.0.1', port=0)
+    controller.start()
+    port_sender.send(('aiosmtpd', controller.port))
+    threading.Event().wait()
+
+
+def start_sink(sink):
+    """Start an SMTP sink on a free local port in a child process; returns (port, stop function)."""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_serve, args=(sink, sender), daemon=True)
+    process.start()
+    kind, port = receiver.recv()
+    print(f'sink: {kind}')
+    return port, process.terminate
+
+
+def build_messages(app, db, count):
+    from app.models import User, Event, Ticket
+    from app.email_utils import build_ticket_confirmation_email
+    from app.email_render import render_stats
+    with app.app_context():
+        db.create_all()
+        organizer = User(username='organizer', email='organizer@example.com')
+        organizer.set_password('bench')
+        db.session.add(organizer)
+        db.session.flush()
+        event = Event(name='Bench Night', description='Benchmark event', location='Lagos, Nigeria',
+                      date=datetime.utcnow() + timedelta(days=7), price=5000.0, organizer_id=organizer.id)
+        db.session.add(event)
+        db.session.flush()
+        buyer = User(username='buyer', email='buyer@example.com')
+        buyer.set_password('bench')
+        db.session.add(buyer)
+        db.session.flush()
+        ticket = Ticket(event_id=event.id, user_id=buyer.id, payment_status='success', amount_paid=5000.0)
+        db.session.add(ticket)
+        db.session.commit()
+
+        started = time.perf_counter()
+        messages = [build_ticket_confirmation_email(buyer, event, [ticket]) for _ in range(count)]
+        elapsed = time.perf_counter() - started
+        size = len(messages[0].as_bytes())
+        stats = render_stats()
+    print(f'built {count} messages in {elapsed:.1f}s ({size / 1024:.1f} KiB each, '
+          f'{stats["avg_render_ms"]:.2f}ms mean render, {stats["fragment_hit_rate"]:.0%} event fragment hits)')
+    return messages
+
+
+def run(label, app, sink, send):
+    sink.reset()
+    with app.app_context():
+        started = time.perf_counter()
+        failed = send()
+        elapsed = time.perf_counter() - started
+    received, connections = sink.received.value, sink.connections.value
+    print(f'{label:<22} {received:>6} delivered  {failed:>4} failed  {connections:>6} connections  '
+          f'{elapsed:7.2f}s  {received / elapsed:8.0f} msg/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--emails', type=int, default=10000)
+    parser.add_argument('--fail-every', type=int, default=0, help='answer every Nth message with a 451')
+    parser.add_argument('--skip-legacy', action='store_true', help='only time the dispatcher')
+    args = parser.parse_args()
+
+    sink = Sink(args.fail_every)
+    port, stop = start_sink(sink)
+    os.environ.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=str(port), MAIL_USE_TLS='false',
+                      MAIL_DEFAULT_SENDER='tickets@partyticket.ng')
+    os.environ.setdefault('TEST_DATABASE_URL', 'sqlite://')
+
+    from app import create_app, db, mail
+    from app.mailer import MailDispatcher
+    app = create_app('testing')
+    app.config['MAIL_SUPPRESS_SEND'] = False  # testing suppresses delivery by default
+    app.config['SERVER_NAME'] = 'partyticket.ng'
+    mail.init_app(app)
+    messages = build_messages(app, db, args.emails)
+
+    if not args.skip_legacy:
+        def legacy():
+            failed = 0
+            for message in messages:
+                try:
+                    mail.send(message)
+                except Exception:
+                    failed += 1
+            return failed
+        run('mail.send per message', app, sink, legacy)
+
+    def pooled():
+        dispatcher = MailDispatcher(retries=3, backoff=0.01, idle_timeout=60)
+        failed = dispatcher.send_batch(messages)
+        dispatcher.close()
+        return len(failed)
+    run('pooled dispatcher', app, sink, pooled)
+    stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Listing pagination benchmark for PartyTicket Nigeria.
+
+Seeds synthetic events and times fetching page N of the event listing with
+LIMIT/OFFSET against the keyset (seek) pagination in app.pagination, walking
+the cursor chain to the same depth first. Keyset pages are served by the
+ix_event_date_id index.
+
+Usage:
+    python benchmarks/bench_pagination.py --events 500000
+    python benchmarks/bench_pagination.py --events 200000 --database-url postgresql://localhost/partyticket_bench
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DEPTHS = [1, 10, 100, 1000, 10000]
+
+
+def seed(app, db, count, chunk=50000):
+    from app.models import User, Event
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        start = datetime.utcnow()
+        for offset in range(0, count, chunk):
+            db.session.execute(db.insert(Event), [{
+                'name': f'Event {i}',
+                'description': f'Synthetic event {i}',
+                # Several events share each date so the id tiebreaker matters
+                'date': start + timedelta(minutes=i // 4),
+                'location': 'Lagos',
+                'price': 0.0,
+                'invitation_fee': 0.0,
+                'category': 'concert',
+                'organizer_id': user.id,
+                'date_created': start,
+            } for i in range(offset, min(offset + chunk, count))])
+            db.session.commit()
+
+
+def timed(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=500000)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5, help='runs per page; the best is reported')
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        args.database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    from app.models import Event
+    from app.queries import event_listing
+    from app.pagination import keyset_page
+    app = create_app('testing')
+
+    started = time.perf_counter()
+    seed(app, db, args.events)
+    print(f'database: {args.database_url}')
+    print(f'seeded {args.events} events in {time.perf_counter() - started:.0f}s')
+    print(f'{"page":>8}  {"OFFSET":>10}  {"keyset":>10}  same rows')
+
+    with app.app_context():
+        cursor, page_number = None, 1
+        for depth in DEPTHS:
+            if (depth - 1) * args.per_page >= args.events:
+                break
+            # Follow next_cursor up to the page being measured
+            while page_number < depth:
+                cursor = keyset_page(event_listing(), Event.date, Event.id, cursor, args.per_page)['next_cursor']
+                page_number += 1
+                db.session.expunge_all()
+
+            offset_query = event_listing().order_by(Event.date.desc(), Event.id.desc()) \
+                .limit(args.per_page).offset((depth - 1) * args.per_page)
+            offset_ms, offset_rows = timed(lambda: offset_query.all(), args.repeat)
+            keyset_ms, page = timed(lambda: keyset_page(event_listing(), Event.date, Event.id, cursor, args.per_page),
+                                    args.repeat)
+            same = [event.id for event in offset_rows] == [event.id for event in page['items']]
+            db.session.expunge_all()
+            print(f'{depth:>8}  {offset_ms:7.1f} ms  {keyset_ms:7.1f} ms  {same}')
+
+
+if __name__ == '__main__':
+    main()
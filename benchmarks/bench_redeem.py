@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+Gate redemption concurrency benchmark for PartyTicket Nigeria.
+
+Hammers ticket redemption from many threads, with every ticket scanned by
+several scanners at once, and compares the legacy read-check-write path
+against the conditional UPDATE in app.ticket_utils.redeem_ticket.
+
+Usage:
+    python benchmarks/bench_redeem.py --tickets 2000 --threads 16 --dupes 3
+    python benchmarks/bench_redeem.py --database-url postgresql://localhost/partyticket_bench
+"""
+
+import argparse
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def legacy_scan(db, Ticket, ticket_id):
+    """Previous verify_ticket behaviour: read, check in Python, then write."""
+    ticket = db.session.get(Ticket, ticket_id)
+    if not ticket or ticket.payment_status != 'success' or ticket.is_scanned or ticket.used_at:
+        db.session.rollback()
+        return False
+    ticket.mark_used()
+    db.session.commit()
+    return True
+
+
+def atomic_scan(db, Ticket, ticket_id):
+    """Conditional UPDATE redemption."""
+    from app.ticket_utils import redeem_ticket
+    admitted = redeem_ticket(ticket_id) is not None
+    db.session.commit()
+    return admitted
+
+
+def seed(app, db, tickets):
+    from app.models import User, Event, Ticket
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.flush()
+        event = Event(name='Bench Event', description='Benchmark', date=datetime.utcnow() + timedelta(days=1),
+                      location='Lagos', price=1000, category='concert', organizer_id=user.id)
+        db.session.add(event)
+        db.session.flush()
+        db.session.add_all([
+            Ticket(event_id=event.id, user_id=user.id, payment_status='success', amount_paid=1000)
+            for _ in range(tickets)
+        ])
+        db.session.commit()
+        return [ticket_id for (ticket_id,) in db.session.query(Ticket.id)]
+
+
+def run(app, db, scan, ticket_ids, threads, dupes):
+    from app.models import Ticket
+    work = queue.Queue()
+    scans = ticket_ids * dupes
+    random.shuffle(scans)
+    for ticket_id in scans:
+        work.put(ticket_id)
+
+    admissions = Counter()
+    errors = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        with app.app_context():
+            while True:
+                try:
+                    ticket_id = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    admitted = scan(db, Ticket, ticket_id)
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors[type(e).__name__] += 1
+                    continue
+                if admitted:
+                    with lock:
+                        admissions[ticket_id] += 1
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'scans': len(scans),
+        'seconds': elapsed,
+        'scans_per_sec': len(scans) / elapsed,
+        'admitted': sum(admissions.values()),
+        'double_admissions': sum(count - 1 for count in admissions.values() if count > 1),
+        'errors': dict(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--dupes', type=int, default=3, help='concurrent scans per ticket')
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    if not args.database_url:
+        tmpdir = tempfile.mkdtemp()
+        args.database_url = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    app = create_app('testing')
+
+    print(f'database: {args.database_url}')
+    print(f'tickets={args.tickets} threads={args.threads} scans/ticket={args.dupes}')
+    for name, scan in (('read-check-write', legacy_scan), ('conditional UPDATE', atomic_scan)):
+        ticket_ids = seed(app, db, args.tickets)
+        result = run(app, db, scan, ticket_ids, args.threads, args.dupes)
+        print(f"{name:>20}: {result['scans_per_sec']:8.0f} scans/s  "
+              f"admitted={result['admitted']}  double={result['double_admissions']}  "
+              f"errors={result['errors'] or 0}")
+
+
+if __name__ == '__main__':
+    main()
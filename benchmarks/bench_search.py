@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Event search benchmark for PartyTicket Nigeria.
+
+Seeds synthetic events (1M by default) and compares the previous search,
+three LIKE '%q%' scans returning every match, with the full-text index in
+app.search.find_events returning one ranked page, for common, rare,
+prefix, misspelt and category-filtered queries.
+
+Usage:
+    python benchmarks/bench_search.py --events 1000000
+    python benchmarks/bench_search.py --events 200000 --database-url postgresql://localhost/partyticket_bench
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+CITIES = ['Lagos', 'Abuja', 'Ibadan', 'Port Harcourt', 'Enugu', 'Kano', 'Benin City', 'Calabar', 'Jos', 'Owerri',
+          'Uyo', 'Abeokuta', 'Ilorin', 'Akure', 'Warri', 'Kaduna', 'Asaba', 'Onitsha', 'Makurdi', 'Osogbo']
+KINDS = {
+    'concert': ['Afrobeats Concert', 'Highlife Live', 'Gospel Praise Night', 'Fuji Jam', 'Amapiano Takeover'],
+    'campus': ['Freshers Party', 'Campus Rave', 'Faculty Dinner', 'Sports Week Bash', 'Pool Party'],
+    'street': ['Block Party', 'Street Carnival', 'Owambe', 'Rooftop Sundowner', 'Zanku Street Jam'],
+    'formal': ['Wedding Reception', 'Corporate Gala', 'Award Night', 'Charity Dinner', 'Tech Summit'],
+    'festival': ['Cultural Festival', 'Food Festival', 'Art Festival', 'New Yam Festival', 'Masquerade Festival'],
+    'general': ['Comedy Show', 'Movie Night', 'Game Night', 'Book Launch', 'Networking Mixer'],
+}
+ADJECTIVES = ['grand', 'annual', 'exclusive', 'vibrant', 'unforgettable', 'epic', 'intimate', 'legendary']
+
+QUERIES = [
+    ('common term', 'lagos', None),
+    ('rare term', 'masquerade', None),
+    ('prefix', 'afrob', None),
+    ('two terms', 'comedy abuja', None),
+    ('category filter', 'festival', 'festival'),
+    ('misspelt', 'amapiono', None),
+]
+
+
+def seed(app, db, count, chunk=50000):
+    from app.models import User, Event
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        random.seed(42)
+        start = datetime.utcnow()
+        categories = list(KINDS)
+        for offset in range(0, count, chunk):
+            rows = []
+            for i in range(offset, min(offset + chunk, count)):
+                category = random.choice(categories)
+                city = random.choice(CITIES)
+                title = random.choice(KINDS[category])
+                rows.append({
+                    'name': f'{title} {city} {2024 + i % 3}',
+                    'description': (f'An {random.choice(ADJECTIVES)} {title.lower()} in {city}. '
+                                    f'Join us for a {random.choice(ADJECTIVES)} night, event code E{i}.'),
+                    'date': start + timedelta(minutes=i),
+                    'location': f'{random.choice(["Hall", "Arena", "Garden", "Centre"])} {i % 500}, {city}',
+                    'price': float(random.choice([0, 2000, 5000, 10000])),
+                    'invitation_fee': 0.0,
+                    'category': category,
+                    'organizer_id': user.id,
+                    'date_created': start,
+                })
+            db.session.execute(db.insert(Event), rows)
+            db.session.commit()
+
+
+def legacy_search(db, Event, q, category):
+    """Previous /search behaviour: LIKE scans over three columns, all rows returned."""
+    from app.queries import event_listing
+    condition = db.or_(Event.name.contains(q), Event.description.contains(q), Event.location.contains(q))
+    if category:
+        condition = db.and_(Event.category == category, condition)
+    return event_listing().filter(condition).order_by(Event.date.desc()).all()
+
+
+def timed(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per query; the best is reported')
+    parser.add_argument('--skip-legacy', action='store_true', help='only time the full-text search')
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        args.database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    from app.models import Event
+    from app.search import find_events
+    app = create_app('testing')
+
+    started = time.perf_counter()
+    seed(app, db, args.events)
+    print(f'database: {args.database_url}')
+    print(f'seeded {args.events} events in {time.perf_counter() - started:.0f}s')
+    print(f'{"query":>16}  {"LIKE scan (all rows)":>24}  {"full-text (page 1)":>22}  note')
+
+    with app.app_context():
+        for label, q, category in QUERIES:
+            if args.skip_legacy:
+                legacy = '-'
+            else:
+                elapsed, rows = timed(lambda: legacy_search(db, Event, q, category), args.repeat)
+                legacy = f'{elapsed:8.1f} ms {len(rows):>8} rows'
+                db.session.expunge_all()
+            elapsed, result = timed(lambda: find_events(q, category), args.repeat)
+            db.session.expunge_all()
+            note = f'suggested "{result["suggestion"]}"' if result['suggestion'] else ''
+            print(f'{label:>16}  {legacy:>24}  {elapsed:8.1f} ms {len(result["events"]):>4} rows  {note}')
+
+
+if __name__ == '__main__':
+    main()
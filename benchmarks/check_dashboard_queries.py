@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Dashboard query count check for PartyTicket Nigeria.
+
+Renders /dashboard for users holding very different numbers of tickets,
+events and invitations and counts the SQL statements each request runs.
+The dashboard eager loads everything it shows, so the count must be the
+same for every user; a lazy load added to the template or loader shows up
+as a count that grows with the rows.
+
+Exits non-zero if the counts differ, so it can run in CI after template
+or query changes.
+
+Usage:
+    python benchmarks/check_dashboard_queries.py
+    python benchmarks/check_dashboard_queries.py --sizes 0 1 25 400
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+CATEGORIES = ['formal', 'campus', 'street', 'concert', 'festival', 'general']
+
+
+def seed_user(db, index, size):
+    """A user organizing ``size`` events (at least one) and holding ``size`` tickets and invitations.
+
+    The tickets are for another organizer's events, so the user's own
+    events loaded by the dashboard cannot satisfy lazy loads from the
+    session's identity map and hide them.
+    """
+    from app.models import User, Event, Ticket, Invitation
+    from app.stats import record_sales
+    user, organizer = User(username=f'holder{index}', email=f'holder{index}@example.com'), \
+        User(username=f'organizer{index}', email=f'organizer{index}@example.com')
+    user.set_password('check')
+    organizer.set_password('check')
+    db.session.add_all([user, organizer])
+    db.session.flush()
+
+    start = datetime.utcnow()
+
+    def events_for(owner, count):
+        events = [Event(name=f'Event {owner.username}-{i}', description='Check event', location='Lagos, Nigeria',
+                        date=start + timedelta(days=i - count // 2), price=1000.0,
+                        category=CATEGORIES[i % len(CATEGORIES)], organizer_id=owner.id)
+                  for i in range(count)]
+        db.session.add_all(events)
+        db.session.flush()
+        return events
+
+    own_events = events_for(user, max(size, 1))
+    other_events = events_for(organizer, max(size, 1))
+    for event in own_events:
+        record_sales(event.id, 1, 1000.0)
+    for i in range(size):
+        event = other_events[i]
+        db.session.add(Ticket(event_id=event.id, user_id=user.id, payment_status='success', amount_paid=1000.0,
+                              is_scanned=i % 3 == 0, date_purchased=start - timedelta(minutes=i)))
+        db.session.add(Invitation(event_id=event.id, user_id=user.id, max_attendees=2))
+    db.session.commit()
+    return user.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 1, 10, 200])
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        args.database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'dashboard.db')
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        users = [(size, seed_user(db, index, size)) for index, size in enumerate(args.sizes)]
+        engine = db.engine
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db.event.listen(engine, 'before_cursor_execute', count)
+    counts = {}
+    # Requests run outside an app context so each one gets its own g (and logged in user)
+    for size, user_id in users:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        statements.clear()
+        response = client.get('/dashboard')
+        if response.status_code != 200:
+            print(f'{size:>5} tickets: /dashboard returned {response.status_code}')
+            sys.exit(1)
+        counts[size] = len(statements)
+        print(f'{size:>5} tickets: {counts[size]} queries')
+    db.event.remove(engine, 'before_cursor_execute', count)
+
+    if len(set(counts.values())) > 1:
+        print('query count grows with the number of tickets; something is lazy loaded')
+        sys.exit(1)
+    print('query count is constant')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Query plan regression check for PartyTicket Nigeria.
+
+Requests the hot listing, dashboard and token routes with a test client,
+records every SELECT they run, and asks the database for its plan. A
+query that filters or sorts on an indexed table but still reads the whole
+table (SQLite "SCAN <table>" with no index, Postgres "Seq Scan" with
+enable_seqscan off) is reported.
+
+Exits non-zero if any route falls back to a full table scan, so it can
+run in CI after schema or query changes.
+
+Usage:
+    python benchmarks/check_query_plans.py
+    python benchmarks/check_query_plans.py --database-url postgresql://localhost/partyticket_bench
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+CHECKED_TABLES = {'event', 'ticket', 'invitation', 'blog_post', 'user'}
+
+# (label, url, logged in)
+ROUTES = [
+    ('home', '/', False),
+    ('events', '/events', False),
+    ('events by category', '/events/category/concert', False),
+    ('search, no query', '/search', False),
+    ('search, category only', '/search?category=festival', False),
+    ('blog', '/blog', False),
+    ('events api', '/api/events?category=concert&limit=10', False),
+    ('blog api', '/api/blog/posts?category=tips&limit=10', False),
+    ('dashboard', '/dashboard', True),
+    ('profile', '/profile/{user_id}', True),
+    ('admin blog', '/admin/blog', True),
+    ('admin dashboard', '/admin-dashboard', True),
+    ('admin metrics api', '/api/admin/metrics?days=30', True),
+    ('verify email', '/verify-email/verify-token', False),
+    ('reset password', '/reset-password/reset-token', False),
+]
+
+
+def seed(app, db, events=2000):
+    from app.models import User, Event, Ticket, Invitation, BlogPost
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        users = []
+        for i in range(50):
+            user = User(username=f'user{i}', email=f'user{i}@example.com')
+            user.set_password('check')
+            users.append(user)
+        db.session.add_all(users)
+        db.session.flush()
+        users[1].email_verification_token = 'verify-token'
+        users[2].password_reset_token = 'reset-token'
+        users[2].password_reset_expires = datetime.utcnow() + timedelta(hours=1)
+
+        start = datetime.utcnow()
+        categories = ['formal', 'campus', 'street', 'concert', 'festival', 'general']
+        db.session.execute(db.insert(Event), [{
+            'name': f'Event {i}', 'description': f'Event number {i}', 'location': 'Lagos',
+            'date': start + timedelta(hours=i), 'price': 1000.0, 'invitation_fee': 0.0,
+            'category': categories[i % len(categories)], 'organizer_id': users[i % len(users)].id,
+            'date_created': start,
+        } for i in range(events)])
+        event_ids = [event_id for (event_id,) in db.session.query(Event.id)]
+        db.session.execute(db.insert(Ticket), [{
+            'event_id': event_ids[i % len(event_ids)], 'user_id': users[i % len(users)].id,
+            'payment_status': 'success', 'amount_paid': 1000.0, 'date_purchased': start, 'updated_at': start,
+        } for i in range(events * 2)])
+        db.session.execute(db.insert(Invitation), [{
+            'event_id': event_ids[i % len(event_ids)], 'user_id': users[i % len(users)].id,
+            'max_attendees': 2, 'date_created': start,
+        } for i in range(events // 2)])
+        db.session.execute(db.insert(BlogPost), [{
+            'title': f'Post {i}', 'excerpt': 'Excerpt', 'content': 'Content', 'slug': f'post-{i}',
+            'author_id': users[0].id, 'category': 'tips' if i % 2 else 'news', 'published': i % 4 != 0,
+            'views': i, 'date_posted': start - timedelta(hours=i),
+        } for i in range(events // 4)])
+        db.session.commit()
+        return users[0].id
+
+
+def full_scans(connection, statement, parameters):
+    """Tables in CHECKED_TABLES that the plan for ``statement`` reads in full."""
+    if connection.dialect.name == 'postgresql':
+        (plan,) = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters).one()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        scans, nodes = [], [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in CHECKED_TABLES:
+                scans.append(node['Relation Name'])
+            nodes.extend(node.get('Plans', []))
+        return scans
+
+    scans = []
+    for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters):
+        match = re.match(r'SCAN (?:TABLE )?"?(\w+)"?(?: AS \w+)?$', row[-1])
+        if match and match.group(1) in CHECKED_TABLES:
+            scans.append(match.group(1))
+    return scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--verbose', action='store_true', help='print every checked query')
+    args = parser.parse_args()
+
+    if not args.database_url:
+        args.database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'plans.db')
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    app = create_app('testing')
+    user_id = seed(app, db, args.events)
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as connection:
+            connection.exec_driver_sql('ANALYZE')
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # Whole-table aggregates (e.g. admin totals) have no filter or sort an index could serve
+        if statement.lstrip().upper().startswith('SELECT') and re.search(r'\b(WHERE|ORDER BY)\b', statement):
+            captured.append((statement, parameters))
+
+    db.event.listen(engine, 'before_cursor_execute', capture)
+    failures = 0
+    # Requests run outside an app context so each one gets its own g (and logged in user)
+    for label, url, logged_in in ROUTES:
+        client = app.test_client()
+        if logged_in:
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user_id)
+                session['_fresh'] = True
+        captured.clear()
+        try:
+            status_code = client.get(url.format(user_id=user_id)).status_code
+        except Exception as e:
+            # A broken template should not hide the queries the view ran before rendering
+            status_code = type(e).__name__
+        statements = list(captured)
+
+        problems = []
+        with engine.connect() as connection:
+            if connection.dialect.name == 'postgresql':
+                connection.exec_driver_sql('SET enable_seqscan = off')
+            for statement, parameters in statements:
+                scans = full_scans(connection, statement, parameters)
+                if scans:
+                    problems.append((scans, statement))
+                elif args.verbose:
+                    print(f'    ok: {" ".join(statement.split())[:120]}')
+        status = 'FAIL' if problems else 'ok'
+        print(f'{status:>4}  {label:<24} {status_code}  {len(statements)} queries')
+        for scans, statement in problems:
+            print(f'        full scan of {", ".join(sorted(set(scans)))}: {" ".join(statement.split())[:160]}')
+        failures += len(problems)
+    db.event.remove(engine, 'before_cursor_execute', capture)
+
+    if failures:
+        print(f'{failures} queries fall back to a full table scan')
+        sys.exit(1)
+    print('no full table scans')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Sell-through milestone check for PartyTicket Nigeria.
+
+Sells tickets in random batch sizes to events of several capacities,
+through the same issue_tickets()/confirm_tickets() paths the payment
+routes use, and checks that:
+
+  * every threshold in SELL_THROUGH_THRESHOLDS is recorded exactly once
+    per event, and only after enough tickets were sold;
+  * exactly one notify_sell_through job is queued per sale that crosses
+    thresholds, and running the jobs emails each organizer once;
+  * no statement counts rows of the ticket table along the way.
+
+Exits non-zero on the first failure.
+
+Usage:
+    python benchmarks/check_sell_through.py
+    python benchmarks/check_sell_through.py --capacities 1 3 10 250 --seed 7
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+TICKET_COUNT = re.compile(r'count\(.*\bFROM ticket\b', re.IGNORECASE | re.DOTALL)
+
+
+def fail(message):
+    print(f'FAIL: {message}')
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--capacities', type=int, nargs='+', default=[1, 2, 3, 7, 10, 99, 250])
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        args.database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'sell_through.db')
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+    os.environ.setdefault('MAIL_DEFAULT_SENDER', 'tickets@partyticket.ng')
+    rng = random.Random(args.seed)
+
+    from app import create_app, db, mail
+    from app.models import User, Event, Ticket, Job, SalesMilestone
+    from app.milestones import tickets_needed
+    from app.ticket_utils import issue_tickets, confirm_tickets
+    from app.jobs import work_once
+    app = create_app('testing')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        thresholds = app.config['SELL_THROUGH_THRESHOLDS']
+        organizer, buyer = User(username='organizer', email='organizer@example.com'), \
+            User(username='buyer', email='buyer@example.com')
+        organizer.set_password('check')
+        buyer.set_password('check')
+        db.session.add_all([organizer, buyer])
+        db.session.flush()
+        events = [Event(name=f'Capacity {capacity}', description='Check event', location='Lagos, Nigeria',
+                        date=datetime.utcnow() + timedelta(days=7), price=1000.0, capacity=capacity,
+                        organizer_id=organizer.id) for capacity in args.capacities]
+        db.session.add_all(events)
+        db.session.commit()
+        events = [(event.id, event.capacity) for event in events]
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        db.event.listen(db.engine, 'before_cursor_execute', record)
+        expected_jobs = 0
+        for event_id, capacity in events:
+            sold = 0
+            while sold < capacity + 2:  # a little past capacity, as an overrun would
+                quantity = rng.randint(1, max(1, capacity // 4))
+                before = sold
+                if rng.random() < 0.5:
+                    issue_tickets(event_id, buyer.id, quantity, 1000.0, payment_status='success')
+                else:
+                    reference = f'ref-{event_id}-{sold}'
+                    issue_tickets(event_id, buyer.id, quantity, 1000.0, reference=reference)
+                    confirm_tickets(reference)
+                    confirm_tickets(reference)  # a repeated confirmation must not count twice
+                db.session.commit()
+                sold += quantity
+                if any(before < tickets_needed(capacity, threshold) <= sold for threshold in thresholds):
+                    expected_jobs += 1
+        db.event.remove(db.engine, 'before_cursor_execute', record)
+
+        counts = [statement for statement in statements if TICKET_COUNT.search(statement)]
+        if counts:
+            fail(f'ticket rows were counted: {counts[0]}')
+
+        for event_id, capacity in events:
+            fired = {milestone.threshold: milestone for milestone in SalesMilestone.query.filter_by(event_id=event_id)}
+            if set(fired) != set(thresholds):
+                fail(f'capacity {capacity}: recorded {sorted(fired)}, expected {sorted(thresholds)}')
+            for threshold, milestone in fired.items():
+                if milestone.tickets_sold < tickets_needed(capacity, threshold):
+                    fail(f'capacity {capacity}: {threshold}% recorded at only {milestone.tickets_sold} sold')
+            sold = Ticket.query.filter_by(event_id=event_id, payment_status='success').count()
+            print(f'capacity {capacity:>4}: sold {sold:>4}, milestones '
+                  + ', '.join(f'{t}% at {fired[t].tickets_sold}' for t in sorted(fired)))
+
+        jobs = Job.query.filter_by(name='notify_sell_through').count()
+        if jobs != expected_jobs:
+            fail(f'{jobs} notification jobs queued, expected {expected_jobs}')
+
+        with mail.record_messages() as outbox:
+            while work_once(100):
+                pass
+            # Re-running a finished notification must not send it again
+            for job in Job.query.filter_by(name='notify_sell_through'):
+                job.status = 'queued'
+            db.session.commit()
+            while work_once(100):
+                pass
+        if len(outbox) != expected_jobs:
+            fail(f'{len(outbox)} organizer emails sent, expected {expected_jobs}')
+        print(f'{jobs} notifications queued and sent once each; no ticket COUNTs in {len(statements)} statements')
+
+
+if __name__ == '__main__':
+    main()
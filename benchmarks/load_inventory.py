@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+"""
+Inventory oversell load test for PartyTicket Nigeria.
+
+Simulates a hot ticket drop: many threads run concurrent checkouts against
+one capacity-limited event through app.inventory, paying for some and
+abandoning the rest. Abandoned holds are then expired and a second wave
+buys the released stock. After each phase the test checks that:
+
+  * held + sold never exceeds capacity,
+  * sold equals the tickets actually paid for and marked 'success',
+  * held equals the tickets in checkouts that are still open,
+  * the event's sales counters (app.stats) match the paid tickets.
+
+Exits non-zero if any check fails.
+
+Usage:
+    python benchmarks/load_inventory.py --capacity 1000 --checkouts 5000 --threads 32
+    python benchmarks/load_inventory.py --database-url postgresql://localhost/partyticket_bench
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def seed(app, db, capacity):
+    from app.models import User, Event
+    from app.inventory import default_tier
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        users = []
+        for i in range(50):
+            user = User(username=f'buyer{i}', email=f'buyer{i}@example.com')
+            user.set_password('bench')
+            users.append(user)
+        db.session.add_all(users)
+        db.session.flush()
+        event = Event(name='Hot Drop', description='Benchmark', date=datetime.utcnow() + timedelta(days=7),
+                      location='Lagos', price=5000, category='concert', organizer_id=users[0].id,
+                      capacity=capacity)
+        db.session.add(event)
+        db.session.flush()
+        tier = default_tier(event)
+        db.session.commit()
+        return event.id, tier.id, [user.id for user in users]
+
+
+def checkout_wave(app, db, event_id, tier_id, user_ids, checkouts, threads, pay_rate, wave):
+    """Run concurrent checkouts; returns (stats, {reference: quantity} of abandoned holds)."""
+    from app.models import TicketTier
+    from app.inventory import reserve_tickets, convert_hold
+    from app.ticket_utils import issue_tickets, confirm_tickets
+
+    counter = iter(range(checkouts))
+    lock = threading.Lock()
+    stats = Counter()
+    abandoned = {}
+
+    def worker():
+        with app.app_context():
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                reference = f'PT-LOAD-{wave}-{i}'
+                quantity = random.randint(1, 4)
+                user_id = random.choice(user_ids)
+                try:
+                    tier = db.session.get(TicketTier, tier_id)
+                    if tier.available < quantity and not tier.held:
+                        db.session.rollback()
+                        with lock:
+                            stats['sold_out'] += 1
+                        continue
+                    issue_tickets(event_id, user_id, quantity, tier.price, reference=reference, tier_id=tier_id)
+                    if reserve_tickets(tier, quantity, user_id, reference) is None:
+                        db.session.rollback()
+                        with lock:
+                            stats['sold_out'] += 1
+                        continue
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        stats[f'error:{type(e).__name__}'] += 1
+                    continue
+
+                if random.random() < pay_rate:
+                    # Payment webhook
+                    try:
+                        confirm_tickets(reference)
+                        convert_hold(reference)
+                        db.session.commit()
+                        with lock:
+                            stats['paid'] += 1
+                            stats['tickets_paid'] += quantity
+                    except Exception as e:
+                        db.session.rollback()
+                        with lock:
+                            stats[f'error:{type(e).__name__}'] += 1
+                            abandoned[reference] = quantity
+                else:
+                    with lock:
+                        stats['abandoned'] += 1
+                        abandoned[reference] = quantity
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    stats['seconds'] = time.perf_counter() - started
+    return stats, abandoned
+
+
+def check(app, db, tier_id, capacity, open_holds):
+    """Verify inventory invariants; returns a list of failures."""
+    from app.models import Ticket, TicketTier
+    from app.stats import reconcile_event_stats
+    with app.app_context():
+        tier = db.session.get(TicketTier, tier_id)
+        paid = db.session.query(db.func.count(Ticket.id)) \
+            .filter(Ticket.tier_id == tier_id, Ticket.payment_status == 'success').scalar()
+        print(f'    capacity={capacity} sold={tier.sold} held={tier.held} paid_tickets={paid} '
+              f'open_holds={sum(open_holds.values())}')
+        failures = []
+        if tier.held + tier.sold > capacity:
+            failures.append(f'oversold: held+sold={tier.held + tier.sold} > capacity={capacity}')
+        if tier.sold != paid:
+            failures.append(f'sold={tier.sold} but {paid} tickets are paid')
+        if tier.held != sum(open_holds.values()):
+            failures.append(f'held={tier.held} but open holds total {sum(open_holds.values())}')
+        for drift in reconcile_event_stats([tier.event_id], dry_run=True):
+            failures.append(f"event stats drifted: stored {drift['stored']} actual {drift['actual']}")
+        return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--capacity', type=int, default=1000)
+    parser.add_argument('--checkouts', type=int, default=5000, help='checkouts per wave')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--pay-rate', type=float, default=0.6, help='fraction of held checkouts that pay')
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        args.database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['TEST_DATABASE_URL'] = args.database_url
+
+    from app import create_app, db
+    from app.inventory import expire_holds
+    app = create_app('testing')
+
+    event_id, tier_id, user_ids = seed(app, db, args.capacity)
+    print(f'database: {args.database_url}')
+    print(f'capacity={args.capacity} checkouts/wave={args.checkouts} threads={args.threads} pay_rate={args.pay_rate}')
+
+    failures = []
+    open_holds = {}
+    for wave in (1, 2):
+        stats, abandoned = checkout_wave(app, db, event_id, tier_id, user_ids, args.checkouts,
+                                         args.threads, args.pay_rate, wave)
+        open_holds.update(abandoned)
+        errors = {key: value for key, value in stats.items() if key.startswith('error:')}
+        print(f'wave {wave}: {args.checkouts / stats["seconds"]:7.0f} checkouts/s  paid={stats["paid"]} '
+              f'abandoned={stats["abandoned"]} sold_out={stats["sold_out"]} errors={errors or 0}')
+        failures += check(app, db, tier_id, args.capacity, open_holds)
+
+        # Abandoned checkouts time out and their stock goes back on sale
+        with app.app_context():
+            expired = 0
+            while True:
+                batch = expire_holds(now=datetime.utcnow() + timedelta(days=1))
+                db.session.commit()
+                if not batch:
+                    break
+                expired += batch
+        print(f'    expired {expired} abandoned holds')
+        open_holds.clear()
+        failures += check(app, db, tier_id, args.capacity, open_holds)
+
+    if failures:
+        print('FAILED:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+    print('OK: no oversell')
+
+
+if __name__ == '__main__':
+    main()
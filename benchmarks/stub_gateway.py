@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Local stub of the Paystack and Flutterwave APIs for offline benchmarking.
+
+Serves the endpoints PartyTicket calls with canned successful responses,
+an optional artificial latency and an optional rate of 503 failures. Keeps
+connections alive (HTTP/1.1) and can serve TLS, so handshake costs are
+comparable to the real gateways.
+
+Point the app at it with:
+    PAYSTACK_BASE_URL=http://127.0.0.1:8765/paystack
+    FLUTTERWAVE_BASE_URL=http://127.0.0.1:8765/flutterwave
+
+Usage:
+    python benchmarks/stub_gateway.py --port 8765 --latency-ms 50
+    python benchmarks/stub_gateway.py --certfile cert.pem --keyfile key.pem
+"""
+
+import argparse
+import json
+import random
+import re
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+    def _delay_or_fail(self):
+        server = self.server
+        if server.latency_ms:
+            time.sleep(server.latency_ms / 1000)
+        if server.fail_rate and random.random() < server.fail_rate:
+            self._send(503, {'status': False, 'message': 'Service unavailable'})
+            return True
+        return False
+
+    def do_POST(self):
+        body = self._read_json()
+        if self._delay_or_fail():
+            return
+        if self.path == '/paystack/transaction/initialize':
+            reference = body.get('reference')
+            self._send(200, {'status': True, 'data': {
+                'authorization_url': f'https://checkout.example/{reference}',
+                'access_code': f'ac_{reference}',
+                'reference': reference
+            }})
+        elif self.path == '/flutterwave/payments':
+            self._send(200, {'status': 'success', 'data': {'link': f"https://checkout.example/{body.get('tx_ref')}"}})
+        else:
+            self._send(404, {'status': False, 'message': 'Not found'})
+
+    def do_GET(self):
+        if self._delay_or_fail():
+            return
+        match = re.fullmatch(r'/paystack/transaction/verify/(.+)', self.path)
+        if match:
+            self._send(200, {'status': True, 'data': {'status': 'success', 'reference': match.group(1), 'amount': 100000}})
+            return
+        match = re.fullmatch(r'/flutterwave/transactions/(.+)/verify', self.path)
+        if match:
+            self._send(200, {'status': 'success', 'data': {
+                'id': match.group(1), 'status': 'successful', 'tx_ref': match.group(1), 'amount': 1000
+            }})
+            return
+        self._send(404, {'status': False, 'message': 'Not found'})
+
+
+class StubGatewayServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default of 5 drops SYNs when many clients connect at once
+
+
+def start_stub(host='127.0.0.1', port=0, latency_ms=0, fail_rate=0.0, certfile=None, keyfile=None):
+    """Start the stub in a background thread and return (server, base_url)."""
+    server = StubGatewayServer((host, port), StubGatewayHandler)
+    server.latency_ms = latency_ms
+    server.fail_rate = fail_rate
+    scheme = 'http'
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = 'https'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'{scheme}://{host}:{server.server_address[1]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of calls answered with 503')
+    parser.add_argument('--certfile', default=None)
+    parser.add_argument('--keyfile', default=None)
+    args = parser.parse_args()
+
+    server, base_url = start_stub(args.host, args.port, args.latency_ms, args.fail_rate, args.certfile, args.keyfile)
+    print(f'stub gateway listening on {base_url} (paystack: {base_url}/paystack, flutterwave: {base_url}/flutterwave)')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
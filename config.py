@@ -27,6 +27,16 @@ class Config:
     PAYSTACK_SECRET_KEY = os.environ.get('PAYSTACK_SECRET_KEY') or 'sk_test_your_paystack_secret_key'
     FLUTTERWAVE_PUBLIC_KEY = os.environ.get('FLUTTERWAVE_PUBLIC_KEY') or 'FLWPUBK-your_flutterwave_public_key'
     FLUTTERWAVE_SECRET_KEY = os.environ.get('FLUTTERWAVE_SECRET_KEY') or 'FLWSECK-your_flutterwave_secret_key'
+    PAYSTACK_BASE_URL = os.environ.get('PAYSTACK_BASE_URL', 'https://api.paystack.co')
+    FLUTTERWAVE_BASE_URL = os.environ.get('FLUTTERWAVE_BASE_URL', 'https://api.flutterwave.com/v3')
+    
+    # Payment gateway HTTP client
+    GATEWAY_CONNECT_TIMEOUT = float(os.environ.get('GATEWAY_CONNECT_TIMEOUT', 3.05))  # seconds
+    GATEWAY_READ_TIMEOUT = float(os.environ.get('GATEWAY_READ_TIMEOUT', 10))  # seconds
+    GATEWAY_MAX_RETRIES = int(os.environ.get('GATEWAY_MAX_RETRIES', 2))
+    GATEWAY_RETRY_BACKOFF = 0.3  # seconds, doubled after each retry
+    GATEWAY_POOL_SIZE = int(os.environ.get('GATEWAY_POOL_SIZE', 10))  # keep-alive connections per provider
+    GATEWAY_SLOW_CALL_MS = 2000  # log calls slower than this
     
     # Email (ticket confirmation, notifications)
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
@@ -35,13 +45,61 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
+    MAIL_MAX_EMAILS = int(os.environ['MAIL_MAX_EMAILS']) if os.environ.get('MAIL_MAX_EMAILS') else None  # per connection
+    MAIL_CONNECTION_IDLE_TIMEOUT = int(os.environ.get('MAIL_CONNECTION_IDLE_TIMEOUT', 60))  # seconds before reconnecting
+    MAIL_SEND_RETRIES = int(os.environ.get('MAIL_SEND_RETRIES', 3))
+    MAIL_RETRY_BACKOFF = 0.5  # seconds, doubled after each retry
+    EMAIL_FRAGMENT_CACHE_SIZE = int(os.environ.get('EMAIL_FRAGMENT_CACHE_SIZE', 256))  # rendered per-event blocks
+    EMAIL_FRAGMENT_CACHE_TTL = 3600  # seconds
     
     # Platform fee percentage (our share from each paid ticket)
     PLATFORM_FEE_PERCENT = float(os.environ.get('PLATFORM_FEE_PERCENT', 2.5))
     
+    # Gate scanning
+    GATE_BATCH_MAX_SIZE = int(os.environ.get('GATE_BATCH_MAX_SIZE', 500))
+    QR_SIGNING_KEY = os.environ.get('QR_SIGNING_KEY')  # defaults to SECRET_KEY
+    QR_ACCEPT_UNSIGNED = os.environ.get('QR_ACCEPT_UNSIGNED', 'true').lower() == 'true'
+    MANIFEST_DELTA_OVERLAP = 5  # seconds re-sent on each delta sync
+
+    # Inventory
+    INVENTORY_HOLD_TTL = int(os.environ.get('INVENTORY_HOLD_TTL', 900))  # seconds a checkout holds its tickets
+    REAPER_PENDING_AGE = int(os.environ.get('REAPER_PENDING_AGE', 86400))  # seconds before an unpaid checkout is reaped
+
+    # Background jobs
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 2))  # seconds between polls when idle
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+    JOB_BATCH_SIZE = int(os.environ.get('JOB_BATCH_SIZE', 50))  # jobs claimed per poll; their mail is sent as one batch
+    JOB_RETRY_BACKOFF = 30  # seconds, doubled after each failed attempt
+    JOB_LOCK_TIMEOUT = 600  # seconds before a running job is assumed abandoned
+    
     # Pagination
     POSTS_PER_PAGE = 10
     EVENTS_PER_PAGE = 20
+    EVENTS_PER_CATEGORY = 3  # events shown per category on /events
+    EVENT_LISTING_CACHE_TTL = int(os.environ.get('EVENT_LISTING_CACHE_TTL', 60))  # seconds; 0 disables
+    DASHBOARD_TICKETS_PER_PAGE = 20
+    
+    # Page cache for anonymous visitors: 'lru' (per process), 'redis' (shared) or 'null' (off)
+    PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND', 'lru')
+    PAGE_CACHE_URL = os.environ.get('PAGE_CACHE_URL') or os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 300))  # seconds
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 1024))
+    
+    # Sitemaps: a sitemapindex at /sitemap.xml over shards of at most SITEMAP_MAX_URLS URLs
+    SITEMAP_BASE_URL = os.environ.get('SITEMAP_BASE_URL', 'https://partyticket.ng')
+    SITEMAP_MAX_URLS = 50000  # protocol limit per file
+    SITEMAP_CACHE_DIR = os.environ.get('SITEMAP_CACHE_DIR')  # defaults to <instance path>/sitemaps
+    SITEMAP_CACHE_TTL = int(os.environ.get('SITEMAP_CACHE_TTL', 3600))  # seconds
+    
+    # Admin dashboard rollups
+    ADMIN_METRICS_MAX_AGE = int(os.environ.get('ADMIN_METRICS_MAX_AGE', 300))  # seconds before the dashboard refreshes them
+    METRICS_REFRESH_DAYS = int(os.environ.get('METRICS_REFRESH_DAYS', 3))  # trailing days recounted on each refresh
+    
+    # Organizer emails when an event sells this percentage of its capacity; each fires once per event
+    SELL_THROUGH_THRESHOLDS = (50, 80, 100)
+    
+    # Organizer earnings ledger; `flask snapshot-earnings` folds entries older than this into balances
+    EARNINGS_SNAPSHOT_LAG = int(os.environ.get('EARNINGS_SNAPSHOT_LAG', 300))  # seconds
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -54,6 +112,7 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite://'
+    PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND', 'null')
 
 class ProductionConfig(Config):
     """Production configuration."""
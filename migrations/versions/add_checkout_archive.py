@@ -0,0 +1,57 @@
+"""Add archive tables for reaped checkouts
+
+Revision ID: add_checkout_archive
+Revises: add_inventory
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_checkout_archive'
+down_revision: Union[str, None] = 'add_inventory'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ticket_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('tier_id', sa.Integer(), nullable=True),
+        sa.Column('paystack_ref', sa.String(length=255), nullable=True),
+        sa.Column('payment_status', sa.String(length=50), nullable=True),
+        sa.Column('amount_paid', sa.Float(), nullable=True),
+        sa.Column('date_purchased', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ticket_archive_event_id', 'ticket_archive', ['event_id'], unique=False)
+
+    op.create_table(
+        'transaction_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=True),
+        sa.Column('provider', sa.String(length=50), nullable=False),
+        sa.Column('reference', sa.String(length=255), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_transaction_archive_event_id', 'transaction_archive', ['event_id'], unique=False)
+    op.create_index('ix_transaction_archive_reference', 'transaction_archive', ['reference'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transaction_archive_reference', table_name='transaction_archive')
+    op.drop_index('ix_transaction_archive_event_id', table_name='transaction_archive')
+    op.drop_table('transaction_archive')
+    op.drop_index('ix_ticket_archive_event_id', table_name='ticket_archive')
+    op.drop_table('ticket_archive')
@@ -0,0 +1,65 @@
+"""Add daily metrics rollups for the admin dashboard
+
+Creates daily_metrics and indexes the timestamp each rollup is counted by,
+so a refresh reads only the days it recounts. The table fills on the
+first admin dashboard view; `flask refresh-metrics --full` builds it ahead
+of time.
+
+Revision ID: add_daily_metrics
+Revises: add_event_stats
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_daily_metrics'
+down_revision: Union[str, None] = 'add_event_stats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, column); must match app/models.py
+INDEXES = (
+    ('ix_user_date_registered', 'user', 'date_registered'),
+    ('ix_event_date_created', 'event', 'date_created'),
+    ('ix_ticket_date_purchased', 'ticket', 'date_purchased'),
+    ('ix_invitation_date_created', 'invitation', 'date_created'),
+    ('ix_transaction_created_at', 'transaction', 'created_at'),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_metrics',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('signups', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('events_created', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('tickets_sold', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('invitations', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('transactions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('gmv', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('platform_fees', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('day')
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, table, column in INDEXES:
+                op.create_index(name, table, [column], if_not_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, column in INDEXES:
+            op.create_index(name, table, [column], if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
+    op.drop_table('daily_metrics')
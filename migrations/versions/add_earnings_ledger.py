@@ -0,0 +1,67 @@
+"""Add the organizer earnings ledger
+
+Creates earnings_ledger (append-only entries in kobo) and
+earnings_snapshots (per-organizer balances over the entries up to an id).
+Each organizer's existing user.earnings becomes an opening_balance entry
+with a matching snapshot. user.earnings is no longer written but is kept
+for now; the downgrade writes the ledger totals back into it.
+
+Revision ID: add_earnings_ledger
+Revises: add_sales_milestones
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_earnings_ledger'
+down_revision: Union[str, None] = 'add_sales_milestones'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'earnings_ledger',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('organizer_id', sa.Integer(), nullable=False),
+        sa.Column('amount_kobo', sa.BigInteger(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('reference', sa.String(length=100), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organizer_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('kind', 'reference', name='uq_earnings_ledger_kind_reference')
+    )
+    op.create_index('ix_earnings_ledger_organizer_id', 'earnings_ledger', ['organizer_id', 'id'])
+    op.create_table(
+        'earnings_snapshots',
+        sa.Column('organizer_id', sa.Integer(), nullable=False),
+        sa.Column('balance_kobo', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('last_entry_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organizer_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('organizer_id')
+    )
+    op.execute(
+        "INSERT INTO earnings_ledger (organizer_id, amount_kobo, kind, reference, created_at) "
+        "SELECT id, CAST(ROUND(earnings * 100) AS BIGINT), 'opening_balance', CAST(id AS VARCHAR(100)), "
+        "CURRENT_TIMESTAMP FROM \"user\" WHERE earnings IS NOT NULL AND ROUND(earnings * 100) <> 0"
+    )
+    op.execute(
+        "INSERT INTO earnings_snapshots (organizer_id, balance_kobo, last_entry_id, updated_at) "
+        "SELECT organizer_id, SUM(amount_kobo), MAX(id), CURRENT_TIMESTAMP "
+        "FROM earnings_ledger GROUP BY organizer_id"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "UPDATE \"user\" SET earnings = (SELECT COALESCE(SUM(amount_kobo), 0) FROM earnings_ledger "
+        "WHERE earnings_ledger.organizer_id = \"user\".id) / 100.0"
+    )
+    op.drop_table('earnings_snapshots')
+    op.drop_index('ix_earnings_ledger_organizer_id', table_name='earnings_ledger')
+    op.drop_table('earnings_ledger')
@@ -0,0 +1,70 @@
+"""Add full-text search indexes for events
+
+Postgres gets a weighted tsvector GIN index plus pg_trgm indexes for typo
+tolerant matching; SQLite gets an FTS5 table kept in sync by triggers.
+
+Revision ID: add_event_search
+Revises: add_checkout_archive
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_event_search'
+down_revision: Union[str, None] = 'add_checkout_archive'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match app.search.pg_search_document()
+PG_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', event.name), 'A') || "
+    "setweight(to_tsvector('english', event.location), 'B') || "
+    "setweight(to_tsvector('english', event.description), 'C')"
+)
+
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS event_fts USING fts5("
+    "name, location, description, content='event', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS event_fts_vocab USING fts5vocab(event_fts, 'row')",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_ai AFTER INSERT ON event BEGIN "
+    "INSERT INTO event_fts(rowid, name, location, description) "
+    "VALUES (new.id, new.name, new.location, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_ad AFTER DELETE ON event BEGIN "
+    "INSERT INTO event_fts(event_fts, rowid, name, location, description) "
+    "VALUES ('delete', old.id, old.name, old.location, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS event_fts_au AFTER UPDATE OF name, location, description ON event BEGIN "
+    "INSERT INTO event_fts(event_fts, rowid, name, location, description) "
+    "VALUES ('delete', old.id, old.name, old.location, old.description); "
+    "INSERT INTO event_fts(rowid, name, location, description) "
+    "VALUES (new.id, new.name, new.location, new.description); END",
+    "INSERT INTO event_fts(event_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute(f'CREATE INDEX IF NOT EXISTS ix_event_search ON event USING GIN (({PG_SEARCH_DOCUMENT}))')
+        op.execute('CREATE INDEX IF NOT EXISTS ix_event_name_trgm ON event USING GIN (name gin_trgm_ops)')
+        op.execute('CREATE INDEX IF NOT EXISTS ix_event_location_trgm ON event USING GIN (location gin_trgm_ops)')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_event_location_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_event_name_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_event_search')
+    elif dialect == 'sqlite':
+        for trigger in ('event_fts_au', 'event_fts_ad', 'event_fts_ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS event_fts_vocab')
+        op.execute('DROP TABLE IF EXISTS event_fts')
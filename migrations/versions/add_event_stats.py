@@ -0,0 +1,42 @@
+"""Add per-event sales counters
+
+Creates event_stats and backfills it from the ticket table; afterwards
+`flask reconcile-stats` can check the counters against the tickets.
+
+Revision ID: add_event_stats
+Revises: add_query_indexes
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_event_stats'
+down_revision: Union[str, None] = 'add_query_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'event_stats',
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('tickets_sold', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('revenue', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('tickets_scanned', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['event_id'], ['event.id'], ),
+        sa.PrimaryKeyConstraint('event_id')
+    )
+    op.execute(
+        "INSERT INTO event_stats (event_id, tickets_sold, revenue, tickets_scanned, updated_at) "
+        "SELECT event_id, COUNT(id), COALESCE(SUM(amount_paid), 0), "
+        "SUM(CASE WHEN is_scanned THEN 1 ELSE 0 END), CURRENT_TIMESTAMP "
+        "FROM ticket WHERE payment_status = 'success' GROUP BY event_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('event_stats')
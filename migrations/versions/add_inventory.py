@@ -0,0 +1,72 @@
+"""Add event capacity, ticket tiers and inventory holds
+
+Revision ID: add_inventory
+Revises: add_webhook_event_ledger
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_inventory'
+down_revision: Union[str, None] = 'add_webhook_event_ledger'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('capacity', sa.Integer(), nullable=True))
+
+    op.create_table(
+        'ticket_tier',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('capacity', sa.Integer(), nullable=False),
+        sa.Column('held', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sold', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['event_id'], ['event.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('event_id', 'name', name='uq_ticket_tier_event_name')
+    )
+    op.create_index('ix_ticket_tier_event_id', 'ticket_tier', ['event_id'], unique=False)
+
+    op.create_table(
+        'inventory_hold',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tier_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('reference', sa.String(length=255), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['tier_id'], ['ticket_tier.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('reference')
+    )
+    op.create_index('ix_inventory_hold_status_expires', 'inventory_hold', ['status', 'expires_at'], unique=False)
+
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tier_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_ticket_tier_id', 'ticket_tier', ['tier_id'], ['id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_ticket_tier_id', type_='foreignkey')
+        batch_op.drop_column('tier_id')
+
+    op.drop_index('ix_inventory_hold_status_expires', table_name='inventory_hold')
+    op.drop_table('inventory_hold')
+    op.drop_index('ix_ticket_tier_event_id', table_name='ticket_tier')
+    op.drop_table('ticket_tier')
+
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.drop_column('capacity')
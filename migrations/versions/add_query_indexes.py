@@ -0,0 +1,61 @@
+"""Add composite and partial indexes for listing, dashboard and token queries
+
+On Postgres the indexes are built CONCURRENTLY so the tables stay writable
+while the migration runs.
+
+Revision ID: add_query_indexes
+Revises: add_event_search
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_query_indexes'
+down_revision: Union[str, None] = 'add_event_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, postgres predicate, sqlite predicate); must match app/models.py
+INDEXES = (
+    ('ix_event_date_id', 'event', ['date', 'id'], None, None),
+    ('ix_event_category_date_id', 'event', ['category', 'date', 'id'], None, None),
+    ('ix_event_organizer_date', 'event', ['organizer_id', 'date'], None, None),
+    ('ix_ticket_event_status', 'ticket', ['event_id', 'payment_status'], None, None),
+    ('ix_ticket_user_id', 'ticket', ['user_id'], None, None),
+    ('ix_invitation_user_id', 'invitation', ['user_id'], None, None),
+    ('ix_blog_post_date_id', 'blog_post', ['date_posted', 'id'], None, None),
+    ('ix_blog_post_published_date_id', 'blog_post', ['date_posted', 'id'], 'published', 'published = 1'),
+    ('ix_blog_post_published_category_date_id', 'blog_post', ['category', 'date_posted', 'id'],
+     'published', 'published = 1'),
+    ('ix_blog_post_published_views', 'blog_post', ['views'], 'published', 'published = 1'),
+    ('ix_user_email_verification_token', 'user', ['email_verification_token'],
+     'email_verification_token IS NOT NULL', 'email_verification_token IS NOT NULL'),
+    ('ix_user_password_reset_token', 'user', ['password_reset_token'],
+     'password_reset_token IS NOT NULL', 'password_reset_token IS NOT NULL'),
+)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, table, columns, pg_where, _ in INDEXES:
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True,
+                                postgresql_where=sa.text(pg_where) if pg_where else None)
+    else:
+        for name, table, columns, _, sqlite_where in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True,
+                            sqlite_where=sa.text(sqlite_where) if sqlite_where else None)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, _, _, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, _, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
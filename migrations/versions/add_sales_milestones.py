@@ -0,0 +1,47 @@
+"""Add sell-through milestones
+
+Creates sales_milestones, one row per event and threshold reached. Events
+already past a threshold are backfilled as notified, so the deploy sends
+nothing for sales made before it.
+
+Revision ID: add_sales_milestones
+Revises: add_daily_metrics
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_sales_milestones'
+down_revision: Union[str, None] = 'add_daily_metrics'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+THRESHOLDS = (50, 80, 100)  # Config.SELL_THROUGH_THRESHOLDS at the time of this migration
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sales_milestones',
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('threshold', sa.Integer(), nullable=False),
+        sa.Column('tickets_sold', sa.Integer(), nullable=False),
+        sa.Column('capacity', sa.Integer(), nullable=False),
+        sa.Column('reached_at', sa.DateTime(), nullable=False),
+        sa.Column('notified_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['event_id'], ['event.id'], ),
+        sa.PrimaryKeyConstraint('event_id', 'threshold')
+    )
+    for threshold in THRESHOLDS:
+        op.execute(
+            "INSERT INTO sales_milestones (event_id, threshold, tickets_sold, capacity, reached_at, notified_at) "
+            f"SELECT s.event_id, {threshold}, s.tickets_sold, e.capacity, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP "
+            "FROM event_stats s JOIN event e ON e.id = s.event_id "
+            f"WHERE e.capacity > 0 AND s.tickets_sold * 100 >= e.capacity * {threshold}"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('sales_milestones')
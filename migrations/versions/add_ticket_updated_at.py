@@ -0,0 +1,27 @@
+"""Add ticket updated_at for scanner manifest deltas
+
+Revision ID: add_ticket_updated_at
+Revises: add_transaction_email
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_ticket_updated_at'
+down_revision: Union[str, None] = 'add_transaction_email'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ticket', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE ticket SET updated_at = COALESCE(used_at, date_purchased)')
+    op.create_index('ix_ticket_event_updated', 'ticket', ['event_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ticket_event_updated', table_name='ticket')
+    op.drop_column('ticket', 'updated_at')
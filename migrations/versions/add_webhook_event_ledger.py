@@ -0,0 +1,34 @@
+"""Add webhook_event ledger for deduplicating payment gateway deliveries
+
+Revision ID: add_webhook_event_ledger
+Revises: add_job_queue
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_webhook_event_ledger'
+down_revision: Union[str, None] = 'add_job_queue'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'webhook_event',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('provider', sa.String(length=50), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('reference', sa.String(length=255), nullable=False),
+        sa.Column('provider_event_id', sa.String(length=255), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('provider', 'event_type', 'reference', name='uq_webhook_event_delivery')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('webhook_event')
@@ -0,0 +1,33 @@
+"""Drop stored base64 QR codes; QR images are rendered on demand
+
+Revision ID: drop_stored_qr_codes
+Revises: add_ticket_updated_at
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'drop_stored_qr_codes'
+down_revision: Union[str, None] = 'add_ticket_updated_at'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_column('qr_code')
+
+    with op.batch_alter_table('invitation', schema=None) as batch_op:
+        batch_op.drop_column('qr_code')
+
+
+def downgrade() -> None:
+    # Stored images are not restored; they are regenerated on demand
+    with op.batch_alter_table('invitation', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('qr_code', sa.Text(), nullable=True))
+
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('qr_code', sa.Text(), nullable=True))
@@ -0,0 +1,16 @@
+#!/usr/bin/env python
+"""
+PartyTicket Nigeria - Background Job Worker
+Processes queued jobs such as ticket confirmation emails and organizer
+notifications. Run alongside the web process: python worker.py
+"""
+
+import os
+from app import create_app
+from app.jobs import run_worker
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+
+if __name__ == '__main__':
+    with app.app_context():
+        run_worker()